@@ -8,21 +8,26 @@ from flask_sqlalchemy import SQLAlchemy
 
 from core.configuration.configuration import get_app_version
 from core.managers.config_manager import ConfigManager
+from core.managers.database_routing_manager import DatabaseRoutingManager
 from core.managers.error_handler_manager import ErrorHandlerManager
 from core.managers.logging_manager import LoggingManager
 from core.managers.module_manager import ModuleManager
+from core.managers.query_instrumentation_manager import QueryInstrumentationManager
+from core.repositories.routing import RoutingSession
+from core.serialisers.json_provider import MsgspecJSONProvider
 
 # Load environment variables
 load_dotenv()
 
 # Create the instances
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 mail = Mail()
 
 
 def create_app(config_name="development"):
     app = Flask(__name__)
+    app.json = MsgspecJSONProvider(app)
 
     # Load configuration according to environment
     config_manager = ConfigManager(app)
@@ -52,9 +57,9 @@ def create_app(config_name="development"):
 
     @login_manager.user_loader
     def load_user(user_id):
-        from app.modules.auth.models import User
+        from app.modules.auth.identity import get_identity
 
-        return User.query.get(int(user_id))
+        return get_identity(int(user_id))
 
     # Set up logging
     logging_manager = LoggingManager(app)
@@ -64,6 +69,14 @@ def create_app(config_name="development"):
     error_handler_manager = ErrorHandlerManager(app)
     error_handler_manager.register_error_handlers()
 
+    # Keep clients that just wrote on the primary database
+    database_routing_manager = DatabaseRoutingManager(app, db)
+    database_routing_manager.register_routing()
+
+    # Count and time the SQL of every request
+    query_instrumentation_manager = QueryInstrumentationManager(app)
+    query_instrumentation_manager.register_instrumentation()
+
     # Injecting environment variables into jinja context
     @app.context_processor
     def inject_vars_into_jinja():
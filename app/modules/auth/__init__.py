@@ -1,3 +1,7 @@
+from app.modules.auth.identity import register_identity_cache_listeners
 from core.blueprints.base_blueprint import BaseBlueprint
 
 auth_bp = BaseBlueprint("auth", __name__, template_folder="templates")
+
+# Cached identities are dropped when the user, its profile or its curated communities change
+register_identity_cache_listeners()
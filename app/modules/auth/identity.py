@@ -0,0 +1,211 @@
+import threading
+import time
+from typing import FrozenSet, NamedTuple, Optional
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app import db
+from app.modules.auth.models import RoleType, User
+
+_PENDING_KEY = "identity_changed_user_ids"
+
+# user id -> (expiry, IdentitySnapshot); an entry is only served while its version is the user's
+# ``identity_version``, which every worker reads from the database
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class ProfileSummary(NamedTuple):
+    id: int
+    name: str
+    surname: str
+    affiliation: Optional[str]
+    orcid: Optional[str]
+    enabled_two_factor: bool
+
+
+class IdentitySnapshot(NamedTuple):
+    id: int
+    email: str
+    role: RoleType
+    profile: Optional[ProfileSummary]
+    curated_community_ids: FrozenSet[int]
+    version: int
+
+
+class Identity(UserMixin):
+    """
+    ``current_user`` of the requests after login: the role, profile summary and curated communities
+    come from a cached ``IdentitySnapshot``, so checking permissions and rendering the navigation bar
+    run no query once the request has checked its version. Any other attribute is read from the ``User``,
+    loaded on first use in the request.
+    """
+
+    def __init__(self, snapshot: IdentitySnapshot):
+        self._snapshot = snapshot
+        self._user = None
+
+    id = property(lambda self: self._snapshot.id)
+    email = property(lambda self: self._snapshot.email)
+    role = property(lambda self: self._snapshot.role)
+    profile = property(lambda self: self._snapshot.profile)
+    curated_community_ids = property(lambda self: self._snapshot.curated_community_ids)
+
+    @property
+    def user(self) -> User:
+        if self._user is None:
+            self._user = db.session.get(User, self.id)
+        return self._user
+
+    def temp_folder(self) -> str:
+        from app.modules.auth.services import AuthenticationService
+
+        return AuthenticationService().temp_folder_by_user(self)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __repr__(self):
+        return f"<Identity {self.email}>"
+
+
+def _cache_seconds():
+    try:
+        return current_app.config.get("IDENTITY_CACHE_SECONDS", 60)
+    except RuntimeError:
+        return 0
+
+
+def load_snapshot(user_id: int) -> Optional[IdentitySnapshot]:
+    """Identity of ``user_id`` read from the database: one query for the user and profile, one for the communities."""
+    from app.modules.community.models import community_curator_association
+    from app.modules.profile.models import UserProfile
+
+    row = db.session.execute(
+        select(
+            User.id,
+            User.email,
+            User.role,
+            UserProfile.id,
+            UserProfile.name,
+            UserProfile.surname,
+            UserProfile.affiliation,
+            UserProfile.orcid,
+            UserProfile.enabled_two_factor,
+            User.identity_version,
+        )
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+
+    community_ids = db.session.execute(
+        select(community_curator_association.c.community_id).where(community_curator_association.c.user_id == user_id)
+    ).scalars()
+    profile = ProfileSummary(*row[3:9]) if row[3] is not None else None
+    return IdentitySnapshot(row[0], row[1], row[2], profile, frozenset(community_ids), row[9])
+
+
+def get_identity(user_id: int) -> Optional[Identity]:
+    """
+    ``Identity`` of ``user_id``, from the cache while its version and TTL hold; None for unknown users.
+    The version is read from the user's row on every call, so a change committed by any worker is seen.
+    """
+    version = db.session.execute(select(User.identity_version).where(User.id == user_id)).scalar()
+    if version is None:
+        return None
+    with _cache_lock:
+        entry = _cache.get(user_id)
+    if entry is not None and entry[1].version == version and entry[0] >= time.monotonic():
+        return Identity(entry[1])
+
+    snapshot = load_snapshot(user_id)
+    if snapshot is None:
+        return None
+
+    seconds = _cache_seconds()
+    if seconds > 0:
+        with _cache_lock:
+            _cache[user_id] = (time.monotonic() + seconds, snapshot)
+    return Identity(snapshot)
+
+
+def bump_identity_versions(session, user_ids):
+    """Bump the ``identity_version`` of ``user_ids`` in the transaction of ``session``, with the change itself."""
+    user_ids = set(user_ids)
+    user_ids.discard(None)
+    if user_ids:
+        session.execute(
+            update(User)
+            .where(User.id.in_(user_ids))
+            .values(identity_version=User.identity_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def clear_identity_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def register_identity_cache_listeners():
+    if event.contains(Session, "before_flush", collect_identity_changes):
+        return
+    event.listen(Session, "before_flush", collect_identity_changes)
+    event.listen(Session, "after_flush", bump_changed_identities)
+
+
+def _changed_users(session):
+    """Ids of the users whose account, profile or curated communities are touched by the flush."""
+    from app.modules.community.models import Community, community_curator_association
+    from app.modules.profile.models import UserProfile
+
+    user_ids = set()
+    deleted_communities = []
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, User):
+            user_ids.add(instance.id)
+        elif isinstance(instance, UserProfile):
+            user_ids.add(instance.user_id)
+        elif isinstance(instance, Community):
+            if instance in session.deleted:
+                # Its curators are deleted with it, read them while they are still there
+                deleted_communities.append(instance.id)
+                continue
+            history = inspect(instance).attrs.curators.history
+            user_ids.update(user.id for user in list(history.added) + list(history.deleted))
+
+    if deleted_communities:
+        user_ids.update(
+            session.execute(
+                select(community_curator_association.c.user_id).where(
+                    community_curator_association.c.community_id.in_(deleted_communities)
+                )
+            ).scalars()
+        )
+    user_ids.discard(None)
+    return user_ids
+
+
+def collect_identity_changes(session, flush_context, instances):
+    user_ids = _changed_users(session)
+    if user_ids:
+        session.info.setdefault(_PENDING_KEY, set()).update(user_ids)
+
+
+def bump_changed_identities(session, flush_context):
+    # After the flush, so that the rows of new profiles and curators are there and a rollback undoes the bump
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        bump_identity_versions(session, user_ids)
+
+
+def mark_identities_changed(session, user_ids):
+    """Bump the identity versions of ``user_ids`` in the transaction of ``session``, for changes made with plain SQL."""
+    bump_identity_versions(session, user_ids)
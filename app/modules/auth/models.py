@@ -15,6 +15,9 @@ class RoleType(Enum):
 
 
 class User(db.Model, UserMixin):
+    # Keyset pagination order, see core/repositories/pagination.py
+    __table_args__ = (db.Index("ix_user_created_at_id", "created_at", "id"),)
+
     id = db.Column(db.Integer, primary_key=True)
 
     email = db.Column(db.String(256), unique=True, nullable=False)
@@ -22,6 +25,8 @@ class User(db.Model, UserMixin):
     created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
 
     role = db.Column(SQLAlchemyEnum(RoleType), nullable=False, default=RoleType.USER)
+    # Bumped in the transaction changing the role, profile or curated communities, see app/modules/auth/identity.py
+    identity_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     token = db.Column(db.String(255), unique=True, nullable=True)
 
@@ -1,6 +1,8 @@
 from app.modules.auth.models import RoleType, User
 from app.modules.profile.models import UserProfile
 from core.repositories.BaseRepository import BaseRepository
+from core.repositories.pagination import DEFAULT_PAGE_SIZE, KeysetPage
+from core.repositories.routing import read_only
 
 
 class UserRepository(BaseRepository):
@@ -21,13 +23,21 @@ class UserRepository(BaseRepository):
     def get_by_email(self, email: str):
         return self.model.query.filter_by(email=email).first()
 
-    def get_roles(self):
-        return (
-            self.session.query(self.model.id, self.model.email, self.model.role, UserProfile.name, UserProfile.surname)
+    @read_only
+    def get_roles(self, cursor=None, limit=DEFAULT_PAGE_SIZE) -> KeysetPage:
+        query = (
+            self.session.query(
+                self.model.id,
+                self.model.email,
+                self.model.role,
+                UserProfile.name,
+                UserProfile.surname,
+                self.model.created_at,
+            )
             .join(UserProfile, self.model.id == UserProfile.user_id)
             .filter(self.model.role != RoleType.ADMINISTRATOR)
-            .all()
         )
+        return self.paginate(query, cursor, limit)
 
     def get_curators(self):
         return User.query.filter(User.role.in_([RoleType.CURATOR, RoleType.ADMINISTRATOR])).all()
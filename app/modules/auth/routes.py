@@ -4,7 +4,7 @@ from datetime import datetime
 
 import pyotp
 import qrcode
-from flask import redirect, render_template, request, session, url_for
+from flask import abort, redirect, render_template, request, session, url_for
 from flask_login import current_user, login_required, login_user, logout_user
 from werkzeug.security import generate_password_hash
 
@@ -196,7 +196,10 @@ def logout():
 def admin_roles():
     if current_user.role.value != "administrator":
         return redirect(url_for("public.index"))
-    roles = authentication_service.get_users_roles()
+    try:
+        roles = authentication_service.get_users_roles(request.args.get("cursor"))
+    except ValueError:
+        abort(400)
     return render_template("auth/admin_roles.html", roles=roles)
 
 
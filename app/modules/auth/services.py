@@ -32,7 +32,7 @@ class AuthenticationService(BaseService):
         return False
 
     def is_email_available(self, email: str) -> bool:
-        return self.repository.get_by_email(email) is None
+        return not self.repository.exists(email=email)
 
     def create_with_profile(self, **kwargs):
         try:
@@ -109,10 +109,10 @@ class AuthenticationService(BaseService):
 
         mail.send(msg)
 
-    def get_users_roles(self):
+    def get_users_roles(self, cursor=None, limit=None):
         if current_user.role != RoleType.ADMINISTRATOR:
             raise PermissionError("Se requiere rol de administrador para esta acción.")
-        return self.repository.get_roles()
+        return self.repository.get_roles(cursor, limit)
 
     def get_curators(self):
         return self.repository.get_curators()
@@ -2,7 +2,7 @@ import os
 import re
 import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from urllib.parse import urlparse
 
 import pyotp
@@ -708,3 +708,177 @@ def test_service_get_curated_communities_by_id_404_not_found(clean_database):
 
     with pytest.raises(Exception):
         service.get_curated_communities_by_id(invalid_user_id)
+
+
+def test_repository_bulk_and_streaming_helpers(clean_database):
+    repository = UserRepository()
+    users = repository.bulk_create(
+        [{"email": f"bulk{index}@example.com", "password": "test1234"} for index in range(3)]
+        + [User(email="bulk3@example.com", password="test1234")]
+    )
+    assert all(user.id is not None for user in users)
+
+    ids = [user.id for user in users]
+    assert repository.get_many([ids[2], 999999, ids[0], ids[2]]) == [users[2], users[0]]
+    assert repository.get_many([]) == []
+
+    assert repository.exists(email="bulk1@example.com")
+    assert repository.exists(User.id.in_(ids), role=RoleType.USER)
+    assert not repository.exists(email="missing@example.com")
+    assert AuthenticationService().is_email_available("missing@example.com")
+
+    assert (
+        repository.bulk_update([{"id": ids[0], "role": RoleType.CURATOR}, {"id": 999999, "role": RoleType.CURATOR}])
+        == 1
+    )
+    db.session.expire_all()
+    assert repository.get_by_id(ids[0]).role == RoleType.CURATOR
+
+    assert [user.id for user in repository.stream(batch_size=2)] == sorted(ids)
+    curators = repository.stream(User.query.filter_by(role=RoleType.CURATOR), batch_size=2)
+    assert [user.email for user in curators] == ["bulk0@example.com"]
+
+
+def test_roles_are_paginated_with_keyset_cursors(clean_database):
+    created_at = datetime(2024, 1, 1)
+    for index in range(5):
+        # Two users share a timestamp, so the id has to break the tie between pages
+        user = User(
+            email=f"page{index}@example.com", password="test1234", created_at=created_at - timedelta(days=index // 2)
+        )
+        user.profile = UserProfile(name="Page", surname=str(index))
+        db.session.add(user)
+    db.session.commit()
+
+    repository = UserRepository()
+    seen, cursor = [], None
+    while True:
+        page = repository.get_roles(cursor, limit=2)
+        seen.extend(email for _, email, *_ in page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert seen == [
+        "page1@example.com",
+        "page0@example.com",
+        "page3@example.com",
+        "page2@example.com",
+        "page4@example.com",
+    ]
+
+    with pytest.raises(ValueError):
+        repository.get_roles("not-a-cursor")
+
+
+def test_keyset_cursor_round_trip():
+    from core.repositories.pagination import MAX_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor
+
+    aware = datetime(2024, 5, 6, 7, 8, 9, 123456).astimezone()
+    created_at, id = decode_cursor(encode_cursor(aware, 42))
+    assert id == 42 and created_at.tzinfo is None
+    assert created_at == aware.astimezone(timezone.utc).replace(tzinfo=None)
+
+    assert clamp_page_size(None) == 20
+    assert clamp_page_size("5") == 5
+    assert clamp_page_size(10_000) == MAX_PAGE_SIZE
+    assert clamp_page_size(0) == 1
+
+
+def test_read_only_methods_use_replicas_until_the_session_writes(clean_database, tmp_path):
+    from sqlalchemy import create_engine
+
+    from core.repositories.routing import WROTE_KEY, primary_only
+
+    user = User(email="primary@example.com", password="test1234")
+    user.profile = UserProfile(name="Primary", surname="User")
+    db.session.add(user)
+    db.session.commit()
+
+    # A second database standing in for a replica that has not caught up with the primary
+    replica = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(replica)
+    with replica.begin() as connection:
+        user_id = connection.execute(
+            User.__table__.insert().values(email="replica@example.com", password="x")
+        ).inserted_primary_key[0]
+        connection.execute(UserProfile.__table__.insert().values(user_id=user_id, name="Replica", surname="User"))
+
+    engines = db.engines
+    engines["replica_test"] = replica
+    db.session.info.pop(WROTE_KEY, None)
+    try:
+        repository = UserRepository()
+        assert [email for _, email, *_ in repository.get_roles().items] == ["replica@example.com"]
+        # Only the methods marked read-only are routed
+        assert repository.get_by_email("primary@example.com") is not None
+        with primary_only():
+            assert "primary@example.com" in [email for _, email, *_ in repository.get_roles().items]
+
+        # Once the session wrote, it reads its own writes from the primary
+        user.profile.name = "Updated"
+        db.session.commit()
+        assert "primary@example.com" in [email for _, email, *_ in repository.get_roles().items]
+    finally:
+        del engines["replica_test"]
+        db.session.info.pop(WROTE_KEY, None)
+        replica.dispose()
+
+
+def test_identity_is_cached_until_the_user_changes(clean_database, test_app, monkeypatch):
+    from sqlalchemy import update
+
+    from app.modules.auth.identity import Identity, clear_identity_cache, get_identity
+    from app.modules.profile.services import UserProfileService
+    from core.managers.query_instrumentation_manager import record_queries
+
+    monkeypatch.setitem(test_app.config, "IDENTITY_CACHE_SECONDS", 60)
+    clear_identity_cache()
+    service = AuthenticationService()
+    user = service.create_with_profile(name="Cached", surname="Identity", email="cached@example.com", password="pw")
+
+    identity = get_identity(user.id)
+    assert isinstance(identity, Identity)
+    assert (identity.email, identity.role, identity.profile.surname) == (
+        "cached@example.com",
+        RoleType.USER,
+        "Identity",
+    )
+    # Only the version is read
+    with record_queries() as stats:
+        identity = get_identity(user.id)
+        assert identity.role == RoleType.USER and identity.curated_community_ids == frozenset()
+    assert stats.count == 1
+
+    # Role, profile and curated communities changes are seen by the next request
+    service.update_user_role(user.id, "curator")
+    assert get_identity(user.id).role == RoleType.CURATOR
+
+    UserProfileService().update(identity.profile.id, name="Renamed")
+    assert get_identity(user.id).profile.name == "Renamed"
+
+    community = Community(name="Cached community", description="Curated")
+    community.curators.append(db.session.get(User, user.id))
+    db.session.add(community)
+    db.session.commit()
+    identity = get_identity(user.id)
+    assert identity.curated_community_ids == {community.id}
+
+    # A change committed by another worker is seen through the version stored with the user
+    db.session.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(role=RoleType.ADMINISTRATOR, identity_version=User.identity_version + 1)
+    )
+    db.session.commit()
+    assert get_identity(user.id).role == RoleType.ADMINISTRATOR
+
+    db.session.delete(community)
+    db.session.commit()
+    identity = get_identity(user.id)
+    assert identity.curated_community_ids == frozenset()
+
+    # Anything not cached is read from the user itself, and compares equal to it
+    assert identity.check_password("pw")
+    assert identity == db.session.get(User, user.id)
+    assert get_identity(user.id + 1000) is None
+    clear_identity_cache()
@@ -1,3 +1,7 @@
+from app.modules.community.aggregates import register_community_aggregate_listeners
 from core.blueprints.base_blueprint import BaseBlueprint
 
 community_bp = BaseBlueprint("community", __name__, template_folder="templates")
+
+# Dataset counts, size and downloads of the communities are kept up to date with their associations
+register_community_aggregate_listeners()
@@ -0,0 +1,221 @@
+from collections import defaultdict
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.modules.community.models import Community, CommunityDataSet, CommunityDataSetStatus
+from app.modules.dataset.aggregates import PREVIOUS_SIZES_KEY, register_dataset_aggregate_listeners
+from app.modules.dataset.models import DataSet
+
+AGGREGATED_COLUMNS = ["accepted_datasets_count", "pending_datasets_count", "total_size_in_bytes", "download_counter"]
+# CommunityDataSet columns that move a dataset in or out of a community's counts
+AGGREGATED_ASSOCIATION_ATTRIBUTES = ("community_id", "dataset_id", "status")
+DELETED_DATASETS_KEY = "associations_of_deleted_datasets"
+REFRESHED_COMMUNITIES_KEY = "refreshed_community_aggregates"
+
+
+def register_community_aggregate_listeners():
+    if event.contains(Session, "after_flush", update_community_aggregates):
+        return
+    # The dataset sizes are recounted first, so the community totals add up the new ones
+    register_dataset_aggregate_listeners()
+    event.listen(Session, "before_flush", collect_associations_of_deleted_datasets)
+    event.listen(Session, "after_flush", update_community_aggregates)
+    event.listen(Session, "after_flush_postexec", expire_community_aggregates)
+
+
+def refresh_community_aggregates(connection, community_ids):
+    """
+    Recount the dataset counts, size and downloads of ``community_ids`` from their dataset associations.
+    The flush keeps them up to date with deltas; this full recount is only for repairs and backfills.
+    """
+    community_ids = list(community_ids)
+    if not community_ids:
+        return
+
+    def datasets(column, status=CommunityDataSetStatus.ACCEPTED):
+        return (
+            select(column)
+            .select_from(CommunityDataSet)
+            .join(DataSet, DataSet.id == CommunityDataSet.dataset_id)
+            .where(CommunityDataSet.community_id == Community.id, CommunityDataSet.status == status)
+            .scalar_subquery()
+        )
+
+    connection.execute(
+        update(Community)
+        .where(Community.id.in_(community_ids))
+        .values(
+            accepted_datasets_count=datasets(func.count()),
+            pending_datasets_count=datasets(func.count(), CommunityDataSetStatus.PENDING),
+            total_size_in_bytes=datasets(func.coalesce(func.sum(DataSet.total_size_in_bytes), 0)),
+            download_counter=datasets(func.coalesce(func.sum(DataSet.download_counter), 0)),
+        )
+    )
+
+
+def _contribution(status, size, downloads):
+    """What one association adds to its community, in the order of ``AGGREGATED_COLUMNS``."""
+    if status == CommunityDataSetStatus.ACCEPTED:
+        return (1, 0, size or 0, downloads or 0)
+    if status == CommunityDataSetStatus.PENDING:
+        return (0, 1, 0, 0)
+    return (0, 0, 0, 0)
+
+
+def _previous(instance, key):
+    """Value of ``key`` before the flush."""
+    history = inspect(instance).attrs[key].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(instance, key)
+
+
+def _association_key(instance):
+    return (instance.community_id, instance.dataset_id, instance.status)
+
+
+def _previous_association_key(instance):
+    # Until the flush is finalized the identity still holds the primary key the row had
+    identity = inspect(instance).identity
+    community_id, dataset_id = identity if identity else (instance.community_id, instance.dataset_id)
+    return (community_id, dataset_id, _previous(instance, "status"))
+
+
+def collect_associations_of_deleted_datasets(session, flush_context, instances):
+    # Their association rows are deleted by the flush, so what they added up is read beforehand
+    dataset_ids = [instance.id for instance in session.deleted if isinstance(instance, DataSet)]
+    if not dataset_ids:
+        return
+    rows = session.connection().execute(
+        select(
+            CommunityDataSet.community_id,
+            CommunityDataSet.dataset_id,
+            CommunityDataSet.status,
+            DataSet.total_size_in_bytes,
+            DataSet.download_counter,
+        )
+        .join(DataSet, DataSet.id == CommunityDataSet.dataset_id)
+        .where(CommunityDataSet.dataset_id.in_(dataset_ids))
+    )
+    session.info.setdefault(DELETED_DATASETS_KEY, []).extend(rows.all())
+
+
+def _community_deltas(session):
+    """
+    ``{community id: deltas of AGGREGATED_COLUMNS}`` for the flush. Only the associations and datasets the
+    flush touched are read, so the cost does not depend on how many datasets a community holds.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0, 0])
+
+    def add(community_id, contribution, sign=1):
+        for index, value in enumerate(contribution):
+            deltas[community_id][index] += sign * value
+
+    # Associations removed together with their dataset
+    removed = set()
+    for community_id, dataset_id, status, size, downloads in session.info.pop(DELETED_DATASETS_KEY, ()):
+        removed.add((community_id, dataset_id))
+        add(community_id, _contribution(status, size, downloads), -1)
+
+    # Size and downloads of the datasets before the flush, for those that changed
+    previous_values = {
+        dataset_id: [size, None] for dataset_id, size in session.info.pop(PREVIOUS_SIZES_KEY, {}).items()
+    }
+    for instance in session.dirty:
+        if isinstance(instance, DataSet) and inspect(instance).attrs.download_counter.history.has_changes():
+            previous_values.setdefault(instance.id, [None, None])[1] = _previous(instance, "download_counter")
+
+    # (before, after) of each association the flush added, removed or changed, as (community, dataset, status)
+    changed = []
+    for instance in session.new:
+        if isinstance(instance, CommunityDataSet):
+            changed.append((None, _association_key(instance)))
+    for instance in session.deleted:
+        if isinstance(instance, CommunityDataSet):
+            changed.append((_previous_association_key(instance), None))
+    for instance in session.dirty:
+        if isinstance(instance, CommunityDataSet):
+            state = inspect(instance)
+            if any(state.attrs[key].history.has_changes() for key in AGGREGATED_ASSOCIATION_ATTRIBUTES):
+                changed.append((_previous_association_key(instance), _association_key(instance)))
+    changed = [
+        (before, after)
+        for before, after in changed
+        if not (before and before[:2] in removed) and not (after and after[:2] in removed)
+    ]
+
+    dataset_ids = set(previous_values) | {pair[1] for change in changed for pair in change if pair}
+    dataset_ids.discard(None)
+    if not dataset_ids:
+        return deltas
+    connection = session.connection()
+    current_values = {
+        dataset_id: (size, downloads)
+        for dataset_id, size, downloads in connection.execute(
+            select(DataSet.id, DataSet.total_size_in_bytes, DataSet.download_counter).where(DataSet.id.in_(dataset_ids))
+        )
+    }
+
+    def values_before(dataset_id):
+        size, downloads = current_values.get(dataset_id, (0, 0))
+        previous_size, previous_downloads = previous_values.get(dataset_id, (None, None))
+        return (
+            size if previous_size is None else previous_size,
+            downloads if previous_downloads is None else previous_downloads,
+        )
+
+    touched = set()
+    for before, after in changed:
+        if before:
+            touched.add(before[:2])
+            add(before[0], _contribution(before[2], *values_before(before[1])), -1)
+        if after:
+            touched.add(after[:2])
+            add(after[0], _contribution(after[2], *current_values.get(after[1], (0, 0))))
+
+    # Accepted associations left as they were, whose dataset changed size or downloads
+    resized = [dataset_id for dataset_id in previous_values if dataset_id in current_values]
+    if resized:
+        rows = connection.execute(
+            select(CommunityDataSet.community_id, CommunityDataSet.dataset_id).where(
+                CommunityDataSet.dataset_id.in_(resized), CommunityDataSet.status == CommunityDataSetStatus.ACCEPTED
+            )
+        )
+        for community_id, dataset_id in rows:
+            if (community_id, dataset_id) in touched:
+                continue
+            size, downloads = current_values[dataset_id]
+            previous_size, previous_downloads = values_before(dataset_id)
+            add(community_id, (0, 0, size - previous_size, downloads - previous_downloads))
+
+    return deltas
+
+
+def update_community_aggregates(session, flush_context):
+    deltas = _community_deltas(session)
+    community_ids_by_delta = defaultdict(list)
+    for community_id, delta in deltas.items():
+        if community_id is not None and any(delta):
+            community_ids_by_delta[tuple(delta)].append(community_id)
+    if not community_ids_by_delta:
+        return
+
+    # Same transaction as the change, so the counts shown never disagree with the associations.
+    # Communities moved by the same amounts, such as all those of a downloaded dataset, share one UPDATE.
+    connection = session.connection()
+    for delta, community_ids in community_ids_by_delta.items():
+        connection.execute(
+            update(Community)
+            .where(Community.id.in_(community_ids))
+            .values({column: getattr(Community, column) + value for column, value in zip(AGGREGATED_COLUMNS, delta)})
+        )
+        session.info.setdefault(REFRESHED_COMMUNITIES_KEY, set()).update(community_ids)
+
+
+def expire_community_aggregates(session, flush_context):
+    """Reload the updated columns on next access, once the flush has finished with the instances."""
+    for community_id in session.info.pop(REFRESHED_COMMUNITIES_KEY, ()):
+        community = session.identity_map.get(inspect(Community).identity_key_from_primary_key((community_id,)))
+        if community is not None:
+            session.expire(community, AGGREGATED_COLUMNS)
@@ -1,6 +1,7 @@
 from enum import Enum
 
 from sqlalchemy import Enum as SQLAlchemyEnum
+from sqlalchemy.orm import column_property
 
 from app import db
 from app.modules.dataset.models import DataSet
@@ -20,11 +21,17 @@ class CommunityDataSetStatus(Enum):
 
 class CommunityDataSet(db.Model):
     __tablename__ = "community_dataset_association"
+    # Datasets of a community by status, for its paginated listings
+    __table_args__ = (db.Index("ix_community_dataset_association_community_id_status", "community_id", "status"),)
 
     community_id = db.Column(db.Integer, db.ForeignKey("community.id"), primary_key=True)
     dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"), primary_key=True)
 
-    status = db.Column(SQLAlchemyEnum(CommunityDataSetStatus), nullable=False, default=CommunityDataSetStatus.PENDING)
+    # active_history keeps the previous status when it is set unloaded, see community/aggregates.py
+    status = column_property(
+        db.Column(SQLAlchemyEnum(CommunityDataSetStatus), nullable=False, default=CommunityDataSetStatus.PENDING),
+        active_history=True,
+    )
 
     community = db.relationship("Community", back_populates="dataset_associations")
     dataset = db.relationship("DataSet", back_populates="community_associations")
@@ -38,6 +45,12 @@ class Community(db.Model):
     name = db.Column(db.String(256), nullable=False, unique=True)
     description = db.Column(db.Text, nullable=False)
     logo_url = db.Column(db.String(512), nullable=True)
+    # Maintained by the flush that changes an association or a dataset, see community/aggregates.py;
+    # size and downloads add up the accepted datasets
+    accepted_datasets_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    pending_datasets_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_size_in_bytes = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
+    download_counter = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     curators = db.relationship(
         "User",
@@ -61,7 +74,16 @@ class Community(db.Model):
             "name": self.name,
             "description": self.description,
             "logo_url": self.logo_url,
+            "accepted_datasets_count": self.accepted_datasets_count,
+            "pending_datasets_count": self.pending_datasets_count,
+            "total_size_in_bytes": self.total_size_in_bytes,
+            "download_counter": self.download_counter,
         }
 
+    def get_total_size_for_human(self):
+        from app.modules.dataset.services import SizeService
+
+        return SizeService().get_human_readable_size(self.total_size_in_bytes)
+
     def __repr__(self):
         return f"Community<{self.id}>: {self.name}"
@@ -1,5 +1,26 @@
-from app.modules.community.models import Community, CommunityDataSet, CommunityDataSetStatus
+from sqlalchemy import delete, exists, func, insert, literal, select
+from sqlalchemy.orm import selectinload
+
+from app.modules.auth.identity import mark_identities_changed
+from app.modules.auth.models import RoleType, User
+from app.modules.community.aggregates import refresh_community_aggregates
+from app.modules.community.models import (
+    Community,
+    CommunityDataSet,
+    CommunityDataSetStatus,
+    community_curator_association,
+)
+from app.modules.dataset.models import DataSet
+from app.modules.dataset.repositories import dataset_load_options
 from core.repositories.BaseRepository import BaseRepository
+from core.repositories.pagination import DEFAULT_PAGE_SIZE, KeysetPage, keyset_paginate
+
+_curators = community_curator_association.c
+
+
+def _is_curator_of(community_id):
+    # Correlated EXISTS on the primary key of the association, (community_id, user_id)
+    return exists().where(_curators.community_id == community_id, _curators.user_id == User.id)
 
 
 class CommunityRepository(BaseRepository):
@@ -9,14 +30,88 @@ class CommunityRepository(BaseRepository):
     def get_all_communities(self):
         return Community.query.order_by(Community.name.asc()).all()
 
-    def get_existing_comunnity_with_name(self, community_name):
-        return Community.query.filter_by(name=community_name).first()
+    def get_available_for_dataset(self, dataset_id):
+        """
+        Communities the dataset can be proposed to: those it is not pending or accepted in. Communities that
+        rejected it stay available, since proposing it again reopens the rejected association for review.
+        """
+        proposed = exists().where(
+            CommunityDataSet.community_id == Community.id,
+            CommunityDataSet.dataset_id == dataset_id,
+            CommunityDataSet.status != CommunityDataSetStatus.REJECTED,
+        )
+        return Community.query.filter(~proposed).order_by(Community.name.asc()).all()
+
+    def recount_aggregates(self, batch_size=500) -> int:
+        """Recount every community's aggregates from scratch, to repair counters that drifted."""
+        community_ids = self.session.execute(select(Community.id).order_by(Community.id)).scalars().all()
+        connection = self.session.connection()
+        for offset in range(0, len(community_ids), batch_size):
+            refresh_community_aggregates(connection, community_ids[offset : offset + batch_size])
+        self.session.commit()
+        return len(community_ids)
+
+    def is_curator(self, community_id, user_id) -> bool:
+        statement = exists().where(_curators.community_id == community_id, _curators.user_id == user_id).select()
+        return self.session.execute(statement).scalar()
+
+    def curated_community_ids(self, user_id) -> frozenset:
+        statement = select(_curators.community_id).where(_curators.user_id == user_id)
+        return frozenset(self.session.execute(statement).scalars())
+
+    def count_curators(self, community_id) -> int:
+        statement = select(func.count()).where(_curators.community_id == community_id)
+        return self.session.execute(statement).scalar_one()
+
+    def available_curators(self, community_id):
+        """``(id, email)`` of the curators and administrators not curating the community yet."""
+        statement = (
+            select(User.id, User.email)
+            .where(User.role.in_([RoleType.CURATOR, RoleType.ADMINISTRATOR]), ~_is_curator_of(community_id))
+            .order_by(User.id)
+        )
+        return self.session.execute(statement).all()
+
+    def add_curators(self, community_id, user_ids) -> int:
+        """Make the existing users of ``user_ids`` curators, skipping current ones, in a single INSERT ... SELECT."""
+        user_ids = set(user_ids)
+        if not user_ids:
+            return 0
+        statement = insert(community_curator_association).from_select(
+            ["community_id", "user_id"],
+            select(literal(community_id), User.id).where(User.id.in_(user_ids), ~_is_curator_of(community_id)),
+        )
+        added = self.session.execute(statement).rowcount
+        mark_identities_changed(self.session, user_ids)
+        return added
+
+    def remove_curator(self, community_id, user_id) -> int:
+        statement = delete(community_curator_association).where(
+            _curators.community_id == community_id, _curators.user_id == user_id
+        )
+        removed = self.session.execute(statement).rowcount
+        mark_identities_changed(self.session, {user_id})
+        return removed
 
 
 class CommunityDataSetRepository(BaseRepository):
     def __init__(self):
         super().__init__(CommunityDataSet)
 
+    def get_datasets(
+        self, community_id, status, cursor=None, limit=DEFAULT_PAGE_SIZE, profile="list", with_uploader=False
+    ) -> KeysetPage:
+        """Newest-first keyset page of the datasets of a community with ``status``, loaded with ``profile``."""
+        options = list(dataset_load_options(profile))
+        if with_uploader:
+            options.append(selectinload(DataSet.user).selectinload(User.profile))
+        query = (
+            DataSet.query.options(*options)
+            .join(CommunityDataSet, CommunityDataSet.dataset_id == DataSet.id)
+            .filter(CommunityDataSet.community_id == community_id, CommunityDataSet.status == status)
+        )
+        return keyset_paginate(query, DataSet, cursor, limit)
+
     def get_existing_association(self, community_id, dataset_id):
         return CommunityDataSet.query.get((community_id, dataset_id))
 
@@ -29,3 +124,17 @@ class CommunityDataSetRepository(BaseRepository):
         return CommunityDataSet.query.filter(
             CommunityDataSet.dataset_id == dataset_id, CommunityDataSet.status == CommunityDataSetStatus.ACCEPTED
         ).all()
+
+    def get_communities_by_dataset(self, dataset_ids):
+        """Communities associated to each of ``dataset_ids``, whatever the status, in one query."""
+        rows = (
+            self.session.query(CommunityDataSet.dataset_id, Community)
+            .join(Community, Community.id == CommunityDataSet.community_id)
+            .filter(CommunityDataSet.dataset_id.in_(dataset_ids))
+            .order_by(Community.name.asc())
+            .all()
+        )
+        communities = {dataset_id: [] for dataset_id in dataset_ids}
+        for dataset_id, community in rows:
+            communities[dataset_id].append(community)
+        return communities
@@ -1,4 +1,4 @@
-from flask import flash, redirect, render_template, url_for
+from flask import abort, flash, redirect, render_template, request, url_for
 from flask_login import current_user, login_required
 
 from app.modules.auth.models import RoleType
@@ -6,13 +6,14 @@ from app.modules.auth.services import AuthenticationService
 from app.modules.auth.utils import role_required
 from app.modules.community import community_bp
 from app.modules.community.forms import AddCuratorsForm, CommunityForm
-from app.modules.community.services import CommunityDataSetService, CommunityService
+from app.modules.community.services import CommunityDataSetService, CommunityPermissionService, CommunityService
 from app.modules.dataset.services import DataSetService
 
 community_service = CommunityService()
 user_service = AuthenticationService()
 dataset_service = DataSetService()
 community_dataset_service = CommunityDataSetService()
+community_permission_service = CommunityPermissionService()
 
 
 """
@@ -38,8 +39,19 @@ READ BY ID
 @role_required(roles=[RoleType.CURATOR, RoleType.ADMINISTRATOR])
 def get_community(community_id):
     community = community_service.get_or_404(community_id)
+    try:
+        accepted_datasets = community_dataset_service.get_accepted_datasets(community_id, request.args.get("cursor"))
+    except ValueError:
+        abort(400)
 
-    return render_template("community/details.html", community=community)
+    return render_template(
+        "community/details.html",
+        community=community,
+        accepted_datasets=accepted_datasets,
+        can_curate=community_permission_service.can_curate(current_user, community_id),
+        is_curator=community_permission_service.is_curator(current_user, community_id),
+        curators_count=community_permission_service.count_curators(community_id),
+    )
 
 
 """
@@ -186,13 +198,8 @@ VIEW CURATORS
 
 
 def get_available_curators_choices(community_id):
-    community = community_service.get_or_404(community_id)
-    existing_curator_ids = [u.id for u in community.curators.all()]
-    avilable_curators = user_service.get_curators()
-
-    available_users = [u for u in avilable_curators if u.id not in existing_curator_ids]
-
-    return [(str(u.id), u.email) for u in available_users]
+    community_service.get_or_404(community_id)
+    return community_permission_service.available_curator_choices(community_id)
 
 
 @community_bp.route("/community/<int:community_id>/curators", methods=["GET"])
@@ -257,15 +264,7 @@ SELECT COMMUNITY FOR PROPOSAL
 
 
 def get_available_communities(dataset_id):
-    associated_community_ids = [
-        assoc.community_id for assoc in community_dataset_service.get_communities_associated_to_dataset(dataset_id)
-    ]
-
-    all_communities = community_service.get_all_communities()
-
-    available_communities = [comm for comm in all_communities if comm.id not in associated_community_ids]
-
-    return available_communities
+    return community_service.get_available_for_dataset(dataset_id)
 
 
 @community_bp.route("/dataset/<int:dataset_id>/propose_to", methods=["GET"])
@@ -300,10 +299,7 @@ def propose_dataset(community_id, dataset_id):
 
 def check_if_dataset_curator(community_id):
     community = community_service.get_or_404(community_id)
-    if current_user in community.curators.all() or current_user.role.value == "administrator":
-        return True, community
-
-    return False, community
+    return community_permission_service.can_curate(current_user, community.id), community
 
 
 """
@@ -320,9 +316,10 @@ def review_pending_datasets(community_id):
         flash("You have no permission to curate this community")
         return redirect(url_for("community.get_community", community_id=community_id))
 
-    pending_associations = community_dataset_service.get_pending_datasets(community_id)
-
-    pending_datasets = [assoc.dataset for assoc in pending_associations]
+    try:
+        pending_datasets = community_dataset_service.get_pending_datasets(community_id, request.args.get("cursor"))
+    except ValueError:
+        abort(400)
 
     return render_template("community/review_datasets.html", community=community, pending_datasets=pending_datasets)
 
@@ -3,16 +3,14 @@ import logging
 from flask import current_app
 from flask_login import current_user
 
-from app.modules.auth.models import User
+from app.modules.auth.identity import Identity
+from app.modules.auth.models import RoleType
 from app.modules.auth.services import AuthenticationService
-from app.modules.community.models import CommunityDataSet, CommunityDataSetStatus
+from app.modules.community.models import CommunityDataSetStatus
 from app.modules.community.repositories import CommunityDataSetRepository, CommunityRepository
 from app.modules.dataset.services import DataSetService
-from app.modules.elasticsearch.utils import (
-    index_dataset,
-    index_hubfile,
-)
 from app.services.upload_service import UploadService
+from core.repositories.pagination import DEFAULT_PAGE_SIZE, KeysetPage
 from core.services.BaseService import BaseService
 
 logger = logging.getLogger(__name__)
@@ -27,11 +25,15 @@ class CommunityService(BaseService):
     def get_all_communities(self):
         return self.repository.get_all_communities()
 
+    def get_available_for_dataset(self, dataset_id):
+        return self.repository.get_available_for_dataset(dataset_id)
+
+    def recount_aggregates(self) -> int:
+        return self.repository.recount_aggregates()
+
     def create_from_form(self, form_data, logo_file):
         try:
-            existing_community = self.repository.get_existing_comunnity_with_name(form_data.name.data)
-
-            if existing_community:
+            if self.repository.exists(name=form_data.name.data):
                 form_data.name.errors.append(f'A community with the name "{form_data.name.data}" already exists.')
                 return None
 
@@ -48,7 +50,7 @@ class CommunityService(BaseService):
             if creator_id not in selected_ids:
                 selected_ids.append(creator_id)
 
-            curators_to_assign = User.query.filter(User.id.in_(selected_ids)).all()
+            curators_to_assign = self.user_service.repository.get_many(selected_ids)
 
             new_community.curators.extend(curators_to_assign)
             self.repository.session.commit()
@@ -88,14 +90,14 @@ class CommunityService(BaseService):
         if not user or not community:
             return {"error": "User or community not found"}
 
-        if user not in community.curators.all():
+        if not self.repository.is_curator(community_id, user_id):
             return {"error": f"User {user_id} is not a curator of community {community_id}."}
 
         try:
-            if community.curators.count() <= 1:
+            if self.repository.count_curators(community_id) <= 1:
                 return {"error": "The community must have at least one curator. Cannot leave if you are the only one."}
 
-            community.curators.remove(user)
+            self.repository.remove_curator(community_id, user_id)
             self.repository.session.commit()
 
             return {"success": f"User {user.email} successfully left community {community.name}."}
@@ -113,22 +115,17 @@ class CommunityService(BaseService):
                 return {"error": "Community not found."}
 
             user_ids_to_add = [int(i) for i in user_ids_to_add_str if i]
-            new_curators = User.query.filter(User.id.in_(user_ids_to_add)).all()
 
             if not user_ids_to_add:
                 return {"error": "No users were selected."}
 
-            users_already_curators = [u.id for u in community.curators.all()]
-
-            users_to_add = [user for user in new_curators if user.id not in users_already_curators]
+            count = self.repository.add_curators(community_id, user_ids_to_add)
 
-            if not users_to_add:
+            if not count:
                 return {"error": "All selected users are already curators of this community."}
 
-            community.curators.extend(users_to_add)
             self.repository.session.commit()
 
-            count = len(users_to_add)
             return {"success": f"{count} new curator(s) added successfully to {community.name}."}
 
         except Exception as e:
@@ -137,6 +134,28 @@ class CommunityService(BaseService):
             return {"error": str(e)}
 
 
+class CommunityPermissionService(BaseService):
+    """Curation rights: administrators curate every community, curators the ones they are assigned to."""
+
+    def __init__(self):
+        super().__init__(CommunityRepository())
+
+    def can_curate(self, user, community_id) -> bool:
+        return user.role == RoleType.ADMINISTRATOR or self.is_curator(user, community_id)
+
+    def is_curator(self, user, community_id) -> bool:
+        # The identity of the logged-in user carries its curated communities, cached across requests
+        if isinstance(user, Identity):
+            return community_id in user.curated_community_ids
+        return self.repository.is_curator(community_id, user.id)
+
+    def count_curators(self, community_id) -> int:
+        return self.repository.count_curators(community_id)
+
+    def available_curator_choices(self, community_id):
+        return [(str(user_id), email) for user_id, email in self.repository.available_curators(community_id)]
+
+
 class CommunityDataSetService(BaseService):
     def __init__(self):
         super().__init__(CommunityDataSetRepository())
@@ -194,15 +213,9 @@ class CommunityDataSetService(BaseService):
             else:
                 return {"error": "Invalid status provided."}
 
+            # The status change is queued for reindexing in the same transaction (search index outbox)
             association.status = new_status
             self.repository.session.commit()
-            if new_status == CommunityDataSetStatus.ACCEPTED:
-                index_dataset(association.dataset)
-                fitsmodels = list(association.dataset.fits_models)
-                for f in fitsmodels:
-                    files = list(getattr(f, "files", []))
-                    for hubfile in files:
-                        index_hubfile(hubfile)
             return association
 
         except Exception as e:
@@ -210,6 +223,12 @@ class CommunityDataSetService(BaseService):
             current_app.logger.error(f"FALLO AL ACTUALIZAR ESTADO DE DATASET: {e}", exc_info=True)
             return {"error": str(e)}
 
-    def get_pending_datasets(self, community_id):
-        community = self.community_repository.get_or_404(community_id)
-        return community.dataset_associations.filter(CommunityDataSet.status == CommunityDataSetStatus.PENDING).all()
+    def get_accepted_datasets(self, community_id, cursor=None, limit=DEFAULT_PAGE_SIZE) -> KeysetPage:
+        return self.repository.get_datasets(community_id, CommunityDataSetStatus.ACCEPTED, cursor, limit)
+
+    def get_pending_datasets(self, community_id, cursor=None, limit=DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Page of the datasets awaiting review, with their uploader's profile loaded."""
+        self.community_repository.get_or_404(community_id)
+        return self.repository.get_datasets(
+            community_id, CommunityDataSetStatus.PENDING, cursor, limit, with_uploader=True
+        )
@@ -864,3 +864,154 @@ def test_review_pending_datasets_not_curator(test_client):
     assert response.status_code == 403, "Expected forbidden status code"
 
     logout(test_client)
+
+
+def test_curator_permissions_and_set_operations_run_in_sql(test_client):
+    from app.modules.auth.identity import get_identity
+    from app.modules.community.repositories import CommunityRepository
+    from app.modules.community.services import CommunityPermissionService, CommunityService
+    from core.managers.query_instrumentation_manager import record_queries
+
+    with test_client.application.app_context():
+        curator1 = User.query.filter_by(email="curator1@example.com").first()
+        curator2 = User.query.filter_by(email="curator2@example.com").first()
+        admin1 = User.query.filter_by(email="admin1@example.com").first()
+        user1 = User.query.filter_by(email="user1@example.com").first()
+
+        community = Community(name="Permission Test Community", description="Curated in SQL")
+        community.curators.append(curator1)
+        db.session.add(community)
+        db.session.commit()
+        community_id = community.id
+
+        repository = CommunityRepository()
+        permissions = CommunityPermissionService()
+        assert repository.is_curator(community_id, curator1.id)
+        assert not repository.is_curator(community_id, curator2.id)
+        assert permissions.can_curate(admin1, community_id)
+        assert not permissions.can_curate(user1, community_id)
+
+        # Users, administrators included, that can still be added; plain users are never offered
+        choices = dict(permissions.available_curator_choices(community_id))
+        assert str(curator2.id) in choices and str(admin1.id) in choices
+        assert str(curator1.id) not in choices and str(user1.id) not in choices
+
+        # Current curators and unknown ids are skipped by the INSERT ... SELECT
+        result = CommunityService().add_curator(community_id, [str(curator1.id), str(curator2.id), "999999"])
+        assert result == {"success": "1 new curator(s) added successfully to Permission Test Community."}
+        assert repository.count_curators(community_id) == 2
+        assert "error" in CommunityService().add_curator(community_id, [str(curator2.id)])
+
+        # The logged-in identity answers from its cached communities, without querying
+        identity = get_identity(curator2.id)
+        with record_queries() as stats:
+            assert permissions.can_curate(identity, community_id)
+        assert stats.count == 0
+
+        assert "success" in CommunityService().leave_community(community_id, curator2.id)
+        assert not repository.is_curator(community_id, curator2.id)
+        assert "error" in CommunityService().leave_community(community_id, curator1.id)
+
+
+def test_community_aggregates_and_paginated_listings(test_client):
+    from app.modules.community.services import CommunityDataSetService, CommunityService
+
+    with test_client.application.app_context():
+        user1 = User.query.filter_by(email="user1@example.com").first()
+
+        community = Community(name="Aggregates Test Community", description="Counted on write")
+        db.session.add(community)
+        datasets = []
+        for index, size in enumerate([100, 200, 400]):
+            ds_meta_data = DSMetaData(
+                title=f"Aggregated Dataset {index}",
+                description="A dataset counted by its community.",
+                publication_type="none",
+                publication_doi=f"10.1234/aggregated.{index}",
+            )
+            dataset = DataSet(user_id=user1.id, ds_meta_data=ds_meta_data, total_size_in_bytes=size)
+            db.session.add(dataset)
+            datasets.append(dataset)
+        db.session.commit()
+        community_id = community.id
+
+        for dataset, status in zip(datasets, ["accepted", "accepted", "pending"]):
+            db.session.add(
+                CommunityDataSet(
+                    community_id=community_id, dataset_id=dataset.id, status=CommunityDataSetStatus(status)
+                )
+            )
+        db.session.commit()
+        assert (community.accepted_datasets_count, community.pending_datasets_count) == (2, 1)
+        assert community.total_size_in_bytes == 300
+
+        datasets[0].download_counter = 5
+        db.session.commit()
+        assert community.download_counter == 5
+
+        # Downloads add to the counter instead of recounting the community; the repair command recounts it
+        db.session.execute(db.update(Community).where(Community.id == community_id).values(download_counter=100))
+        db.session.commit()
+        datasets[0].download_counter += 1
+        db.session.commit()
+        assert community.download_counter == 101
+        assert CommunityService().recount_aggregates() >= 1
+        db.session.refresh(community)
+        assert community.download_counter == 6
+
+        # Moving a dataset from one community to another updates both
+        other = Community(name="Aggregates Other Community", description="Counted on write")
+        db.session.add(other)
+        db.session.commit()
+        moved = CommunityDataSet.query.get((community_id, datasets[1].id))
+        moved.community_id = other.id
+        db.session.commit()
+        assert (community.accepted_datasets_count, community.total_size_in_bytes) == (1, 100)
+        assert (other.accepted_datasets_count, other.total_size_in_bytes) == (1, 200)
+        moved.community_id = community_id
+        db.session.commit()
+        db.session.delete(other)
+        db.session.commit()
+        assert (community.accepted_datasets_count, community.pending_datasets_count) == (2, 1)
+        assert (community.total_size_in_bytes, community.download_counter) == (300, 6)
+
+        association = CommunityDataSet.query.get((community_id, datasets[2].id))
+        association.status = CommunityDataSetStatus.ACCEPTED
+        db.session.commit()
+        assert (community.accepted_datasets_count, community.pending_datasets_count) == (3, 0)
+        assert community.total_size_in_bytes == 700
+
+        service = CommunityDataSetService()
+        first = service.get_accepted_datasets(community_id, limit=2)
+        assert len(first.items) == 2 and first.next_cursor
+        second = service.get_accepted_datasets(community_id, first.next_cursor, limit=2)
+        assert len(second.items) == 1 and second.next_cursor is None
+        assert {dataset.id for dataset in first.items + second.items} == {dataset.id for dataset in datasets}
+        assert service.get_pending_datasets(community_id).items == []
+
+        assert community_id not in [c.id for c in CommunityService().get_available_for_dataset(datasets[0].id)]
+
+        db.session.delete(association)
+        db.session.commit()
+        assert (community.accepted_datasets_count, community.total_size_in_bytes) == (2, 300)
+        assert community_id in [c.id for c in CommunityService().get_available_for_dataset(datasets[2].id)]
+
+        # A rejected dataset can still be proposed again, which puts it back under review
+        rejected = CommunityDataSet(
+            community_id=community_id, dataset_id=datasets[2].id, status=CommunityDataSetStatus.REJECTED
+        )
+        db.session.add(rejected)
+        db.session.commit()
+        assert community_id in [c.id for c in CommunityService().get_available_for_dataset(datasets[2].id)]
+        assert CommunityDataSetService().propose_dataset(community_id, datasets[2].id).status == (
+            CommunityDataSetStatus.PENDING
+        )
+        db.session.delete(rejected)
+        db.session.commit()
+
+    login(test_client, "curator1@example.com", "password123")
+    response = test_client.get(f"/community/{community_id}")
+    assert response.status_code == 200
+    assert b"2 datasets currently accepted" in response.data
+    assert test_client.get(f"/community/{community_id}?cursor=invalid").status_code == 400
+    logout(test_client)
@@ -1,7 +1,10 @@
+from contextlib import contextmanager
+
 import pytest
 
 from app import create_app, db
 from app.modules.auth.models import User
+from core.managers.query_instrumentation_manager import record_queries
 
 
 @pytest.fixture(scope="session")
@@ -51,6 +54,26 @@ def clean_database():
     db.create_all()
 
 
+@pytest.fixture(scope="function")
+def query_budget(test_app):
+    """
+    Context manager asserting the number of queries run inside it, e.g.
+    ``with query_budget(10): test_client.get("/")``. It also fails when one statement runs
+    SQL_N_PLUS_ONE_THRESHOLD times or more (or ``repeated`` times, when given), and yields the
+    ``QueryStats`` for finer assertions.
+    """
+
+    @contextmanager
+    def budget(max_queries, repeated=None):
+        with record_queries() as stats:
+            yield stats
+        threshold = repeated or test_app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+        assert stats.count <= max_queries, f"Query budget of {max_queries} exceeded: {stats.report()}"
+        assert not stats.repeated(threshold), f"N+1 queries: {stats.report(threshold)}"
+
+    return budget
+
+
 def login(test_client, email, password):
     """
     Authenticates the user with the credentials provided.
@@ -1,10 +1,20 @@
 from flask_restful import Api
 
+from app.modules.dataset.aggregates import register_dataset_aggregate_listeners
 from app.modules.dataset.api import init_blueprint_api
+from app.modules.dataset.recommendations import register_recommendation_index_listeners
 from core.blueprints.base_blueprint import BaseBlueprint
+from core.serialisers.json_provider import output_json
 
 dataset_bp = BaseBlueprint("dataset", __name__, template_folder="templates")
 
 
 api = Api(dataset_bp)
+api.representation("application/json")(output_json)
 init_blueprint_api(api)
+
+# The recommendation index is kept up to date in the same transaction as the datasets it describes
+register_recommendation_index_listeners()
+
+# File counts and sizes of the datasets are kept up to date in the same transaction as their files
+register_dataset_aggregate_listeners()
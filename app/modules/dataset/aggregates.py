@@ -0,0 +1,111 @@
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.modules.dataset.models import DataSet
+
+# Hubfile columns that move a file between datasets or change its size
+AGGREGATED_HUBFILE_ATTRIBUTES = {"size", "fits_model_id"}
+REFRESHED_KEY = "refreshed_dataset_aggregates"
+# {dataset id: total_size_in_bytes before the recount}, so listeners running after it can apply the difference
+PREVIOUS_SIZES_KEY = "previous_dataset_sizes"
+
+
+def register_dataset_aggregate_listeners():
+    if event.contains(Session, "after_flush", update_dataset_aggregates):
+        return
+    event.listen(Session, "after_flush", update_dataset_aggregates)
+    event.listen(Session, "after_flush_postexec", expire_dataset_aggregates)
+
+
+def refresh_dataset_aggregates(connection, dataset_ids):
+    """Recount ``files_count`` and ``total_size_in_bytes`` of ``dataset_ids`` from their file rows."""
+    from app.modules.fitsmodel.models import FitsModel
+    from app.modules.hubfile.models import Hubfile
+
+    dataset_ids = list(dataset_ids)
+    if not dataset_ids:
+        return
+
+    def dataset_files(column):
+        return (
+            select(column)
+            .select_from(Hubfile)
+            .join(FitsModel, FitsModel.id == Hubfile.fits_model_id)
+            .where(FitsModel.data_set_id == DataSet.id)
+            .scalar_subquery()
+        )
+
+    connection.execute(
+        update(DataSet)
+        .where(DataSet.id.in_(dataset_ids))
+        .values(
+            files_count=dataset_files(func.count(Hubfile.id)),
+            total_size_in_bytes=dataset_files(func.coalesce(func.sum(Hubfile.size), 0)),
+        )
+    )
+
+
+def _history(instance, key):
+    history = inspect(instance).attrs[key].history
+    return history.has_changes(), history.deleted
+
+
+def _changed_datasets(session):
+    """Ids of the datasets that gained, lost or resized a file in the flush."""
+    from app.modules.fitsmodel.models import FitsModel
+    from app.modules.hubfile.models import Hubfile
+
+    dataset_ids = set()
+    fits_model_ids = set()
+
+    for instance in list(session.new) + list(session.deleted):
+        if isinstance(instance, Hubfile):
+            fits_model_ids.add(instance.fits_model_id)
+        elif isinstance(instance, FitsModel):
+            dataset_ids.add(instance.data_set_id)
+
+    for instance in session.dirty:
+        if isinstance(instance, Hubfile):
+            changed = {key for key in AGGREGATED_HUBFILE_ATTRIBUTES if _history(instance, key)[0]}
+            if changed:
+                fits_model_ids.add(instance.fits_model_id)
+                if "fits_model_id" in changed:
+                    fits_model_ids.update(_history(instance, "fits_model_id")[1])
+        elif isinstance(instance, FitsModel):
+            changed, previous = _history(instance, "data_set_id")
+            if changed:
+                dataset_ids.add(instance.data_set_id)
+                dataset_ids.update(previous)
+
+    fits_model_ids.discard(None)
+    if fits_model_ids:
+        rows = session.connection().execute(select(FitsModel.data_set_id).where(FitsModel.id.in_(fits_model_ids)))
+        dataset_ids.update(rows.scalars())
+
+    dataset_ids.discard(None)
+    return dataset_ids
+
+
+def update_dataset_aggregates(session, flush_context):
+    dataset_ids = _changed_datasets(session)
+    if not dataset_ids:
+        return
+
+    connection = session.connection()
+    previous_sizes = connection.execute(
+        select(DataSet.id, DataSet.total_size_in_bytes).where(DataSet.id.in_(dataset_ids))
+    ).all()
+    session.info.setdefault(PREVIOUS_SIZES_KEY, {}).update(dict(previous_sizes))
+
+    # Same transaction as the file change, so the counters never disagree with the file rows
+    refresh_dataset_aggregates(connection, dataset_ids)
+    session.info.setdefault(REFRESHED_KEY, set()).update(dataset_ids)
+
+
+def expire_dataset_aggregates(session, flush_context):
+    """Reload the recounted columns on next access, once the flush has finished with the instances."""
+    session.info.pop(PREVIOUS_SIZES_KEY, None)
+    for dataset_id in session.info.pop(REFRESHED_KEY, ()):
+        dataset = session.identity_map.get(inspect(DataSet).identity_key_from_primary_key((dataset_id,)))
+        if dataset is not None:
+            session.expire(dataset, ["files_count", "total_size_in_bytes"])
@@ -1,7 +1,20 @@
+from sqlalchemy.orm import selectinload
+
 from app.modules.dataset.models import DataSet
 from core.resources.generic_resource import create_resource
 from core.serialisers.serializer import Serializer
 
+
+def _meta_data():
+    return (selectinload(DataSet.ds_meta_data),)
+
+
+def _files():
+    from app.modules.fitsmodel.models import FitsModel
+
+    return (selectinload(DataSet.fits_models).selectinload(FitsModel.files),)
+
+
 file_fields = {"file_id": "id", "file_name": "name", "size": "get_formatted_size"}
 file_serializer = Serializer(file_fields)
 
@@ -23,8 +36,13 @@ dataset_stats_fields = {
     "total_size_for_human": "get_file_total_size_for_human",
 }
 
-dataset_serializer = Serializer(dataset_fields, related_serializers={"files": file_serializer})
-dataset_stats_serializer = Serializer(dataset_stats_fields)
+# Relationships each field reads, loaded for the whole page and only when the field is requested
+dataset_serializer = Serializer(
+    dataset_fields,
+    related_serializers={"files": file_serializer},
+    prefetch={"name": _meta_data, "doi": _meta_data, "files": _files},
+)
+dataset_stats_serializer = Serializer(dataset_stats_fields, prefetch={"publication_type": _meta_data})
 
 DataSetResource = create_resource(DataSet, dataset_serializer)
 DataSetStatsResource = create_resource(DataSet, dataset_stats_serializer)
@@ -0,0 +1,109 @@
+import numpy as np
+
+from app.modules.dataset.similarity import expand_slices
+
+# Downloads of the same visitor less than this apart belong to the same session
+CO_DOWNLOAD_WINDOW_HOURS = 24
+# Sessions with more datasets than this look like crawlers or bulk mirrors and are ignored
+MAX_SESSION_DATASETS = 50
+# Pairs seen together in fewer sessions than this are noise
+MIN_CO_DOWNLOADS = 2
+NEIGHBOURS_PER_DATASET = 10
+# Session entries expanded into pairs at once; each one yields at most MAX_SESSION_DATASETS pairs
+BATCH_ENTRIES = 100_000
+
+
+def sessionize(visitors, timestamps, dataset_ids, window_seconds=CO_DOWNLOAD_WINDOW_HOURS * 3600):
+    """
+    Split the downloads of each visitor into sessions, a new one starting after ``window_seconds``
+    without downloads. Returns ``(sessions, dataset_ids)``, one entry per distinct dataset of a
+    session, sorted by session.
+    """
+    visitors = np.asarray(visitors, dtype=np.int64)
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    dataset_ids = np.asarray(dataset_ids, dtype=np.int64)
+    if not len(visitors):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    order = np.lexsort((timestamps, visitors))
+    visitors, timestamps, dataset_ids = visitors[order], timestamps[order], dataset_ids[order]
+
+    starts = np.ones(len(visitors), dtype=bool)
+    starts[1:] = (visitors[1:] != visitors[:-1]) | (np.diff(timestamps) > window_seconds)
+    sessions = np.cumsum(starts) - 1
+
+    # The same dataset downloaded twice in a session counts once
+    width = int(dataset_ids.max()) + 1
+    keys = np.unique(sessions * width + dataset_ids)
+    sessions, dataset_ids = keys // width, keys % width
+
+    sizes = np.bincount(sessions)
+    keep = sizes[sessions] <= MAX_SESSION_DATASETS
+    return sessions[keep], dataset_ids[keep]
+
+
+def co_occurrences(sessions, dataset_ids, batch_entries=BATCH_ENTRIES):
+    """
+    Sparse item-item co-occurrence matrix of ``sessionize``'s output, as ``(left, right, counts)``
+    arrays with one entry per ordered pair of distinct datasets sharing at least one session.
+    """
+    if not len(sessions):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    width = int(dataset_ids.max()) + 1
+    session_starts = np.flatnonzero(np.r_[True, sessions[1:] != sessions[:-1]])
+    session_sizes = np.diff(np.r_[session_starts, len(sessions)])
+
+    keys, counts = [], []
+    batch_start = 0
+    while batch_start < len(session_starts):
+        # Whole sessions only, so every pair of a session is in the same batch
+        batch_end = int(np.searchsorted(session_starts, session_starts[batch_start] + batch_entries, side="right"))
+        batch_end = max(batch_end, batch_start + 1)
+        starts, sizes = session_starts[batch_start:batch_end], session_sizes[batch_start:batch_end]
+
+        entries = expand_slices(starts, sizes)
+        entry_sizes = np.repeat(sizes, sizes)
+        partners = expand_slices(np.repeat(starts, sizes), entry_sizes)
+        left = np.repeat(dataset_ids[entries], entry_sizes)
+        right = dataset_ids[partners]
+        pairs = left != right
+
+        batch_keys, batch_counts = np.unique(left[pairs] * width + right[pairs], return_counts=True)
+        keys.append(batch_keys)
+        counts.append(batch_counts)
+        batch_start = batch_end
+
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+    return keys // width, keys % width, counts
+
+
+def top_co_downloads(sessions, dataset_ids, limit=NEIGHBOURS_PER_DATASET, min_co_downloads=MIN_CO_DOWNLOADS):
+    """
+    ``{dataset_id: [(neighbour_id, score, co_downloads), ...]}``, best first. The score is the
+    number of shared sessions normalised by both datasets' session counts (cosine similarity of
+    their session vectors), so popular datasets do not end up everybody's neighbour.
+    """
+    left, right, counts = co_occurrences(sessions, dataset_ids)
+    keep = counts >= min_co_downloads
+    left, right, counts = left[keep], right[keep], counts[keep]
+    if not len(left):
+        return {}
+
+    session_counts = np.bincount(dataset_ids)
+    scores = counts / np.sqrt(session_counts[left] * session_counts[right])
+
+    order = np.lexsort((right, -scores, left))
+    left, right, counts, scores = left[order], right[order], counts[order], scores[order]
+    group_starts = np.flatnonzero(np.r_[True, left[1:] != left[:-1]])
+    ranks = np.arange(len(left)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(left)]))
+    keep = ranks < limit
+
+    neighbours = {}
+    for dataset_id, neighbour_id, score, co_downloads in zip(
+        left[keep].tolist(), right[keep].tolist(), scores[keep].tolist(), counts[keep].tolist()
+    ):
+        neighbours.setdefault(dataset_id, []).append((neighbour_id, score, co_downloads))
+    return neighbours
@@ -1,9 +1,10 @@
+import os
 from datetime import datetime
 from enum import Enum
 
 from flask import request
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import column_property, validates
 
 from app import db
 
@@ -31,6 +32,8 @@ class PublicationType(Enum):
 
 
 class Author(db.Model):
+    __table_args__ = (db.Index("ix_author_fulltext", "name", "affiliation", "orcid", mysql_prefix="FULLTEXT"),)
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     affiliation = db.Column(db.String(120))
@@ -51,13 +54,15 @@ class DSMetrics(db.Model):
 
 
 class DSMetaData(db.Model):
+    __table_args__ = (db.Index("ix_ds_meta_data_fulltext", "title", "description", "tags", mysql_prefix="FULLTEXT"),)
+
     id = db.Column(db.Integer, primary_key=True)
     deposition_id = db.Column(db.Integer)
     title = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text, nullable=False)
     publication_type = db.Column(SQLAlchemyEnum(PublicationType), nullable=False)
     publication_doi = db.Column(db.String(120))
-    dataset_doi = db.Column(db.String(120))
+    dataset_doi = db.Column(db.String(120), index=True)
     tags = db.Column(db.String(120))
     ds_metrics_id = db.Column(db.Integer, db.ForeignKey("ds_metrics.id"))
     ds_metrics = db.relationship("DSMetrics", uselist=False, backref="ds_meta_data", cascade="all, delete")
@@ -65,13 +70,23 @@ class DSMetaData(db.Model):
 
 
 class DataSet(db.Model):
+    # Keyset pagination order, for the whole catalog and for the datasets of one user
+    __table_args__ = (
+        db.Index("ix_data_set_created_at_id", "created_at", "id"),
+        db.Index("ix_data_set_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
 
     ds_meta_data_id = db.Column(db.Integer, db.ForeignKey("ds_meta_data.id"), nullable=False)
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
-    download_counter = db.Column(db.Integer, default=0, nullable=False)
+    # active_history keeps the previous value when it is set unloaded, so the community counters get the difference
+    download_counter = column_property(db.Column(db.Integer, default=0, nullable=False), active_history=True)
+    # Maintained on every flush that adds, removes or resizes a file; see app/modules/dataset/aggregates.py
+    files_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    total_size_in_bytes = db.Column(db.BigInteger, nullable=False, default=0, server_default="0", index=True)
 
     ds_meta_data = db.relationship("DSMetaData", backref=db.backref("data_set", uselist=False))
     fits_models = db.relationship("FitsModel", backref="data_set", lazy=True, cascade="all, delete")
@@ -79,6 +94,15 @@ class DataSet(db.Model):
     community_associations = db.relationship(
         "CommunityDataSet", back_populates="dataset", lazy="dynamic", cascade="all, delete-orphan"
     )
+    # Read-only view of the communities that accepted the dataset, so it can be eager loaded
+    accepted_communities = db.relationship(
+        "Community",
+        secondary="community_dataset_association",
+        primaryjoin="DataSet.id == CommunityDataSet.dataset_id",
+        secondaryjoin="and_(Community.id == CommunityDataSet.community_id, CommunityDataSet.status == 'ACCEPTED')",
+        order_by="Community.name",
+        viewonly=True,
+    )
 
     @validates("download_counter")
     def validate_download_counter(self, key, value):
@@ -108,10 +132,10 @@ class DataSet(db.Model):
         return f"https://zenodo.org/record/{self.ds_meta_data.deposition_id}" if self.ds_meta_data.dataset_doi else None
 
     def get_files_count(self):
-        return sum(len(fm.files) for fm in self.fits_models)
+        return self.files_count
 
     def get_file_total_size(self):
-        return sum(file.size for fm in self.fits_models for file in fm.files)
+        return self.total_size_in_bytes
 
     def get_file_total_size_for_human(self):
         from app.modules.dataset.services import SizeService
@@ -119,9 +143,8 @@ class DataSet(db.Model):
         return SizeService().get_human_readable_size(self.get_file_total_size())
 
     def get_fitshub_doi(self):
-        from app.modules.dataset.services import DataSetService
-
-        return DataSetService().get_fitshub_doi(self)
+        domain = os.getenv("DOMAIN", "localhost")
+        return f"http://{domain}/doi/{self.ds_meta_data.dataset_doi}"
 
     def communities(self):
         from app.modules.community.models import Community, CommunityDataSet
@@ -129,6 +152,8 @@ class DataSet(db.Model):
         return Community.query.join(CommunityDataSet).filter(CommunityDataSet.dataset_id == self.id)
 
     def to_dict(self):
+        from app.modules.dataset.services import SizeService
+
         return {
             "title": self.ds_meta_data.title,
             "id": self.id,
@@ -144,18 +169,102 @@ class DataSet(db.Model):
             "download": f"{request.host_url.rstrip('/')}/dataset/download/{self.id}",
             "zenodo": self.get_zenodo_url(),
             "files": [file.to_dict() for fm in self.fits_models for file in fm.files],
-            "files_count": self.get_files_count(),
-            "total_size_in_bytes": self.get_file_total_size(),
-            "total_size_in_human_format": self.get_file_total_size_for_human(),
+            "files_count": self.files_count,
+            "total_size_in_bytes": self.total_size_in_bytes,
+            "total_size_in_human_format": SizeService().get_human_readable_size(self.total_size_in_bytes),
             "download_counter": self.download_counter,
-            "communities": [{"id": c.id, "name": c.name} for c in self.communities().all()],
+            "communities": [{"id": c.id, "name": c.name} for c in self.accepted_communities],
         }
 
     def __repr__(self):
         return f"DataSet<{self.id}>"
 
 
+class DSDailyStats(db.Model):
+    """
+    Downloads and views of a dataset aggregated per day from the raw record tables by the stats
+    roll-up job. A client (cookie) is recorded once per dataset, so these are distinct clients too.
+    """
+
+    __tablename__ = "ds_daily_stats"
+    __table_args__ = (db.UniqueConstraint("dataset_id", "day", name="uq_ds_daily_stats_dataset_id_day"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"DSDailyStats<{self.dataset_id}> {self.day}"
+
+
+class DataSetRecommendationFeature(db.Model):
+    """
+    Inverted index used by the recommender: one row per (kind, value) feature of a dataset, where
+    kind is ``tag``, ``author`` or ``community``. It is rebuilt for a dataset whenever its tags,
+    authors or accepted communities change. There is no foreign key on dataset_id, so rows of
+    deleted datasets can be removed in the same flush.
+    """
+
+    __tablename__ = "dataset_recommendation_feature"
+    __table_args__ = (db.Index("ix_dataset_recommendation_feature_kind_value", "kind", "value"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, nullable=False, index=True)
+    kind = db.Column(db.String(16), nullable=False)
+    value = db.Column(db.String(255), nullable=False)
+
+    def __repr__(self):
+        return f"DataSetRecommendationFeature<{self.dataset_id}> {self.kind}={self.value}"
+
+
+class DataSetNeighbour(db.Model):
+    """
+    Text neighbours of a dataset: the datasets whose TF-IDF vector of title, description and tags
+    (its own and its fits models') is closest by cosine similarity. Built offline by the
+    ``similarity:build`` command; reading them is a single lookup on (dataset_id, score).
+    """
+
+    __tablename__ = "dataset_neighbour"
+    __table_args__ = (db.Index("ix_dataset_neighbour_dataset_id_score", "dataset_id", "score"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, nullable=False)
+    neighbour_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"DataSetNeighbour<{self.dataset_id}> {self.neighbour_id}={self.score:.3f}"
+
+
+class DataSetCoDownload(db.Model):
+    """
+    "Also downloaded" neighbours of a dataset: the datasets most often downloaded in the same
+    session, scored by the normalised co-download count. Built offline by ``codownloads:build``
+    from the download records.
+    """
+
+    __tablename__ = "dataset_co_download"
+    __table_args__ = (db.Index("ix_dataset_co_download_dataset_id_score", "dataset_id", "score"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, nullable=False)
+    neighbour_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    co_downloads = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"DataSetCoDownload<{self.dataset_id}> {self.neighbour_id}={self.score:.3f}"
+
+
 class DSDownloadRecord(db.Model):
+    # A client (cookie) downloads a dataset once; downloads by dataset and day feed the trending ranking
+    __table_args__ = (
+        db.Index("ix_ds_download_record_dataset_id_download_cookie", "dataset_id", "download_cookie", unique=True),
+        db.Index("ix_ds_download_record_dataset_id_download_date", "dataset_id", "download_date"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"))
@@ -172,6 +281,8 @@ class DSDownloadRecord(db.Model):
 
 
 class DSViewRecord(db.Model):
+    __table_args__ = (db.Index("ix_ds_view_record_dataset_id_view_cookie", "dataset_id", "view_cookie", unique=True),)
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     dataset_id = db.Column(db.Integer, db.ForeignKey("data_set.id"))
@@ -182,7 +293,36 @@ class DSViewRecord(db.Model):
         return f"<View id={self.id} dataset_id={self.dataset_id} date={self.view_date} cookie={self.view_cookie}>"
 
 
+class ArchivedTrackingRecord(db.Model):
+    """
+    Download and view records of the days rolled up and archived by the stats job, moved out of the
+    record tables of every kind (``record_table``). Their unique key keeps a returning client from
+    being recorded again, and the co-download builder still reads their sessions.
+    """
+
+    __tablename__ = "archived_tracking_record"
+    __table_args__ = (
+        db.Index(
+            "ix_archived_tracking_record_record_table_entity_id_cookie",
+            "record_table",
+            "entity_id",
+            "cookie",
+            unique=True,
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    record_table = db.Column(db.String(64), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    cookie = db.Column(db.String(36), nullable=True)
+    recorded_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"ArchivedTrackingRecord<{self.record_table} {self.entity_id}> {self.cookie}"
+
+
 class DOIMapping(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    dataset_doi_old = db.Column(db.String(120))
+    dataset_doi_old = db.Column(db.String(120), index=True)
     dataset_doi_new = db.Column(db.String(120))
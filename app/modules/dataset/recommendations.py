@@ -0,0 +1,206 @@
+import threading
+import time
+
+import unidecode
+from flask import current_app
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from app.modules.dataset.models import DataSetRecommendationFeature
+
+# Score added for every feature a candidate shares with the reference dataset
+FEATURE_WEIGHTS = {"community": 2.5, "tag": 2.0, "author": 1.5}
+# Metadata columns that feed the index; edits to any other column leave it untouched
+INDEXED_METADATA_ATTRIBUTES = {"tags"}
+INDEXED_AUTHOR_ATTRIBUTES = {"name", "orcid", "ds_meta_data_id"}
+
+_PENDING_KEY = "recommendation_index_changed"
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def register_recommendation_index_listeners():
+    if event.contains(Session, "after_flush", update_recommendation_index):
+        return
+    event.listen(Session, "after_flush", update_recommendation_index)
+    event.listen(Session, "after_commit", invalidate_recommendation_cache)
+    event.listen(Session, "after_rollback", discard_recommendation_changes)
+
+
+def _normalize(value):
+    return " ".join(unidecode.unidecode(value).lower().split())
+
+
+def author_key(name, orcid=None):
+    """Authors are stored per dataset, so they are matched by ORCID when present and by name otherwise."""
+    if orcid and orcid.strip():
+        return f"orcid:{orcid.strip().lower()}"
+    return f"name:{_normalize(name or '')}"
+
+
+def dataset_features(tags, authors, community_ids):
+    """Set of ``(kind, value)`` features from comma separated tags, ``(name, orcid)`` authors and community ids."""
+    features = set()
+    for tag in (tags or "").split(","):
+        if tag.strip():
+            features.add(("tag", _normalize(tag)))
+    for name, orcid in authors:
+        if (name and name.strip()) or (orcid and orcid.strip()):
+            features.add(("author", author_key(name, orcid)))
+    for community_id in community_ids:
+        features.add(("community", str(community_id)))
+    return features
+
+
+def load_dataset_features(connection, dataset_ids):
+    """Current features of ``dataset_ids``, read with three queries whatever the number of datasets."""
+    from app.modules.community.models import CommunityDataSet, CommunityDataSetStatus
+    from app.modules.dataset.models import Author, DataSet, DSMetaData
+
+    rows = connection.execute(
+        select(DataSet.id, DataSet.ds_meta_data_id, DSMetaData.tags)
+        .join(DSMetaData, DSMetaData.id == DataSet.ds_meta_data_id)
+        .where(DataSet.id.in_(dataset_ids))
+    ).all()
+
+    tags = {dataset_id: dataset_tags for dataset_id, _, dataset_tags in rows}
+    datasets_by_meta_data = {ds_meta_data_id: dataset_id for dataset_id, ds_meta_data_id, _ in rows}
+
+    authors = {dataset_id: [] for dataset_id in tags}
+    if datasets_by_meta_data:
+        author_rows = connection.execute(
+            select(Author.ds_meta_data_id, Author.name, Author.orcid).where(
+                Author.ds_meta_data_id.in_(datasets_by_meta_data)
+            )
+        )
+        for ds_meta_data_id, name, orcid in author_rows:
+            authors[datasets_by_meta_data[ds_meta_data_id]].append((name, orcid))
+
+    communities = {dataset_id: [] for dataset_id in tags}
+    community_rows = connection.execute(
+        select(CommunityDataSet.dataset_id, CommunityDataSet.community_id).where(
+            CommunityDataSet.dataset_id.in_(tags),
+            CommunityDataSet.status == CommunityDataSetStatus.ACCEPTED,
+        )
+    )
+    for dataset_id, community_id in community_rows:
+        communities[dataset_id].append(community_id)
+
+    return {
+        dataset_id: dataset_features(tags[dataset_id], authors[dataset_id], communities[dataset_id])
+        for dataset_id in tags
+    }
+
+
+def replace_dataset_features(connection, dataset_ids):
+    """Rebuild the index rows of ``dataset_ids``; datasets that no longer exist just lose theirs."""
+    dataset_ids = list(dataset_ids)
+    if not dataset_ids:
+        return
+
+    features = load_dataset_features(connection, dataset_ids)
+    connection.execute(
+        delete(DataSetRecommendationFeature).where(DataSetRecommendationFeature.dataset_id.in_(dataset_ids))
+    )
+    rows = [
+        {"dataset_id": dataset_id, "kind": kind, "value": value}
+        for dataset_id, dataset_features in sorted(features.items())
+        for kind, value in sorted(dataset_features)
+    ]
+    if rows:
+        connection.execute(insert(DataSetRecommendationFeature.__table__), rows)
+
+
+def _changed_attributes(instance):
+    return {attr.key for attr in inspect(instance).attrs if attr.history.has_changes()}
+
+
+def _changed_datasets(session):
+    """Ids of the datasets whose tags, authors or accepted communities were touched by the flush."""
+    from app.modules.community.models import CommunityDataSet
+    from app.modules.dataset.models import Author, DataSet, DSMetaData
+
+    dataset_ids = set()
+    ds_meta_data_ids = set()
+
+    for instance in list(session.new) + list(session.deleted):
+        if isinstance(instance, (DataSet, CommunityDataSet)):
+            dataset_ids.add(instance.id if isinstance(instance, DataSet) else instance.dataset_id)
+        elif isinstance(instance, Author):
+            ds_meta_data_ids.add(instance.ds_meta_data_id)
+
+    for instance in session.dirty:
+        if isinstance(instance, DataSet):
+            if "ds_meta_data_id" in _changed_attributes(instance):
+                dataset_ids.add(instance.id)
+        elif isinstance(instance, DSMetaData):
+            if _changed_attributes(instance) & INDEXED_METADATA_ATTRIBUTES:
+                ds_meta_data_ids.add(instance.id)
+        elif isinstance(instance, Author):
+            changed = _changed_attributes(instance)
+            if changed & INDEXED_AUTHOR_ATTRIBUTES:
+                ds_meta_data_ids.add(instance.ds_meta_data_id)
+                if "ds_meta_data_id" in changed:
+                    # The author moved: the dataset it left loses the feature as well
+                    ds_meta_data_ids.update(inspect(instance).attrs.ds_meta_data_id.history.deleted)
+        elif isinstance(instance, CommunityDataSet):
+            if _changed_attributes(instance):
+                dataset_ids.add(instance.dataset_id)
+
+    ds_meta_data_ids.discard(None)
+    if ds_meta_data_ids:
+        # Plain query: relationships are not lazy loaded mid-flush
+        rows = session.connection().execute(select(DataSet.id).where(DataSet.ds_meta_data_id.in_(ds_meta_data_ids)))
+        dataset_ids.update(rows.scalars())
+
+    dataset_ids.discard(None)
+    return dataset_ids
+
+
+def update_recommendation_index(session, flush_context):
+    dataset_ids = _changed_datasets(session)
+    if not dataset_ids:
+        return
+
+    replace_dataset_features(session.connection(), dataset_ids)
+    session.info[_PENDING_KEY] = True
+
+
+def invalidate_recommendation_cache(session):
+    if session.info.pop(_PENDING_KEY, False):
+        clear_recommendation_cache()
+
+
+def discard_recommendation_changes(session):
+    # The index rows were rolled back together with the change itself
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _cache_seconds():
+    try:
+        return current_app.config.get("RECOMMENDATION_CACHE_SECONDS", 300)
+    except RuntimeError:
+        return 0
+
+
+def get_cached_recommendations(dataset_id, limit):
+    with _cache_lock:
+        entry = _cache.get((dataset_id, limit))
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+
+def cache_recommendations(dataset_id, limit, dataset_ids):
+    seconds = _cache_seconds()
+    if seconds <= 0:
+        return
+    with _cache_lock:
+        _cache[(dataset_id, limit)] = (time.monotonic() + seconds, list(dataset_ids))
+
+
+def clear_recommendation_cache():
+    # Any index change can move a dataset into or out of someone else's list, so everything is dropped
+    with _cache_lock:
+        _cache.clear()
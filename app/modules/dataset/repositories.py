@@ -1,29 +1,261 @@
+import heapq
 import logging
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from typing import Optional
 
 from flask_login import current_user
-from sqlalchemy import desc, func
-
-from app.modules.community.repositories import CommunityDataSetRepository
-from app.modules.dataset.models import Author, DataSet, DOIMapping, DSDownloadRecord, DSMetaData, DSViewRecord
+from sqlalchemy import and_, delete, desc, distinct, exists, func, insert, literal, or_, select, union_all
+from sqlalchemy.orm import selectinload
+
+from app.modules.dataset.models import (
+    ArchivedTrackingRecord,
+    Author,
+    DataSet,
+    DataSetCoDownload,
+    DataSetNeighbour,
+    DataSetRecommendationFeature,
+    DOIMapping,
+    DSDailyStats,
+    DSDownloadRecord,
+    DSMetaData,
+    DSViewRecord,
+)
+from app.modules.dataset.recommendations import (
+    FEATURE_WEIGHTS,
+    cache_recommendations,
+    get_cached_recommendations,
+)
 from core.repositories.BaseRepository import BaseRepository
+from core.repositories.pagination import DEFAULT_PAGE_SIZE, KeysetPage
+from core.repositories.routing import read_only
 
 logger = logging.getLogger(__name__)
 
 
+def _as_date(value):
+    # func.date() returns a date on MariaDB and an ISO string on SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def dataset_load_options(profile):
+    """
+    Loader options of a named profile: the relationships one kind of page reads, loaded up front in a
+    fixed number of queries instead of lazily, dataset by dataset, while rendering.
+
+    - ``list``: tables of datasets (metadata only).
+    - ``card``: dataset cards (metadata and authors; the size is a column of the dataset).
+    - ``detail``: the dataset page (plus the fits models' metadata and the uploader's profile).
+    - ``api``: ``DataSet.to_dict`` and the REST API (cards plus the files and the accepted communities).
+    - ``document``: search index documents (cards plus the accepted communities).
+    """
+    from app.modules.auth.models import User
+    from app.modules.fitsmodel.models import FitsModel
+
+    authors = selectinload(DataSet.ds_meta_data).selectinload(DSMetaData.authors)
+    files = selectinload(DataSet.fits_models).selectinload(FitsModel.files)
+    profiles = {
+        "list": (selectinload(DataSet.ds_meta_data),),
+        "card": (authors,),
+        "detail": (
+            authors,
+            files,
+            selectinload(DataSet.fits_models).selectinload(FitsModel.fm_meta_data),
+            selectinload(DataSet.user).selectinload(User.profile),
+        ),
+        "api": (authors, files, selectinload(DataSet.accepted_communities)),
+        "document": (authors, selectinload(DataSet.accepted_communities)),
+    }
+    return profiles[profile]
+
+
+class DailyStatsRepository(BaseRepository):
+    """
+    Per-day aggregates of raw download and view records. Days are rolled up by ``roll_up`` once they
+    are over; readers add the raw records newer than the last rolled-up day, so totals stay exact
+    whether or not the job has run. ``sources`` maps each metric to ``(record model, date column,
+    cookie column)`` and ``key`` is the entity column shared by the stats and record models.
+    """
+
+    def __init__(self, model, key, sources):
+        super().__init__(model)
+        self.key = key
+        self.sources = sources
+
+    def last_rolled_up_day(self) -> Optional[date]:
+        return _as_date(self.session.query(func.max(self.model.day)).scalar())
+
+    def _live_since(self) -> Optional[datetime]:
+        last_day = self.last_rolled_up_day()
+        return datetime.combine(last_day + timedelta(days=1), time.min) if last_day else None
+
+    def _first_record_day(self) -> Optional[date]:
+        days = []
+        for record_model, date_column, _ in self.sources.values():
+            first = self.session.query(func.min(getattr(record_model, date_column))).scalar()
+            if first is not None:
+                days.append(first.date() if isinstance(first, datetime) else _as_date(str(first)[:10]))
+        return min(days) if days else None
+
+    def roll_up(self, until: Optional[date] = None) -> int:
+        """
+        Aggregate every finished day up to ``until`` (yesterday by default). The last rolled-up day is
+        aggregated again so the job is idempotent and picks up records committed around midnight.
+        """
+        until = until or datetime.now(timezone.utc).date() - timedelta(days=1)
+        start = self.last_rolled_up_day() or self._first_record_day()
+        if start is None or start > until:
+            return 0
+
+        start_at = datetime.combine(start, time.min)
+        end_at = datetime.combine(until + timedelta(days=1), time.min)
+
+        rows = {}
+        for metric, (record_model, date_column, _) in self.sources.items():
+            record_date = getattr(record_model, date_column)
+            record_day = func.date(record_date)
+            aggregates = self.session.execute(
+                select(getattr(record_model, self.key), record_day, func.count())
+                .where(record_date >= start_at, record_date < end_at, getattr(record_model, self.key).isnot(None))
+                .group_by(getattr(record_model, self.key), record_day)
+            )
+            for entity_id, day, total in aggregates:
+                row = rows.setdefault(
+                    (entity_id, _as_date(day)),
+                    {self.key: entity_id, "day": _as_date(day), **{metric: 0 for metric in self.sources}},
+                )
+                row[metric] = total
+
+        self.session.execute(delete(self.model).where(self.model.day >= start, self.model.day <= until))
+        if rows:
+            self.session.execute(insert(self.model), list(rows.values()))
+        self.session.commit()
+        return len(rows)
+
+    def counts_since(self, metric, since: Optional[datetime] = None, entity_ids=None):
+        """
+        Subquery of ``(key, n)`` rows: rolled-up days since ``since`` (from the start when None) plus the raw
+        records not rolled up yet, for every entity or for ``entity_ids``. Roll-ups only hold whole days, so
+        ``since`` is clamped to the start of its day for both parts.
+        """
+        record_model, date_column, _ = self.sources[metric]
+        record_date = getattr(record_model, date_column)
+        live_since = self._live_since()
+        if since is not None:
+            since = datetime.combine(since.date(), time.min)
+
+        raw_since = max(since, live_since) if since and live_since else since or live_since
+        raw = select(getattr(record_model, self.key).label("entity_id"), literal(1).label("n"))
+        if raw_since:
+            raw = raw.where(record_date >= raw_since)
+        if entity_ids is not None:
+            raw = raw.where(getattr(record_model, self.key).in_(entity_ids))
+        if not live_since:
+            return raw.subquery()
+
+        rolled = select(getattr(self.model, self.key).label("entity_id"), getattr(self.model, metric).label("n"))
+        if since:
+            rolled = rolled.where(self.model.day >= since.date())
+        if entity_ids is not None:
+            rolled = rolled.where(getattr(self.model, self.key).in_(entity_ids))
+        return union_all(rolled, raw).subquery()
+
+    @read_only
+    def totals(self, entity_id=None) -> dict:
+        """Totals of every metric, for one entity or for all of them."""
+        live_since = self._live_since()
+
+        rolled = self.session.query(
+            *[func.coalesce(func.sum(getattr(self.model, metric)), 0) for metric in self.sources]
+        )
+        if entity_id is not None:
+            rolled = rolled.filter(getattr(self.model, self.key) == entity_id)
+        totals = {metric: int(value) for metric, value in zip(self.sources, rolled.one())}
+
+        for metric, (record_model, date_column, _) in self.sources.items():
+            live = self.session.query(func.count()).select_from(record_model)
+            if live_since:
+                live = live.filter(getattr(record_model, date_column) >= live_since)
+            if entity_id is not None:
+                live = live.filter(getattr(record_model, self.key) == entity_id)
+            totals[metric] += live.scalar()
+        return totals
+
+    def archive_records(self, before: date) -> int:
+        """
+        Move the raw records of rolled-up days older than ``before`` to ``ArchivedTrackingRecord``; their
+        counts live on in the roll-ups, and their keys keep deduplicating the clients that come back.
+        """
+        last_day = self.last_rolled_up_day()
+        if last_day is None:
+            return 0
+        # The last rolled-up day is aggregated again by the next roll_up, so its records are kept
+        cutoff = datetime.combine(min(before, last_day), time.min)
+
+        archived = 0
+        for record_model, date_column, cookie_column in self.sources.values():
+            record_date = getattr(record_model, date_column)
+            entity_id = getattr(record_model, self.key)
+            records = select(
+                literal(record_model.__tablename__),
+                entity_id,
+                record_model.user_id,
+                getattr(record_model, cookie_column),
+                record_date,
+            ).where(record_date < cutoff, entity_id.isnot(None))
+            self.session.execute(
+                insert(ArchivedTrackingRecord)
+                .from_select(["record_table", "entity_id", "user_id", "cookie", "recorded_at"], records)
+                .prefix_with("IGNORE", dialect="mysql")
+                .prefix_with("OR IGNORE", dialect="sqlite")
+            )
+            archived += self.session.execute(delete(record_model).where(record_date < cutoff)).rowcount
+        self.session.commit()
+        return archived
+
+
+class TrackingRecordRepository(BaseRepository):
+    """
+    Raw download or view records, one per client (cookie) and ``key`` entity: ``create_if_absent``
+    skips the clients already recorded, archived records included (see ``archive_records``).
+    """
+
+    def __init__(self, model, key, cookie_column):
+        super().__init__(model)
+        self.key = key
+        self.cookie_column = cookie_column
+
+    def create_if_absent(self, commit: bool = True, **kwargs) -> bool:
+        archived = exists().where(
+            ArchivedTrackingRecord.record_table == self.model.__tablename__,
+            ArchivedTrackingRecord.entity_id == kwargs.get(self.key),
+            ArchivedTrackingRecord.cookie == kwargs.get(self.cookie_column),
+        )
+        return super().create_if_absent(commit, unless=archived, **kwargs)
+
+
+class DSDailyStatsRepository(DailyStatsRepository):
+    def __init__(self):
+        super().__init__(
+            DSDailyStats,
+            "dataset_id",
+            {
+                "downloads": (DSDownloadRecord, "download_date", "download_cookie"),
+                "views": (DSViewRecord, "view_date", "view_cookie"),
+            },
+        )
+
+
 class AuthorRepository(BaseRepository):
     def __init__(self):
         super().__init__(Author)
 
 
-class DSDownloadRecordRepository(BaseRepository):
+class DSDownloadRecordRepository(TrackingRecordRepository):
     def __init__(self):
-        super().__init__(DSDownloadRecord)
+        super().__init__(DSDownloadRecord, "dataset_id", "download_cookie")
 
     def total_dataset_downloads(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return DSDailyStatsRepository().totals()["downloads"]
 
 
 class DSMetaDataRepository(BaseRepository):
@@ -34,23 +266,16 @@ class DSMetaDataRepository(BaseRepository):
         return self.model.query.filter_by(dataset_doi=doi).first()
 
 
-class DSViewRecordRepository(BaseRepository):
+class DSViewRecordRepository(TrackingRecordRepository):
     def __init__(self):
-        super().__init__(DSViewRecord)
+        super().__init__(DSViewRecord, "dataset_id", "view_cookie")
 
     def total_dataset_views(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
-
-    def the_record_exists(self, dataset: DataSet, user_cookie: str):
-        return self.model.query.filter_by(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset.id,
-            view_cookie=user_cookie,
-        ).first()
+        return DSDailyStatsRepository().totals()["views"]
 
-    def create_new_record(self, dataset: DataSet, user_cookie: str) -> DSViewRecord:
-        return self.create(
+    def create_new_record(self, dataset: DataSet, user_cookie: str) -> bool:
+        """Record the view unless this cookie already viewed the dataset; whether it was recorded."""
+        return self.create_if_absent(
             user_id=current_user.id if current_user.is_authenticated else None,
             dataset_id=dataset.id,
             view_date=datetime.now(timezone.utc),
@@ -62,115 +287,297 @@ class DataSetRepository(BaseRepository):
     def __init__(self):
         super().__init__(DataSet)
 
-    def get_synchronized(self, current_user_id: int) -> DataSet:
-        return (
-            self.model.query.join(DSMetaData)
+    def with_profile(self, profile):
+        """Dataset query eager loading the relationships of ``profile``, see ``dataset_load_options``."""
+        return self.model.query.options(*dataset_load_options(profile))
+
+    @read_only
+    def get_synchronized(self, current_user_id: int, cursor=None, limit=DEFAULT_PAGE_SIZE) -> KeysetPage:
+        query = (
+            self.with_profile("list")
+            .join(DSMetaData)
             .filter(DataSet.user_id == current_user_id, DSMetaData.dataset_doi.isnot(None))
-            .order_by(self.model.created_at.desc())
-            .all()
         )
+        return self.paginate(query, cursor, limit)
 
-    def get_unsynchronized(self, current_user_id: int) -> DataSet:
-        return (
-            self.model.query.join(DSMetaData)
+    @read_only
+    def get_unsynchronized(self, current_user_id: int, cursor=None, limit=DEFAULT_PAGE_SIZE) -> KeysetPage:
+        query = (
+            self.with_profile("list")
+            .join(DSMetaData)
             .filter(DataSet.user_id == current_user_id, DSMetaData.dataset_doi.is_(None))
-            .order_by(self.model.created_at.desc())
-            .all()
         )
+        return self.paginate(query, cursor, limit)
 
     def get_unsynchronized_dataset(self, current_user_id: int, dataset_id: int) -> DataSet:
         return (
-            self.model.query.join(DSMetaData)
+            self.with_profile("detail")
+            .join(DSMetaData)
             .filter(DataSet.user_id == current_user_id, DataSet.id == dataset_id, DSMetaData.dataset_doi.is_(None))
             .first()
         )
 
+    @read_only
+    def get_by_doi(self, doi: str, profile: str = "detail") -> Optional[DataSet]:
+        return self.with_profile(profile).join(DSMetaData).filter(DSMetaData.dataset_doi == doi).first()
+
+    @read_only
     def count_synchronized_datasets(self):
         return self.model.query.join(DSMetaData).filter(DSMetaData.dataset_doi.isnot(None)).count()
 
+    @read_only
     def count_unsynchronized_datasets(self):
         return self.model.query.join(DSMetaData).filter(DSMetaData.dataset_doi.is_(None)).count()
 
+    @read_only
     def latest_synchronized(self):
         return (
-            self.model.query.join(DSMetaData)
+            self.with_profile("card")
+            .join(DSMetaData)
             .filter(DSMetaData.dataset_doi.isnot(None))
             .order_by(desc(self.model.id))
             .limit(5)
             .all()
         )
 
+    @read_only
+    def count_synchronized_datasets_and_fits_models(self):
+        """Number of synchronized datasets and of fits models, read in a single round trip."""
+        from app.modules.fitsmodel.models import FitsModel
+
+        synchronized = (
+            select(func.count(DataSet.id))
+            .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
+            .where(DSMetaData.dataset_doi.isnot(None))
+            .scalar_subquery()
+        )
+        fits_models = select(func.count(FitsModel.id)).scalar_subquery()
+        datasets_counter, fits_models_counter = self.session.execute(select(synchronized, fits_models)).one()
+        return datasets_counter, fits_models_counter
+
+    @read_only
+    def latest_synchronized_ids(self, limit=5):
+        rows = (
+            self.session.query(DataSet.id)
+            .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
+            .filter(DSMetaData.dataset_doi.isnot(None))
+            .order_by(desc(DataSet.id))
+            .limit(limit)
+            .all()
+        )
+        return [dataset_id for (dataset_id,) in rows]
+
+    @read_only
+    def get_with_details(self, dataset_ids, profile="card"):
+        """Datasets loaded with ``profile``, keyed by id."""
+        if not dataset_ids:
+            return {}
+        datasets = self.with_profile(profile).filter(DataSet.id.in_(dataset_ids)).all()
+        return {dataset.id: dataset for dataset in datasets}
+
+    @read_only
     def trending_datasets(self, limit=10, period_days=7):
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=period_days)
+        cutoff_date = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=period_days)
+        downloads = DSDailyStatsRepository().counts_since("downloads", cutoff_date)
+        download_count = func.sum(downloads.c.n)
 
-        return (
-            self.session.query(DataSet, func.count(DSDownloadRecord.id).label("download_count"))
-            .join(DSDownloadRecord, DataSet.id == DSDownloadRecord.dataset_id)
+        rows = (
+            self.session.query(DataSet, download_count.label("download_count"))
+            .join(downloads, DataSet.id == downloads.c.entity_id)
             .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
-            .filter(DSDownloadRecord.download_date >= cutoff_date)
             .filter(DSMetaData.dataset_doi.isnot(None))
             .group_by(DataSet.id)
-            .order_by(func.count(DSDownloadRecord.id).desc())
+            .order_by(download_count.desc())
             .limit(limit)
             .all()
         )
+        return [(dataset, int(count)) for dataset, count in rows]
 
+    @read_only
     def recommended_datasets(self, reference_dataset_id, limit=10):
-        ref_dataset = self.get_by_id(reference_dataset_id)
-        if not ref_dataset or not ref_dataset.ds_meta_data:
+        dataset_ids = get_cached_recommendations(reference_dataset_id, limit)
+        if dataset_ids is None:
+            dataset_ids = self.recommended_dataset_ids(reference_dataset_id, limit)
+            if len(dataset_ids) < limit:
+                # Datasets sharing no tag, author or community still get the closest descriptions
+                text_neighbours = DataSetNeighbourRepository().neighbour_ids(reference_dataset_id, limit)
+                dataset_ids += [dataset_id for dataset_id in text_neighbours if dataset_id not in dataset_ids]
+                dataset_ids = dataset_ids[:limit]
+            cache_recommendations(reference_dataset_id, limit, dataset_ids)
+        if not dataset_ids:
+            return []
+
+        datasets = self.get_with_details(dataset_ids)
+        return [datasets[dataset_id] for dataset_id in dataset_ids if dataset_id in datasets]
+
+    @read_only
+    def also_downloaded_datasets(self, dataset_id, limit=5):
+        """Synchronized datasets most often downloaded together with ``dataset_id``, best first."""
+        return (
+            self.with_profile("card")
+            .join(DataSetCoDownload, DataSetCoDownload.neighbour_id == DataSet.id)
+            .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
+            .filter(DataSetCoDownload.dataset_id == dataset_id, DSMetaData.dataset_doi.isnot(None))
+            .order_by(DataSetCoDownload.score.desc(), DataSet.id)
+            .limit(limit)
+            .all()
+        )
+
+    @read_only
+    def recommended_dataset_ids(self, reference_dataset_id, limit=10):
+        """
+        Ids of the synchronized datasets that share the most tags, authors and accepted communities
+        with the reference dataset, ties broken by number of downloads. Only datasets found through
+        the recommendation index are scored.
+        """
+        feature = DataSetRecommendationFeature
+        reference_features = self.session.execute(
+            select(feature.kind, feature.value).where(feature.dataset_id == reference_dataset_id)
+        ).all()
+        if not reference_features or limit <= 0:
             return []
 
-        ref_tags = set()
-        if ref_dataset.ds_meta_data.tags:
-            ref_tags = set(tag.strip().lower() for tag in ref_dataset.ds_meta_data.tags.split(",") if tag.strip())
+        values_by_kind = {}
+        for kind, value in reference_features:
+            values_by_kind.setdefault(kind, []).append(value)
+
+        shared_features = self.session.execute(
+            select(feature.dataset_id, feature.kind, func.count())
+            .join(DataSet, DataSet.id == feature.dataset_id)
+            .join(DSMetaData, DSMetaData.id == DataSet.ds_meta_data_id)
+            .where(
+                feature.dataset_id != reference_dataset_id,
+                DSMetaData.dataset_doi.isnot(None),
+                or_(
+                    *[and_(feature.kind == kind, feature.value.in_(values)) for kind, values in values_by_kind.items()]
+                ),
+            )
+            .group_by(feature.dataset_id, feature.kind)
+        ).all()
+
+        scores = {}
+        for dataset_id, kind, shared in shared_features:
+            scores[dataset_id] = scores.get(dataset_id, 0.0) + FEATURE_WEIGHTS[kind] * shared
+        if not scores:
+            return []
+
+        # Only candidates that can still make the top-k (ties included) need their downloads counted
+        threshold = heapq.nlargest(limit, scores.values())[-1]
+        contenders = {dataset_id: score for dataset_id, score in scores.items() if score >= threshold}
+        # Counted from the daily roll-ups, which outlive the archived download records
+        counts = DSDailyStatsRepository().counts_since("downloads", entity_ids=list(contenders))
+        downloads = dict(
+            self.session.execute(select(counts.c.entity_id, func.sum(counts.c.n)).group_by(counts.c.entity_id)).all()
+        )
 
-        ref_authors = set()
-        if ref_dataset.ds_meta_data.authors:
-            ref_authors = set(author.id for author in ref_dataset.ds_meta_data.authors)
+        return heapq.nlargest(
+            limit,
+            contenders,
+            key=lambda dataset_id: (contenders[dataset_id], downloads.get(dataset_id, 0), -dataset_id),
+        )
+
+
+class DataSetNeighbourRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DataSetNeighbour)
 
-        community_repo = CommunityDataSetRepository()
-        ref_community_associations = community_repo.get_approved_communities_associated_to_dataset(reference_dataset_id)
-        ref_communities = set(assoc.community_id for assoc in ref_community_associations)
+    def corpus(self):
+        """``{dataset_id: text}`` of the synchronized datasets: their metadata plus their fits models' metadata."""
+        from app.modules.fitsmodel.models import FitsModel, FMMetaData
 
-        all_candidates = (
-            self.session.query(DataSet)
+        rows = self.session.execute(
+            select(DataSet.id, DSMetaData.title, DSMetaData.description, DSMetaData.tags)
             .join(DSMetaData, DataSet.ds_meta_data_id == DSMetaData.id)
-            .filter(DataSet.id != reference_dataset_id)
-            .filter(DSMetaData.dataset_doi.isnot(None))
-            .all()
+            .where(DSMetaData.dataset_doi.isnot(None))
+        ).all()
+        texts = {dataset_id: [title, description, tags] for dataset_id, title, description, tags in rows}
+
+        fits_model_rows = self.session.execute(
+            select(FitsModel.data_set_id, FMMetaData.title, FMMetaData.description, FMMetaData.tags)
+            .join(FMMetaData, FitsModel.fm_meta_data_id == FMMetaData.id)
+            .where(FitsModel.data_set_id.in_(texts))
         )
+        for dataset_id, title, description, tags in fits_model_rows:
+            texts[dataset_id].extend([title, description, tags])
 
-        classified_datasets = []
-        for dataset in all_candidates:
-            score = 0.0
+        return {dataset_id: " ".join(part for part in parts if part) for dataset_id, parts in texts.items()}
 
-            if dataset.ds_meta_data and dataset.ds_meta_data.authors:
-                for author in dataset.ds_meta_data.authors:
-                    if author.id in ref_authors:
-                        score += 1.5
+    def indexed_dataset_ids(self):
+        return set(self.session.execute(select(distinct(DataSetNeighbour.dataset_id))).scalars())
 
-            if dataset.ds_meta_data and dataset.ds_meta_data.tags:
-                candidate_tags = set(tag.strip().lower() for tag in dataset.ds_meta_data.tags.split(",") if tag.strip())
-                shared_tags_count = len(ref_tags & candidate_tags)
-                score += shared_tags_count * 2.0
+    def neighbours_by_dataset(self, dataset_ids):
+        neighbours = {dataset_id: [] for dataset_id in dataset_ids}
+        rows = self.session.execute(
+            select(DataSetNeighbour.dataset_id, DataSetNeighbour.neighbour_id, DataSetNeighbour.score).where(
+                DataSetNeighbour.dataset_id.in_(dataset_ids)
+            )
+        )
+        for dataset_id, neighbour_id, score in rows:
+            neighbours[dataset_id].append((neighbour_id, score))
+        return neighbours
+
+    def neighbour_ids(self, dataset_id, limit=10):
+        """Closest datasets first, read from the (dataset_id, score) index."""
+        return list(
+            self.session.execute(
+                select(DataSetNeighbour.neighbour_id)
+                .where(DataSetNeighbour.dataset_id == dataset_id)
+                .order_by(DataSetNeighbour.score.desc(), DataSetNeighbour.neighbour_id)
+                .limit(limit)
+            ).scalars()
+        )
 
-            candidate_community_associations = community_repo.get_approved_communities_associated_to_dataset(dataset.id)
-            candidate_communities = set(assoc.community_id for assoc in candidate_community_associations)
-            shared_communities_count = len(ref_communities & candidate_communities)
-            score += shared_communities_count * 2.5
+    def replace_neighbours(self, neighbours):
+        """Swap the stored lists of the datasets in ``{dataset_id: [(neighbour_id, score)]}``; not committed."""
+        if not neighbours:
+            return
+        self.session.execute(delete(DataSetNeighbour).where(DataSetNeighbour.dataset_id.in_(list(neighbours))))
+        rows = [
+            {"dataset_id": dataset_id, "neighbour_id": neighbour_id, "score": score}
+            for dataset_id, dataset_neighbours in neighbours.items()
+            for neighbour_id, score in dataset_neighbours
+        ]
+        if rows:
+            self.session.execute(insert(DataSetNeighbour), rows)
 
-            if score > 0:
-                download_count = (
-                    self.session.query(func.count(DSDownloadRecord.id))
-                    .filter(DSDownloadRecord.dataset_id == dataset.id)
-                    .scalar()
-                    or 0
-                )
-                classified_datasets.append((dataset, score, download_count))
+    def delete_all(self):
+        self.session.execute(delete(DataSetNeighbour))
 
-        classified_datasets.sort(key=lambda x: (x[1], x[2]), reverse=True)
 
-        return [ds for ds, _, _ in classified_datasets[:limit]]
+class DataSetCoDownloadRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(DataSetCoDownload)
+
+    def download_events(self, batch_size=50_000):
+        """
+        Yield ``(user_id, download_cookie, download_date, dataset_id)`` for every download record, archived
+        ones included, streamed in batches of ``batch_size`` rows.
+        """
+        live = select(
+            DSDownloadRecord.user_id,
+            DSDownloadRecord.download_cookie,
+            DSDownloadRecord.download_date,
+            DSDownloadRecord.dataset_id,
+        ).where(DSDownloadRecord.dataset_id.isnot(None))
+        archived = select(
+            ArchivedTrackingRecord.user_id,
+            ArchivedTrackingRecord.cookie,
+            ArchivedTrackingRecord.recorded_at,
+            ArchivedTrackingRecord.entity_id,
+        ).where(ArchivedTrackingRecord.record_table == DSDownloadRecord.__tablename__)
+        result = self.session.execute(union_all(live, archived).execution_options(yield_per=batch_size))
+        yield from result.tuples()
+
+    def replace_all(self, neighbours):
+        """Swap the whole table for ``{dataset_id: [(neighbour_id, score, co_downloads)]}``; not committed."""
+        self.session.execute(delete(DataSetCoDownload))
+        rows = [
+            {"dataset_id": dataset_id, "neighbour_id": neighbour_id, "score": score, "co_downloads": co_downloads}
+            for dataset_id, dataset_neighbours in neighbours.items()
+            for neighbour_id, score, co_downloads in dataset_neighbours
+        ]
+        if rows:
+            self.session.execute(insert(DataSetCoDownload), rows)
 
 
 class DOIMappingRepository(BaseRepository):
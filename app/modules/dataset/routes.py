@@ -23,13 +23,12 @@ from flask_login import current_user, login_required
 
 from app.modules.dataset import dataset_bp
 from app.modules.dataset.forms import DataSetForm
-from app.modules.dataset.models import DataSet, DSDownloadRecord
+from app.modules.dataset.models import DataSet
 from app.modules.dataset.services import (
     AuthorService,
     DataSetService,
     DOIMappingService,
     DSDownloadRecordService,
-    DSMetaDataService,
     DSViewRecordService,
 )
 from app.modules.fakenodo.services import FakenodoService
@@ -39,7 +38,6 @@ logger = logging.getLogger(__name__)
 
 dataset_service = DataSetService()
 author_service = AuthorService()
-dsmetadata_service = DSMetaDataService()
 fakenodo_service = FakenodoService()
 doi_mapping_service = DOIMappingService()
 ds_view_record_service = DSViewRecordService()
@@ -139,11 +137,13 @@ def create_dataset():
 @dataset_bp.route("/dataset/list", methods=["GET", "POST"])
 @login_required
 def list_dataset():
-    return render_template(
-        "dataset/list_datasets.html",
-        datasets=dataset_service.get_synchronized(current_user.id),
-        local_datasets=dataset_service.get_unsynchronized(current_user.id),
-    )
+    # Each table pages on its own cursor; "Load more" appends the next page of one table
+    try:
+        datasets = dataset_service.get_synchronized(current_user.id, request.args.get("cursor"))
+        local_datasets = dataset_service.get_unsynchronized(current_user.id, request.args.get("local_cursor"))
+    except ValueError:
+        abort(400)
+    return render_template("dataset/list_datasets.html", datasets=datasets, local_datasets=local_datasets)
 
 
 def generate_temp_filename(filename):
@@ -411,22 +411,15 @@ def download_dataset(dataset_id):
             mimetype="application/zip",
         )
 
-    # Check if the download record already exists for this cookie
-    existing_record = DSDownloadRecord.query.filter_by(
+    # Record the download unless this cookie already downloaded the dataset
+    recorded = DSDownloadRecordService().create_if_absent(
         user_id=current_user.id if current_user.is_authenticated else None,
         dataset_id=dataset_id,
+        download_date=datetime.now(timezone.utc),
         download_cookie=user_cookie,
-    ).first()
-
-    if not existing_record:
-        # Record the download in your database
-        DSDownloadRecordService().create(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            dataset_id=dataset_id,
-            download_date=datetime.now(timezone.utc),
-            download_cookie=user_cookie,
-        )
+    )
 
+    if recorded:
         DataSetService().update_download_counter(dataset_id=dataset_id)
 
     return resp
@@ -459,15 +452,13 @@ def subdomain_index(doi):
         return redirect(url_for("dataset.subdomain_index", doi=new_doi), code=302)
 
     # Try to search the dataset by the provided DOI (which should already be the new one)
-    ds_meta_data = dsmetadata_service.filter_by_doi(doi)
+    dataset = dataset_service.get_by_doi(doi)
 
-    if not ds_meta_data:
+    if not dataset:
         abort(404)
 
-    # Get dataset
-    dataset = ds_meta_data.data_set
-
     recommended_datasets = dataset_service.recommended_datasets(reference_dataset_id=dataset.id, limit=5)
+    also_downloaded_datasets = dataset_service.also_downloaded_datasets(dataset.id, limit=5)
 
     # Save the cookie to the user's browser
     user_cookie = ds_view_record_service.create_cookie(dataset=dataset)
@@ -476,6 +467,7 @@ def subdomain_index(doi):
             "dataset/view_dataset.html",
             dataset=dataset,
             recommended_datasets=recommended_datasets,
+            also_downloaded_datasets=also_downloaded_datasets,
         )
     )
     resp.set_cookie("view_cookie", user_cookie)
@@ -493,9 +485,11 @@ def get_unsynchronized_dataset(dataset_id):
         abort(404)
 
     recommended_datasets = dataset_service.recommended_datasets(reference_dataset_id=dataset.id, limit=5)
+    also_downloaded_datasets = dataset_service.also_downloaded_datasets(dataset.id, limit=5)
 
     return render_template(
         "dataset/view_dataset.html",
         dataset=dataset,
         recommended_datasets=recommended_datasets,
+        also_downloaded_datasets=also_downloaded_datasets,
     )
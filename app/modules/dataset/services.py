@@ -3,16 +3,24 @@ import logging
 import os
 import shutil
 import uuid
+from array import array
+from datetime import datetime
 from typing import Optional
 
+import numpy as np
 from flask import request
 
 from app.modules.auth.services import AuthenticationService
-from app.modules.dataset.models import DataSet, DSMetaData, DSViewRecord
+from app.modules.dataset import codownloads, similarity
+from app.modules.dataset.models import DataSet, DSMetaData
+from app.modules.dataset.recommendations import clear_recommendation_cache
 from app.modules.dataset.repositories import (
     AuthorRepository,
+    DataSetCoDownloadRepository,
+    DataSetNeighbourRepository,
     DataSetRepository,
     DOIMappingRepository,
+    DSDailyStatsRepository,
     DSDownloadRecordRepository,
     DSMetaDataRepository,
     DSViewRecordRepository,
@@ -26,6 +34,7 @@ from app.modules.hubfile.repositories import (
     HubfileRepository,
     HubfileViewRecordRepository,
 )
+from core.repositories.pagination import KeysetPage
 from core.services.BaseService import BaseService
 
 logger = logging.getLogger(__name__)
@@ -51,6 +60,7 @@ class DataSetService(BaseService):
         self.hubfilerepository = HubfileRepository()
         self.dsviewrecord_repostory = DSViewRecordRepository()
         self.hubfileviewrecord_repository = HubfileViewRecordRepository()
+        self.dsdailystats_repository = DSDailyStatsRepository()
 
     def update_download_counter(self, dataset_id):
         dataset = self.repository.get_by_id(dataset_id)
@@ -86,15 +96,18 @@ class DataSetService(BaseService):
 
             shutil.move(src, dest_file)
 
-    def get_synchronized(self, current_user_id: int) -> DataSet:
-        return self.repository.get_synchronized(current_user_id)
+    def get_synchronized(self, current_user_id: int, cursor=None, limit=None) -> KeysetPage:
+        return self.repository.get_synchronized(current_user_id, cursor, limit)
 
-    def get_unsynchronized(self, current_user_id: int) -> DataSet:
-        return self.repository.get_unsynchronized(current_user_id)
+    def get_unsynchronized(self, current_user_id: int, cursor=None, limit=None) -> KeysetPage:
+        return self.repository.get_unsynchronized(current_user_id, cursor, limit)
 
     def get_unsynchronized_dataset(self, current_user_id: int, dataset_id: int) -> DataSet:
         return self.repository.get_unsynchronized_dataset(current_user_id, dataset_id)
 
+    def get_by_doi(self, doi: str) -> Optional[DataSet]:
+        return self.repository.get_by_doi(doi)
+
     def latest_synchronized(self):
         return self.repository.latest_synchronized()
 
@@ -116,6 +129,9 @@ class DataSetService(BaseService):
     def total_dataset_views(self) -> int:
         return self.dsviewrecord_repostory.total_dataset_views()
 
+    def get_dataset_stats(self, dataset_id: int) -> dict:
+        return self.dsdailystats_repository.totals(dataset_id)
+
     def create_from_form(self, form, current_user) -> DataSet:
         main_author = {
             "name": f"{current_user.profile.surname}, {current_user.profile.name}",
@@ -125,35 +141,41 @@ class DataSetService(BaseService):
         try:
             logger.info(f"Creating dsmetadata...: {form.get_dsmetadata()}")
             dsmetadata = self.dsmetadata_repository.create(**form.get_dsmetadata())
-            for author_data in [main_author] + form.get_authors():
-                author = self.author_repository.create(commit=False, ds_meta_data_id=dsmetadata.id, **author_data)
-                dsmetadata.authors.append(author)
+            self.author_repository.bulk_create(
+                [
+                    dict(ds_meta_data_id=dsmetadata.id, **author_data)
+                    for author_data in [main_author] + form.get_authors()
+                ],
+                commit=False,
+            )
 
             dataset = self.create(commit=False, user_id=current_user.id, ds_meta_data_id=dsmetadata.id)
 
-            for fits_model in form.fits_models:
-                fits_filename = fits_model.fits_filename.data
-                fmmetadata = self.fmmetadata_repository.create(commit=False, **fits_model.get_fmmetadata())
-                for author_data in fits_model.get_authors():
-                    author = self.author_repository.create(commit=False, fm_meta_data_id=fmmetadata.id, **author_data)
-                    fmmetadata.authors.append(author)
-
-                fm = self.fits_model_repository.create(
-                    commit=False, data_set_id=dataset.id, fm_meta_data_id=fmmetadata.id
-                )
+            # One flush per table for all the fits models of the form
+            fmmetadatas = self.fmmetadata_repository.bulk_create(
+                [fits_model.get_fmmetadata() for fits_model in form.fits_models], commit=False
+            )
+            self.author_repository.bulk_create(
+                [
+                    dict(fm_meta_data_id=fmmetadata.id, **author_data)
+                    for fits_model, fmmetadata in zip(form.fits_models, fmmetadatas)
+                    for author_data in fits_model.get_authors()
+                ],
+                commit=False,
+            )
+            fms = self.fits_model_repository.bulk_create(
+                [dict(data_set_id=dataset.id, fm_meta_data_id=fmmetadata.id) for fmmetadata in fmmetadatas],
+                commit=False,
+            )
 
-                # associated files in FITS model
+            # associated files in FITS model
+            files = []
+            for fits_model, fm in zip(form.fits_models, fms):
+                fits_filename = fits_model.fits_filename.data
                 file_path = os.path.join(current_user.temp_folder(), fits_filename)
                 checksum, size = calculate_checksum_and_size(file_path)
-
-                file = self.hubfilerepository.create(
-                    commit=False,
-                    name=fits_filename,
-                    checksum=checksum,
-                    size=size,
-                    fits_model_id=fm.id,
-                )
-                fm.files.append(file)
+                files.append(dict(name=fits_filename, checksum=checksum, size=size, fits_model_id=fm.id))
+            self.hubfilerepository.bulk_create(files, commit=False)
             self.repository.session.commit()
         except Exception as exc:
             logger.info(f"Exception creating dataset from form...: {exc}")
@@ -162,89 +184,126 @@ class DataSetService(BaseService):
         return dataset
 
     def update_dsmetadata(self, id, **kwargs):
-        dsmetadata = self.dsmetadata_repository.get_by_id(id)
-        previous_doi = dsmetadata.dataset_doi if dsmetadata else None
+        # The search index is refreshed by the outbox listeners in app.modules.elasticsearch.outbox
+        return self.dsmetadata_repository.update(id, **kwargs)
 
-        updated = self.dsmetadata_repository.update(id, **kwargs)
+    def get_fitshub_doi(self, dataset: DataSet) -> str:
+        return dataset.get_fitshub_doi()
 
-        new_doi = updated.dataset_doi if updated else None
-        dataset = updated.data_set if updated else None
+    def get_trending_datasets(self, limit: int = 5, period_days: int = 7):
+        return self.repository.trending_datasets(limit, period_days)
 
-        should_index = updated and dataset and new_doi and new_doi != previous_doi
+    def recommended_datasets(self, reference_dataset_id: int, limit: int = 10):
+        return self.repository.recommended_datasets(reference_dataset_id=reference_dataset_id, limit=limit)
 
-        if should_index:
-            try:
-                self.repository.session.refresh(dataset)
-            except Exception:
-                dataset = self.repository.get_by_id(dataset.id)
+    def also_downloaded_datasets(self, dataset_id: int, limit: int = 5):
+        return self.repository.also_downloaded_datasets(dataset_id, limit)
 
-            self._index_dataset_records(dataset)
 
-        return updated
+class DSDailyStatsService(BaseService):
+    def __init__(self):
+        super().__init__(DSDailyStatsRepository())
 
-    def get_fitshub_doi(self, dataset: DataSet) -> str:
-        domain = os.getenv("DOMAIN", "localhost")
-        return f"http://{domain}/doi/{dataset.ds_meta_data.dataset_doi}"
-
-    def _index_dataset_records(self, dataset: DataSet) -> bool:
-        if not dataset or not dataset.ds_meta_data:
-            return False
-
-        dataset_doi = dataset.ds_meta_data.dataset_doi
-        if not dataset_doi:
-            logger.info(
-                "[INDEX SKIP] Dataset %s sin DOI, se omite indexación",
-                dataset.id,
-            )
-            return False
+    def roll_up(self, until=None) -> int:
+        return self.repository.roll_up(until)
 
-        try:
-            from elasticsearch import ConnectionError as ESConnectionError
+    def archive_records(self, before) -> int:
+        return self.repository.archive_records(before)
 
-            from app.modules.elasticsearch.utils import (
-                index_dataset,
-                index_hubfile,
-            )
-        except ImportError as exc:
-            logger.warning(
-                "[INDEX SKIP] Elasticsearch no disponible (%s)",
-                exc,
-            )
-            return False
 
-        try:
-            fits_models = list(dataset.fits_models)
-            index_dataset(dataset)
-            for fits_model in fits_models:
-                files = list(getattr(fits_model, "files", []))
-                for hubfile in files:
-                    index_hubfile(hubfile)
-
-            logger.info(
-                "[INDEX] Dataset %s indexado correctamente en Elasticsearch",
-                dataset.id,
-            )
-            return True
-        except ESConnectionError as exc:
-            logger.warning(
-                "[INDEX SKIP] ES no disponible al indexar dataset %s",
-                dataset.id,
-                exc_info=exc,
-            )
-        except Exception as exc:
-            logger.exception(
-                "[INDEX ERROR] Falló la indexación del dataset %s",
-                dataset.id,
-                exc_info=exc,
+class DataSetNeighbourService(BaseService):
+    """
+    Offline builder of the text neighbours table. ``rebuild`` compares every dataset with every other
+    one; ``update`` only scores the given datasets and slots them into the lists of the datasets they
+    beat, so new datasets get neighbours without a full rebuild. Scores of untouched lists keep the
+    IDF weights of their last build, so a periodic ``rebuild`` is still worthwhile.
+    """
+
+    def __init__(self):
+        super().__init__(DataSetNeighbourRepository())
+
+    def rebuild(self, limit=similarity.NEIGHBOURS_PER_DATASET, batch_size=similarity.BATCH_SIZE) -> int:
+        matrix = similarity.TfidfMatrix.from_documents(self.repository.corpus())
+        self.repository.delete_all()
+
+        stored = 0
+        for dataset_ids, scores in matrix.iter_similarities(matrix.dataset_ids.tolist(), batch_size):
+            neighbours = similarity.top_neighbours(dataset_ids, scores, matrix.dataset_ids, limit)
+            self.repository.replace_neighbours(neighbours)
+            stored += sum(1 for dataset_neighbours in neighbours.values() if dataset_neighbours)
+
+        self.repository.session.commit()
+        clear_recommendation_cache()
+        return stored
+
+    def update(
+        self, dataset_ids=None, limit=similarity.NEIGHBOURS_PER_DATASET, batch_size=similarity.BATCH_SIZE
+    ) -> int:
+        """Score ``dataset_ids`` (by default, the datasets without stored neighbours) and return how many."""
+        corpus = self.repository.corpus()
+        if dataset_ids is None:
+            dataset_ids = sorted(set(corpus) - self.repository.indexed_dataset_ids())
+        matrix = similarity.TfidfMatrix.from_documents(corpus)
+
+        updated = set(dataset_ids)
+        scored = 0
+        for batch_ids, scores in matrix.iter_similarities(dataset_ids, batch_size):
+            self.repository.replace_neighbours(similarity.top_neighbours(batch_ids, scores, matrix.dataset_ids, limit))
+            scored += len(batch_ids)
+
+            # Similarity is symmetric: the batch datasets are candidates for every list they score in
+            candidates = {}
+            rows, columns = (scores >= similarity.MIN_SIMILARITY).nonzero()
+            for row, column in zip(rows, columns):
+                other_id = int(matrix.dataset_ids[column])
+                if other_id not in updated:
+                    candidates.setdefault(other_id, []).append((batch_ids[row], float(scores[row, column])))
+
+            current = self.repository.neighbours_by_dataset(list(candidates))
+            self.repository.replace_neighbours(
+                {
+                    other_id: similarity.merge_neighbours(current[other_id], new_neighbours, limit)
+                    for other_id, new_neighbours in candidates.items()
+                }
             )
 
-        return False
+        self.repository.session.commit()
+        clear_recommendation_cache()
+        return scored
 
-    def get_trending_datasets(self, limit: int = 5, period_days: int = 7):
-        return self.repository.trending_datasets(limit, period_days)
 
-    def recommended_datasets(self, reference_dataset_id: int, limit: int = 10):
-        return self.repository.recommended_datasets(reference_dataset_id=reference_dataset_id, limit=limit)
+class DataSetCoDownloadService(BaseService):
+    """Batch builder of the "also downloaded" table from the download records."""
+
+    def __init__(self):
+        super().__init__(DataSetCoDownloadRepository())
+
+    def rebuild(
+        self,
+        window_hours=codownloads.CO_DOWNLOAD_WINDOW_HOURS,
+        limit=codownloads.NEIGHBOURS_PER_DATASET,
+        min_co_downloads=codownloads.MIN_CO_DOWNLOADS,
+    ) -> int:
+        visitors, timestamps, dataset_ids = array("q"), array("d"), array("q")
+        visitor_ids = {}
+        epoch = datetime(1970, 1, 1)
+        for user_id, cookie, download_date, dataset_id in self.repository.download_events():
+            visitor = ("user", user_id) if user_id is not None else ("cookie", cookie)
+            visitors.append(visitor_ids.setdefault(visitor, len(visitor_ids)))
+            timestamps.append((download_date.replace(tzinfo=None) - epoch).total_seconds())
+            dataset_ids.append(dataset_id)
+
+        sessions, session_datasets = codownloads.sessionize(
+            np.frombuffer(visitors, dtype=np.int64),
+            np.frombuffer(timestamps, dtype=np.float64),
+            np.frombuffer(dataset_ids, dtype=np.int64),
+            window_seconds=window_hours * 3600,
+        )
+        neighbours = codownloads.top_co_downloads(sessions, session_datasets, limit, min_co_downloads)
+
+        self.repository.replace_all(neighbours)
+        self.repository.session.commit()
+        return len(neighbours)
 
 
 class AuthorService(BaseService):
@@ -272,14 +331,11 @@ class DSViewRecordService(BaseService):
     def __init__(self):
         super().__init__(DSViewRecordRepository())
 
-    def the_record_exists(self, dataset: DataSet, user_cookie: str):
-        return self.repository.the_record_exists(dataset, user_cookie)
-
     def create_new_record(
         self,
         dataset: DataSet,
         user_cookie: str,
-    ) -> DSViewRecord:
+    ) -> bool:
         return self.repository.create_new_record(dataset, user_cookie)
 
     def create_cookie(self, dataset: DataSet) -> str:
@@ -287,13 +343,7 @@ class DSViewRecordService(BaseService):
         if not user_cookie:
             user_cookie = str(uuid.uuid4())
 
-        existing_record = self.the_record_exists(
-            dataset=dataset,
-            user_cookie=user_cookie,
-        )
-
-        if not existing_record:
-            self.create_new_record(dataset=dataset, user_cookie=user_cookie)
+        self.create_new_record(dataset=dataset, user_cookie=user_cookie)
 
         return user_cookie
 
@@ -0,0 +1,144 @@
+import re
+from collections import Counter
+
+import numpy as np
+import unidecode
+
+# Neighbours stored per dataset and lowest cosine similarity worth recommending
+NEIGHBOURS_PER_DATASET = 10
+MIN_SIMILARITY = 0.05
+# Rows compared at once: every batch holds a dense ``BATCH_SIZE x number of datasets`` float matrix
+BATCH_SIZE = 256
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    """
+    a about after all also an and any are as at be been but by can could data dataset datasets each
+    for from has have in into is it its more most no not of on or our over such than that the their
+    them then there these they this those through to under using was we were which while with within
+    """.split()
+)
+
+
+def tokenize(text):
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(unidecode.unidecode(text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS and not token.isdigit()
+    ]
+
+
+def expand_slices(starts, counts):
+    """Flat positions of the slices ``[start, start + count)``, concatenated, without a Python loop."""
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets
+
+
+class TfidfMatrix:
+    """
+    L2-normalised TF-IDF vectors of a set of documents, stored both row-major (CSR, one row per
+    dataset) and column-major (one column per term) so a batch of rows can be compared against
+    every dataset with a sparse product built from plain NumPy arrays.
+    """
+
+    def __init__(self, dataset_ids, indptr, indices, data, vocabulary_size):
+        self.dataset_ids = np.asarray(dataset_ids, dtype=np.int64)
+        self.positions = {int(dataset_id): position for position, dataset_id in enumerate(self.dataset_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+        rows = np.repeat(np.arange(len(self.dataset_ids)), np.diff(indptr))
+        order = np.argsort(indices, kind="stable")
+        self.column_rows = rows[order]
+        self.column_data = data[order]
+        self.column_ptr = np.concatenate(([0], np.cumsum(np.bincount(indices, minlength=vocabulary_size))))
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Build the matrix of ``{dataset_id: text}``; documents without any usable term are left out."""
+        vocabulary = {}
+        dataset_ids, indptr, indices, counts = [], [0], [], []
+        for dataset_id, text in sorted(documents.items()):
+            term_counts = Counter(tokenize(text))
+            if not term_counts:
+                continue
+            dataset_ids.append(dataset_id)
+            for term, count in term_counts.items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                counts.append(count)
+            indptr.append(len(indices))
+
+        indptr = np.asarray(indptr, dtype=np.int64)
+        indices = np.asarray(indices, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.float64)
+
+        # Sublinear term frequency and smoothed inverse document frequency
+        document_frequency = np.bincount(indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(dataset_ids)) / (1 + document_frequency)) + 1
+        data = (1 + np.log(counts)) * idf[indices] if len(counts) else counts
+
+        rows = np.repeat(np.arange(len(dataset_ids)), np.diff(indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data**2, minlength=len(dataset_ids)))
+        if len(data):
+            data = data / norms[rows]
+        return cls(dataset_ids, indptr, indices, data, len(vocabulary))
+
+    def __len__(self):
+        return len(self.dataset_ids)
+
+    def similarities(self, positions):
+        """Dense ``len(positions) x len(self)`` cosine similarities, with each row's own dataset at 0."""
+        positions = np.asarray(positions, dtype=np.int64)
+        row_counts = self.indptr[positions + 1] - self.indptr[positions]
+        entries = expand_slices(self.indptr[positions], row_counts)
+        batch_rows = np.repeat(np.arange(len(positions)), row_counts)
+        terms = self.indices[entries]
+
+        # Every (batch row, term) pair meets every dataset holding that term
+        column_counts = self.column_ptr[terms + 1] - self.column_ptr[terms]
+        matches = expand_slices(self.column_ptr[terms], column_counts)
+        cells = np.repeat(batch_rows, column_counts) * len(self) + self.column_rows[matches]
+        products = np.repeat(self.data[entries], column_counts) * self.column_data[matches]
+
+        scores = np.bincount(cells, weights=products, minlength=len(positions) * len(self))
+        scores = scores.reshape(len(positions), len(self))
+        scores[np.arange(len(positions)), positions] = 0.0
+        return scores
+
+    def iter_similarities(self, dataset_ids, batch_size=BATCH_SIZE):
+        """Yield ``(dataset_ids, similarities)`` for the given datasets, ``batch_size`` rows at a time."""
+        positions = [self.positions[dataset_id] for dataset_id in dataset_ids if dataset_id in self.positions]
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start : start + batch_size]
+            yield self.dataset_ids[batch].tolist(), self.similarities(batch)
+
+
+def top_neighbours(dataset_ids, scores, dataset_columns, limit=NEIGHBOURS_PER_DATASET, min_score=MIN_SIMILARITY):
+    """``{dataset_id: [(neighbour_id, score), ...]}`` with the best ``limit`` columns of each row of ``scores``."""
+    neighbours = {dataset_id: [] for dataset_id in dataset_ids}
+    limit = min(limit, scores.shape[1])
+    if limit <= 0:
+        return neighbours
+
+    best = np.argpartition(-scores, limit - 1, axis=1)[:, :limit]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best = np.take_along_axis(best, order, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+
+    for dataset_id, columns, row_scores in zip(dataset_ids, best, best_scores):
+        neighbours[dataset_id] = [
+            (int(dataset_columns[column]), float(score))
+            for column, score in zip(columns, row_scores)
+            if score >= min_score
+        ]
+    return neighbours
+
+
+def merge_neighbours(current, candidates, limit=NEIGHBOURS_PER_DATASET):
+    """Best ``limit`` of two ``[(neighbour_id, score)]`` lists, the candidates winning on duplicates."""
+    merged = dict(current)
+    merged.update(candidates)
+    return sorted(merged.items(), key=lambda item: (-item[1], item[0]))[:limit]
@@ -1,7 +1,7 @@
 import os
 import shutil
 import uuid
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from io import BytesIO
 
 import pytest
@@ -13,8 +13,9 @@ from app.modules.auth.services import AuthenticationService
 from app.modules.community.models import Community, CommunityDataSet, CommunityDataSetStatus
 from app.modules.conftest import login, logout
 from app.modules.dataset import repositories, services
-from app.modules.dataset.models import Author, DataSet, DSDownloadRecord, DSMetaData, PublicationType
+from app.modules.dataset.models import Author, DataSet, DSDailyStats, DSDownloadRecord, DSMetaData, PublicationType
 from app.modules.profile.models import UserProfile
+from core.managers.query_instrumentation_manager import record_queries
 
 TEST_FITS_GITHUB_REPO_USER = "egc-fitshub"
 TEST_FITS_GITHUB_REPO_NAME_WITH_FILES = "fits_test"
@@ -382,8 +383,9 @@ def sample_metadata(test_client):
         )
         db.session.add(ds_test_meta)
         db.session.commit()
+        db.session.refresh(ds_test_meta)
 
-        yield ds_test_meta
+    yield ds_test_meta
 
 
 def test_download_counter_exists(test_client, sample_metadata):
@@ -981,3 +983,571 @@ def test_recommendations_empty_when_no_candidates(test_client):
         recommendations = repo.recommended_datasets(ref_dataset.id, limit=10)
 
         assert len(recommendations) == 0, "Should return empty list when no valid candidates exist"
+
+
+def _create_recommendation_dataset(user, title, tags, doi=None, authors=()):
+    metadata = DSMetaData(
+        title=title,
+        description="Test",
+        publication_type=PublicationType.NONE,
+        dataset_doi=doi,
+        tags=tags,
+    )
+    db.session.add(metadata)
+    db.session.flush()
+    for name, orcid in authors:
+        db.session.add(Author(name=name, orcid=orcid, ds_meta_data_id=metadata.id))
+
+    dataset = DataSet(user_id=user.id, ds_meta_data_id=metadata.id)
+    db.session.add(dataset)
+    db.session.flush()
+    return dataset
+
+
+def _recommendation_features(dataset_id):
+    from app.modules.dataset.models import DataSetRecommendationFeature
+
+    rows = DataSetRecommendationFeature.query.filter_by(dataset_id=dataset_id).all()
+    return {(row.kind, row.value) for row in rows}
+
+
+def test_recommendation_features_are_normalized():
+    from app.modules.dataset.recommendations import dataset_features
+
+    features = dataset_features(
+        " Machine Learning,AI,, ai ",
+        [("José  Pérez", None), ("Jane Roe", " 0000-0001 "), ("", None)],
+        [4],
+    )
+
+    assert features == {
+        ("tag", "machine learning"),
+        ("tag", "ai"),
+        ("author", "name:jose perez"),
+        ("author", "orcid:0000-0001"),
+        ("community", "4"),
+    }
+
+
+def test_recommendation_index_follows_dataset_changes(test_client):
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        community = Community(name=f"Index Community {uuid.uuid4().hex[:8]}", description="Test")
+        db.session.add(community)
+        db.session.flush()
+
+        dataset = _create_recommendation_dataset(user, "Indexed", "Stars,Gas", authors=[("Vera Rubin", None)])
+        db.session.add(
+            CommunityDataSet(community_id=community.id, dataset_id=dataset.id, status=CommunityDataSetStatus.PENDING)
+        )
+        db.session.commit()
+
+        assert _recommendation_features(dataset.id) == {
+            ("tag", "stars"),
+            ("tag", "gas"),
+            ("author", "name:vera rubin"),
+        }
+
+        dataset.ds_meta_data.tags = "dust"
+        association = CommunityDataSet.query.filter_by(dataset_id=dataset.id).first()
+        association.status = CommunityDataSetStatus.ACCEPTED
+        db.session.commit()
+
+        assert _recommendation_features(dataset.id) == {
+            ("tag", "dust"),
+            ("author", "name:vera rubin"),
+            ("community", str(community.id)),
+        }
+
+        dataset_id = dataset.id
+        db.session.delete(dataset)
+        db.session.commit()
+
+        assert _recommendation_features(dataset_id) == set()
+
+
+def test_recommendations_break_ties_by_downloads(test_client):
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+
+        tag = f"tie-{uuid.uuid4().hex[:8]}"
+        reference = _create_recommendation_dataset(
+            user, "Tie reference", f"{tag},extra", authors=[("Edwin Hubble", "0000-0002-tie")]
+        )
+        quiet = _create_recommendation_dataset(user, "Quiet", tag, doi=f"10.1234/{tag}-quiet")
+        popular = _create_recommendation_dataset(user, "Popular", tag, doi=f"10.1234/{tag}-popular")
+        best = _create_recommendation_dataset(
+            user, "Best", tag, doi=f"10.1234/{tag}-best", authors=[("E. Hubble", "0000-0002-TIE")]
+        )
+        _create_recommendation_dataset(user, "Unsynchronized", tag)
+        now = datetime.now(timezone.utc)
+        for _ in range(2):
+            db.session.add(
+                DSDownloadRecord(
+                    dataset_id=popular.id, download_date=now - timedelta(days=2), download_cookie=str(uuid.uuid4())
+                )
+            )
+        # The last rolled-up day keeps its records, so the archived ones need a later day
+        db.session.add(
+            DSDownloadRecord(dataset_id=quiet.id, download_date=now - timedelta(days=1), download_cookie="later")
+        )
+        db.session.commit()
+
+        repo = repositories.DataSetRepository()
+
+        assert repo.recommended_dataset_ids(reference.id, limit=10) == [best.id, popular.id, quiet.id]
+        assert [dataset.id for dataset in repo.recommended_datasets(reference.id, limit=2)] == [best.id, popular.id]
+
+        # The downloads are still counted once rolled up and archived
+        stats_service = services.DSDailyStatsService()
+        stats_service.roll_up()
+        stats_service.archive_records(now.date())
+        assert DSDownloadRecord.query.filter_by(dataset_id=popular.id).count() == 0
+        assert repo.recommended_dataset_ids(reference.id, limit=10) == [best.id, popular.id, quiet.id]
+
+        # Later tests record downloads in the days rolled up here
+        DSDailyStats.query.delete()
+        db.session.commit()
+
+
+def test_recommendations_are_cached_until_the_index_changes(test_client, monkeypatch):
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+
+        tag = f"cache-{uuid.uuid4().hex[:8]}"
+        reference = _create_recommendation_dataset(user, "Cache reference", tag)
+        first = _create_recommendation_dataset(user, "First", tag, doi=f"10.1234/{tag}-1")
+        db.session.commit()
+
+        repo = repositories.DataSetRepository()
+        assert [dataset.id for dataset in repo.recommended_datasets(reference.id)] == [first.id]
+
+        # Downloads do not touch the index, so the cached list is served
+        db.session.add(DSDownloadRecord(dataset_id=first.id, download_cookie=str(uuid.uuid4())))
+        db.session.commit()
+        with monkeypatch.context() as patch:
+            patch.setattr(repo, "recommended_dataset_ids", lambda *args, **kwargs: pytest.fail("scored again"))
+            assert [dataset.id for dataset in repo.recommended_datasets(reference.id)] == [first.id]
+
+        second = _create_recommendation_dataset(user, "Second", tag, doi=f"10.1234/{tag}-2")
+        db.session.commit()
+
+        assert {dataset.id for dataset in repo.recommended_datasets(reference.id)} == {first.id, second.id}
+
+
+def test_daily_stats_roll_up_keeps_totals_and_trending(test_client):
+    from app.modules.dataset.models import DSViewRecord
+
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        dataset = _create_recommendation_dataset(user, "Rolled up", "stats", doi=f"10.1234/{uuid.uuid4().hex[:8]}")
+
+        now = datetime.now(timezone.utc)
+        for days_ago, cookie in [(3, "a"), (3, "b"), (3, "c"), (1, "d"), (0, "e")]:
+            db.session.add(
+                DSDownloadRecord(
+                    dataset_id=dataset.id, download_date=now - timedelta(days=days_ago), download_cookie=cookie
+                )
+            )
+        db.session.add(DSViewRecord(dataset_id=dataset.id, view_date=now - timedelta(days=2), view_cookie="a"))
+        db.session.commit()
+
+        service = services.DataSetService()
+        stats_service = services.DSDailyStatsService()
+        before = service.get_dataset_stats(dataset.id)
+        assert before["downloads"] == 5
+        assert before["views"] == 1
+
+        assert stats_service.roll_up() > 0
+        rows = {row.day: row for row in DSDailyStats.query.filter_by(dataset_id=dataset.id).all()}
+        assert rows[(now - timedelta(days=3)).date()].downloads == 3
+        assert rows[(now - timedelta(days=2)).date()].views == 1
+        assert now.date() not in rows
+
+        # Rolling up again is idempotent, and archived raw records keep counting through the roll-ups;
+        # the last rolled-up day is aggregated again, so its records are not archived
+        stats_service.roll_up()
+        stats_service.archive_records(now.date())
+        assert DSDownloadRecord.query.filter_by(dataset_id=dataset.id).count() == 2
+        assert service.get_dataset_stats(dataset.id)["downloads"] == 5
+
+        trending = dict(service.get_trending_datasets(limit=100, period_days=2))
+        assert trending[dataset] == 2
+
+        # Clients are recorded once per dataset, whether their record is archived or still live
+        records = services.DSDownloadRecordService()
+        for cookie, recorded in [("a", False), ("d", False), ("f", True)]:
+            assert (
+                records.create_if_absent(dataset_id=dataset.id, download_date=now, download_cookie=cookie) is recorded
+            )
+        assert service.get_dataset_stats(dataset.id)["downloads"] == 6
+
+
+def test_daily_stats_survive_roll_up_after_archiving(test_client):
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        dataset = _create_recommendation_dataset(user, "Archived", "stats", doi=f"10.1234/{uuid.uuid4().hex[:8]}")
+
+        yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+        for _ in range(3):
+            db.session.add(
+                DSDownloadRecord(dataset_id=dataset.id, download_date=yesterday, download_cookie=str(uuid.uuid4()))
+            )
+        db.session.commit()
+
+        # As run by stats:rollup --archive-days 0, twice in a row
+        stats_service = services.DSDailyStatsService()
+        for _ in range(2):
+            stats_service.roll_up()
+            stats_service.archive_records(datetime.now(timezone.utc).date())
+
+        row = DSDailyStats.query.filter_by(dataset_id=dataset.id, day=yesterday.date()).one()
+        assert row.downloads == 3
+        assert services.DataSetService().get_dataset_stats(dataset.id)["downloads"] == 3
+
+
+def test_tfidf_similarities_match_dense_cosine():
+    import numpy as np
+
+    from app.modules.dataset.similarity import TfidfMatrix, top_neighbours
+
+    matrix = TfidfMatrix.from_documents(
+        {
+            1: "Galaxy spectra from a deep survey",
+            2: "Deep field galaxy survey",
+            3: "Solar flares in X-ray",
+            4: "The data of the dataset",
+            5: "X-ray corona and solar flares",
+        }
+    )
+    # Stop words only: no vector at all
+    assert matrix.dataset_ids.tolist() == [1, 2, 3, 5]
+
+    dense = np.zeros((len(matrix), len(matrix.column_ptr) - 1))
+    dense[np.repeat(np.arange(len(matrix)), np.diff(matrix.indptr)), matrix.indices] = matrix.data
+    expected = dense @ dense.T
+    np.fill_diagonal(expected, 0)
+
+    batches = list(matrix.iter_similarities([5, 1, 2, 3], batch_size=3))
+    assert [ids for ids, _ in batches] == [[5, 1, 2], [3]]
+    scores = np.vstack([batch_scores for _, batch_scores in batches])
+    assert np.allclose(scores, expected[[3, 0, 1, 2]])
+
+    neighbours = top_neighbours([5, 1, 2, 3], scores, matrix.dataset_ids, limit=1)
+    assert [neighbour_id for neighbour_id, _ in neighbours[5]] == [3]
+    assert [neighbour_id for neighbour_id, _ in neighbours[1]] == [2]
+
+
+def test_text_neighbours_fill_recommendations_and_update_incrementally(test_client):
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+
+        word = f"nebula{uuid.uuid4().hex[:8]}"
+        reference = _create_recommendation_dataset(user, "Text reference", "", doi=f"10.1234/{word}-ref")
+        close = _create_recommendation_dataset(user, "Close", "", doi=f"10.1234/{word}-close")
+        reference.ds_meta_data.description = f"Photometry of the {word} emission lines"
+        close.ds_meta_data.description = f"Emission lines of the {word} photometry"
+        db.session.commit()
+
+        neighbour_service = services.DataSetNeighbourService()
+        neighbour_service.rebuild()
+        repo = repositories.DataSetRepository()
+
+        assert repo.recommended_dataset_ids(reference.id) == []
+        assert [dataset.id for dataset in repo.recommended_datasets(reference.id, limit=1)] == [close.id]
+
+        # A new dataset gets its own list and enters the lists it scores in, without a rebuild
+        newcomer = _create_recommendation_dataset(user, "Newcomer", "", doi=f"10.1234/{word}-new")
+        newcomer.ds_meta_data.description = f"Photometry of the {word} emission lines, again"
+        db.session.commit()
+
+        neighbour_repo = repositories.DataSetNeighbourRepository()
+        assert newcomer.id not in neighbour_repo.indexed_dataset_ids()
+        assert neighbour_service.update() >= 1
+
+        assert set(neighbour_repo.neighbour_ids(newcomer.id)[:2]) == {reference.id, close.id}
+        assert neighbour_repo.neighbour_ids(reference.id)[:2] == [close.id, newcomer.id]
+
+
+def test_co_downloads_are_counted_per_session():
+    from app.modules.dataset.codownloads import sessionize, top_co_downloads
+
+    day = 24 * 3600
+    # Visitor 0 downloads 1, 2 and 3 together; visitor 1 downloads 1 and 2, then 3 three days later
+    sessions, dataset_ids = sessionize(
+        visitors=[0, 0, 0, 1, 1, 1, 2, 2, 2],
+        timestamps=[0, 10, 20, 0, 5, 3 * day, 0, 1, 2],
+        dataset_ids=[1, 2, 3, 1, 2, 3, 1, 2, 2],
+    )
+    assert sessions.tolist() == [0, 0, 0, 1, 1, 2, 3, 3]
+
+    neighbours = top_co_downloads(sessions, dataset_ids, limit=1, min_co_downloads=1)
+    assert neighbours[1] == [(2, 1.0, 3)]
+    assert neighbours[3][0][0] == 1
+
+    assert top_co_downloads(sessions, dataset_ids, min_co_downloads=2) == {1: [(2, 1.0, 3)], 2: [(1, 1.0, 3)]}
+
+
+def test_also_downloaded_datasets_come_from_download_sessions(test_client):
+    with test_client.application.app_context():
+        user = User(email=f"test_{uuid.uuid4().hex[:8]}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+
+        tag = f"codownload-{uuid.uuid4().hex[:8]}"
+        first = _create_recommendation_dataset(user, "First", tag, doi=f"10.1234/{tag}-1")
+        second = _create_recommendation_dataset(user, "Second", tag, doi=f"10.1234/{tag}-2")
+        unsynchronized = _create_recommendation_dataset(user, "Unsynchronized", tag)
+        now = datetime.now(timezone.utc)
+        # The last rolled-up day keeps its records, so the archived ones need a later day
+        for cookie, download_date in ((f"{tag}-a", now - timedelta(days=3)), (f"{tag}-b", now - timedelta(days=1))):
+            for dataset in (first, second, unsynchronized):
+                db.session.add(
+                    DSDownloadRecord(dataset_id=dataset.id, download_date=download_date, download_cookie=cookie)
+                )
+        db.session.commit()
+
+        # The sessions of archived download records still count
+        stats_service = services.DSDailyStatsService()
+        stats_service.roll_up()
+        stats_service.archive_records(now.date())
+        assert DSDownloadRecord.query.filter_by(download_cookie=f"{tag}-a").count() == 0
+        # Later tests record downloads in the days rolled up here
+        DSDailyStats.query.delete()
+        db.session.commit()
+
+        assert services.DataSetCoDownloadService().rebuild() >= 3
+
+        service = services.DataSetService()
+        assert service.also_downloaded_datasets(first.id) == [second]
+        assert service.also_downloaded_datasets(unsynchronized.id) == [first, second]
+
+
+def _create_dataset_with_files(user, prefix, files):
+    from app.modules.fitsmodel.models import FitsModel
+    from app.modules.hubfile.models import Hubfile
+
+    dataset = _create_recommendation_dataset(
+        user, f"{prefix} dataset", prefix, doi=f"10.1234/{prefix}", authors=[("Author", None), ("Other", None)]
+    )
+    for index in range(files):
+        fits_model = FitsModel(data_set_id=dataset.id)
+        db.session.add(fits_model)
+        db.session.flush()
+        db.session.add(Hubfile(name=f"{prefix}_{index}.fits", checksum="x", size=1024, fits_model_id=fits_model.id))
+    db.session.commit()
+    return dataset
+
+
+def test_dataset_pages_use_a_fixed_number_of_queries(test_client):
+    prefix = f"profile-{uuid.uuid4().hex[:8]}"
+    with test_client.application.app_context():
+        # Two uploaders with two and four datasets, all created before the first request
+        for owner, datasets in (("short", 2), ("long", 4)):
+            user = User(email=f"{prefix}-{owner}@example.com", password="password")
+            user.profile = UserProfile(name="Query", surname="Counter")
+            db.session.add(user)
+            db.session.commit()
+            for index in range(datasets):
+                _create_dataset_with_files(user, f"{prefix}-{owner}-{index}", files=1 + 3 * index)
+        small_doi, large_doi = f"10.1234/{prefix}-short-0", f"10.1234/{prefix}-short-1"
+
+    def list_queries(owner):
+        login(test_client, f"{prefix}-{owner}@example.com", "password")
+        try:
+            with record_queries() as stats:
+                assert test_client.get("/dataset/list").status_code == 200
+            return stats.count
+        finally:
+            logout(test_client)
+
+    # Same number of queries whatever the number of files on the dataset page
+    login(test_client, f"{prefix}-short@example.com", "password")
+    try:
+        test_client.get(f"/doi/{small_doi}/")
+        test_client.get(f"/doi/{large_doi}/")
+        with record_queries() as small_page:
+            assert test_client.get(f"/doi/{small_doi}/").status_code == 200
+        with record_queries() as large_page:
+            assert test_client.get(f"/doi/{large_doi}/").status_code == 200
+        assert large_page.count == small_page.count
+    finally:
+        logout(test_client)
+
+    # ... and whatever the number of datasets on the list page
+    assert list_queries("long") == list_queries("short")
+
+
+def test_dataset_to_dict_reads_nothing_after_the_api_profile(test_client):
+    prefix = f"todict-{uuid.uuid4().hex[:8]}"
+    with test_client.application.test_request_context():
+        user = User(email=f"{prefix}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        dataset = _create_dataset_with_files(user, prefix, files=3)
+        community = Community(name=f"{prefix} community", description="Accepted")
+        db.session.add(community)
+        db.session.flush()
+        db.session.add(
+            CommunityDataSet(community_id=community.id, dataset_id=dataset.id, status=CommunityDataSetStatus.ACCEPTED)
+        )
+        db.session.commit()
+        dataset_id = dataset.id
+        db.session.expunge_all()
+
+        dataset = repositories.DataSetRepository().with_profile("api").filter(DataSet.id == dataset_id).one()
+        with record_queries() as counter:
+            data = dataset.to_dict()
+
+        assert counter.count == 0
+        assert data["files_count"] == 3
+        assert data["total_size_in_bytes"] == 3 * 1024
+        assert data["total_size_in_human_format"] == "3.0 KB"
+        assert [community["name"] for community in data["communities"]] == [f"{prefix} community"]
+
+
+def test_dataset_file_aggregates_follow_file_changes(test_client):
+    from app.modules.explore.repositories import ExploreRepository
+    from app.modules.hubfile.models import Hubfile
+
+    prefix = f"aggregates-{uuid.uuid4().hex[:8]}"
+    with test_client.application.app_context():
+        user = User(email=f"{prefix}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        small = _create_dataset_with_files(user, f"{prefix}-small", files=1)
+        large = _create_dataset_with_files(user, f"{prefix}-large", files=3)
+        assert (large.files_count, large.total_size_in_bytes) == (3, 3 * 1024)
+
+        # The size of a community that accepted the dataset moves by the same amounts
+        community = Community(name=f"{prefix}-community", description="Sized by its datasets")
+        db.session.add(community)
+        db.session.flush()
+        db.session.add(
+            CommunityDataSet(community_id=community.id, dataset_id=small.id, status=CommunityDataSetStatus.ACCEPTED)
+        )
+        db.session.flush()
+        assert community.total_size_in_bytes == 1024
+
+        # Adding, resizing, moving and removing files keeps both datasets' columns in step
+        fits_model = small.fits_models[0]
+        db.session.add(Hubfile(name="extra.fits", checksum="x", size=4096, fits_model_id=fits_model.id))
+        db.session.flush()
+        assert (small.files_count, small.total_size_in_bytes) == (2, 1024 + 4096)
+        assert community.total_size_in_bytes == 1024 + 4096
+
+        moved = large.fits_models[0].files[0]
+        moved.fits_model_id = fits_model.id
+        moved.size = 2048
+        db.session.flush()
+        assert (small.files_count, small.total_size_in_bytes) == (3, 1024 + 4096 + 2048)
+        assert community.total_size_in_bytes == 1024 + 4096 + 2048
+        assert (large.files_count, large.total_size_in_bytes) == (2, 2 * 1024)
+
+        db.session.delete(large.fits_models[1])
+        db.session.commit()
+        assert (large.files_count, large.total_size_in_bytes) == (1, 1024)
+        assert large.get_file_total_size_for_human() == "1.0 KB"
+
+        # Sorting by size reads the column
+        ranked = [dataset.id for dataset in ExploreRepository().filter(query=prefix, sorting="largest")]
+        assert ranked == [small.id, large.id]
+
+
+def test_dataset_api_pages_with_next_links(test_client):
+    prefix = f"keyset-{uuid.uuid4().hex[:8]}"
+    with test_client.application.app_context():
+        user = User(email=f"{prefix}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        created = [_create_dataset_with_files(user, f"{prefix}-{index}", files=1).id for index in range(3)]
+
+    response = test_client.get("/api/v1/datasets/", query_string={"limit": 2})
+    assert response.status_code == 200
+    first_page = response.get_json()
+    assert [item["dataset_id"] for item in first_page["items"]] == created[::-1][:2]
+
+    seen = [item["dataset_id"] for item in first_page["items"]]
+    next_url = first_page["next"]
+    while next_url:
+        page = test_client.get(next_url).get_json()
+        assert len(page["items"]) <= 2
+        seen.extend(item["dataset_id"] for item in page["items"])
+        next_url = page["next"]
+    assert len(seen) == len(set(seen))
+    assert set(created) <= set(seen)
+
+    assert test_client.get("/api/v1/datasets/", query_string={"cursor": "garbage"}).status_code == 400
+
+
+def test_dataset_api_serializes_sparse_fieldsets_with_batch_prefetch(test_client):
+    prefix = f"fields-{uuid.uuid4().hex[:8]}"
+    with test_client.application.app_context():
+        user = User(email=f"{prefix}@example.com", password="password")
+        db.session.add(user)
+        db.session.flush()
+        dataset_id = _create_dataset_with_files(user, prefix, files=2).id
+
+    response = test_client.get(f"/api/v1/datasets/{dataset_id}", query_string={"fields": "dataset_id,name"})
+    assert response.status_code == 200
+    assert response.get_json() == {"dataset_id": dataset_id, "name": f"{prefix} dataset"}
+
+    item = test_client.get(f"/api/v1/datasets/{dataset_id}").get_json()
+    assert [file["file_name"] for file in item["files"]] == [f"{prefix}_0.fits", f"{prefix}_1.fits"]
+    assert test_client.get("/api/v1/datasets/", query_string={"fields": "dataset_id,nope"}).status_code == 400
+
+    # The files of a whole page load in a fixed number of queries, and not at all when not asked for
+    test_client.get("/api/v1/datasets/", query_string={"limit": 1})
+    with record_queries() as one:
+        test_client.get("/api/v1/datasets/", query_string={"limit": 1})
+    with record_queries() as many:
+        test_client.get("/api/v1/datasets/", query_string={"limit": 50})
+    with record_queries() as sparse:
+        test_client.get("/api/v1/datasets/", query_string={"limit": 50, "fields": "dataset_id,download_counter"})
+    assert many.count == one.count
+    assert sparse.count < many.count
+
+
+def test_json_provider_round_trips_and_rejects_malformed_bodies(test_client, monkeypatch):
+    from core.serialisers.json_provider import MsgspecJSONProvider
+
+    app = test_client.application
+    assert isinstance(app.json, MsgspecJSONProvider)
+    assert app.json.loads(app.json.dumps({"b": 1, "a": [1.5, "ñ", None]})) == {"a": [1.5, "ñ", None], "b": 1}
+    assert app.json.dumps({"b": 1, "a": 2}) == '{"a":2,"b":1}'
+
+    # Dates are ISO 8601, whether msgspec or the standard library fallback encodes them
+    payload = {"at": [datetime(2024, 1, 2, 3, 4, 5), date(2024, 1, 2)]}
+    expected = {"at": ["2024-01-02T03:04:05", "2024-01-02"]}
+    assert app.json.loads(app.json.dumps(payload)) == expected
+    assert app.json.loads(app.json.dumps(payload, indent=2)) == expected
+
+    # The payload goes to msgspec as is, without a Python-level copy first
+    encoder = app.json._encoder()
+    received = []
+
+    class SpyEncoder:
+        def encode(self, obj):
+            received.append(obj)
+            return encoder.encode(obj)
+
+    monkeypatch.setattr(app.json, "_encoder", SpyEncoder)
+    app.json.dumps(payload)
+    with app.app_context():
+        app.json.response(payload)
+    assert len(received) == 2 and all(obj is payload for obj in received)
+
+    response = test_client.post("/api/v1/datasets/", data="{not json", content_type="application/json")
+    assert response.status_code == 400
@@ -1,3 +1,11 @@
+from app.modules.elasticsearch.outbox import register_outbox_listeners
+from app.modules.elasticsearch.services import release_search_connections
 from core.blueprints.base_blueprint import BaseBlueprint
 
 elasticsearch_bp = BaseBlueprint("elasticsearch", __name__, template_folder="templates")
+
+# Search index changes are queued in the same transaction as the data they come from
+register_outbox_listeners()
+
+# The SQLite search backend lives as long as the app; each context hands its connection back when it ends
+elasticsearch_bp.record_once(lambda state: state.app.teardown_appcontext(release_search_connections))
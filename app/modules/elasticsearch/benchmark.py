@@ -0,0 +1,301 @@
+import contextlib
+import io
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from app.modules.dataset.models import PublicationType
+from app.modules.elasticsearch.utils import _suggest_entries
+
+BULK_CHUNK_SIZE = 500
+RESULT_PAGE_SIZE = 10
+
+VOCABULARY = [
+    "galaxy",
+    "nebula",
+    "quasar",
+    "pulsar",
+    "supernova",
+    "cluster",
+    "spectra",
+    "photometry",
+    "redshift",
+    "exoplanet",
+    "transit",
+    "cepheid",
+    "binary",
+    "dwarf",
+    "halo",
+    "lensing",
+    "infrared",
+    "ultraviolet",
+    "radio",
+    "xray",
+    "survey",
+    "catalogue",
+    "calibration",
+    "deep",
+    "field",
+    "stellar",
+    "cosmic",
+    "dust",
+    "emission",
+    "absorption",
+    "magnetar",
+    "accretion",
+    "jet",
+    "outflow",
+    "merger",
+    "bulge",
+    "disk",
+    "variability",
+    "asteroid",
+    "comet",
+    "meteor",
+    "solar",
+    "corona",
+    "flare",
+    "wind",
+    "plasma",
+]
+FIRST_NAMES = ["Ana", "Luis", "Vera", "Henrietta", "Carl", "Jocelyn", "Edwin", "Cecilia", "Subrahmanyan", "Maria"]
+LAST_NAMES = ["Pérez", "Gómez", "Rubin", "Leavitt", "Sagan", "Bell", "Hubble", "Payne", "Chandrasekhar", "Mitchell"]
+AFFILIATIONS = ["Universidad de Sevilla", "IAC", "ESO", "MPIA", "Caltech", "CfA", "NAOJ"]
+PUBLICATION_TYPES = [member.value for member in PublicationType if member != PublicationType.NONE]
+
+
+class SyntheticCorpus:
+    """
+    Reproducible corpus of dataset and hubfile documents, shaped like the ones built by
+    ``build_dataset_document``/``build_hubfile_document``. The same seed always yields the same corpus.
+    """
+
+    def __init__(self, datasets=1000, seed=42, communities=10, start=datetime(2020, 1, 1)):
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.datasets = []
+        self.hubfiles = []
+
+        author_pool = [
+            {"name": f"{first} {last}", "affiliation": self.random.choice(AFFILIATIONS), "orcid": None}
+            for first in FIRST_NAMES
+            for last in LAST_NAMES
+        ]
+        tag_pool = VOCABULARY[:20]
+
+        hubfile_id = 1
+        for dataset_id in range(1, datasets + 1):
+            title_words = self.random.sample(VOCABULARY, self.random.randint(3, 5))
+            description_words = [self.random.choice(VOCABULARY) for _ in range(self.random.randint(10, 20))]
+            authors = self.random.sample(author_pool, self.random.randint(1, 4))
+            tags = self.random.sample(tag_pool, self.random.randint(1, 3))
+            community_ids = self.random.sample(range(1, communities + 1), self.random.randint(0, 2))
+            created_at = start + timedelta(minutes=self.random.randint(0, 60 * 24 * 365 * 5))
+            title = " ".join(word.capitalize() for word in title_words)
+
+            files = []
+            for _ in range(self.random.randint(1, 5)):
+                filename = f"{self.random.choice(title_words)}_{hubfile_id:06d}.fits"
+                files.append(
+                    {
+                        "type": "hubfile",
+                        "id": hubfile_id,
+                        "filename": filename,
+                        "content": filename,
+                        "dataset_id": dataset_id,
+                        "community_ids": community_ids,
+                        "dataset_title": title,
+                        "size_in_bytes": self.random.randint(1024, 2 * 1024**3),
+                        "suggest": _suggest_entries(([filename], 3)),
+                    }
+                )
+                hubfile_id += 1
+
+            description = " ".join(description_words)
+            author_names = [author["name"] for author in authors]
+            self.datasets.append(
+                {
+                    "type": "dataset",
+                    "id": dataset_id,
+                    "title": title,
+                    "description": description,
+                    "dataset_doi": f"10.1234/benchmark.{dataset_id}",
+                    "authors": authors,
+                    "tags": tags,
+                    "publication_type": self.random.choice(PUBLICATION_TYPES),
+                    "community_ids": community_ids,
+                    "content": f"{title} {description} {' '.join(author_names)}",
+                    "created_at": created_at.isoformat(),
+                    "total_size_in_bytes": sum(file["size_in_bytes"] for file in files),
+                    "files_count": len(files),
+                    "suggest": _suggest_entries(([title], 10), (tags, 6), (author_names, 4)),
+                }
+            )
+            self.hubfiles.extend(files)
+
+    def actions(self):
+        for document in self.datasets:
+            yield {"_op_type": "index", "_id": f"dataset-{document['id']}", "_source": document}
+        for document in self.hubfiles:
+            yield {"_op_type": "index", "_id": f"hubfile-{document['id']}", "_source": document}
+
+    def query_mix(self, queries_per_category=50):
+        """
+        Queries grouped by category. Text queries built from a dataset carry its id as ``expected``
+        so ranking quality (reciprocal rank) can be measured along with latency.
+        """
+        rng = random.Random(self.seed + 1)
+        mix = {category: [] for category in QUERY_CATEGORIES}
+
+        for _ in range(queries_per_category):
+            dataset = rng.choice(self.datasets)
+            title_words = dataset["title"].lower().split()
+
+            mix["empty"].append({"query": ""})
+            mix["single_term"].append({"query": rng.choice(VOCABULARY)})
+            mix["multi_term"].append(
+                {"query": " ".join(title_words), "sorting": "relevance", "expected": dataset["id"]}
+            )
+            mix["typo"].append(
+                {
+                    "query": " ".join(_typo(word, rng) for word in title_words),
+                    "sorting": "relevance",
+                    "expected": dataset["id"],
+                }
+            )
+            mix["author"].append(
+                {"query": rng.choice(dataset["authors"])["name"], "sorting": "relevance", "expected": dataset["id"]}
+            )
+            mix["filtered"].append(
+                {
+                    "query": rng.choice(title_words),
+                    "publication_type": dataset["publication_type"],
+                    "tags": [rng.choice(dataset["tags"])],
+                    "date_from": "2021-01-01",
+                    "date_to": "2023-12-31",
+                }
+            )
+            mix["deep_page"].append({"query": "", "page": rng.randint(20, 50)})
+
+        return mix
+
+
+QUERY_CATEGORIES = ["empty", "single_term", "multi_term", "typo", "author", "filtered", "deep_page"]
+
+
+def _typo(word, rng):
+    """Drop one inner character, the kind of mistake ``fuzziness: AUTO`` is meant to absorb."""
+    if len(word) < 5:
+        return word
+    position = rng.randint(1, len(word) - 2)
+    return word[:position] + word[position + 1 :]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of ``values`` (p in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _summary(values):
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None}
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "mean": round(sum(values) / len(values), 3),
+    }
+
+
+def load_corpus(backend, corpus, chunk_size=BULK_CHUNK_SIZE):
+    """Bulk-load the corpus and return how long it took."""
+    actions = list(corpus.actions())
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset in range(0, len(actions), chunk_size):
+            backend.bulk(actions[offset : offset + chunk_size])
+
+    # Elasticsearch only exposes the documents after a refresh
+    es = getattr(backend, "es", None)
+    if es is not None:
+        es.indices.refresh(index=backend.index_name)
+    seconds = time.perf_counter() - started
+
+    return {
+        "documents": len(actions),
+        "seconds": round(seconds, 3),
+        "documents_per_second": round(len(actions) / seconds, 1) if seconds else None,
+    }
+
+
+def run_queries(backend, query_mix, repeat=1, warmup=5):
+    """Replay the query mix and report client latency, engine ``took`` and ranking quality per category."""
+    report = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for params in query_mix.get("single_term", [])[:warmup]:
+            backend.search(**params)
+
+        for category, queries in query_mix.items():
+            latencies, tooks, reciprocal_ranks = [], [], []
+            for _ in range(repeat):
+                for query in queries:
+                    params = {key: value for key, value in query.items() if key != "expected"}
+                    params.setdefault("size", RESULT_PAGE_SIZE)
+
+                    backend.last_took = None
+                    started = time.perf_counter()
+                    results, _ = backend.search(**params)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    if backend.last_took is not None:
+                        tooks.append(backend.last_took)
+
+                    if "expected" in query:
+                        ids = [hit.get("id") for hit in results if hit.get("type") == "dataset"]
+                        rank = ids.index(query["expected"]) + 1 if query["expected"] in ids else None
+                        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+            report[category] = {
+                "queries": len(latencies),
+                "latency_ms": _summary(latencies),
+                "took_ms": _summary(tooks),
+            }
+            if reciprocal_ranks:
+                report[category]["relevance"] = {
+                    "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4),
+                    f"hit_at_{RESULT_PAGE_SIZE}": round(
+                        sum(1 for rr in reciprocal_ranks if rr) / len(reciprocal_ranks), 4
+                    ),
+                }
+
+    return report
+
+
+def run_benchmark(backend, backend_name, datasets=1000, seed=42, queries_per_category=50, repeat=1):
+    corpus = SyntheticCorpus(datasets=datasets, seed=seed)
+    load = load_corpus(backend, corpus)
+    queries = run_queries(backend, corpus.query_mix(queries_per_category), repeat=repeat)
+
+    return {
+        "backend": backend_name,
+        "generated_at": datetime.utcnow().isoformat(),
+        "corpus": {"seed": seed, "datasets": len(corpus.datasets), "hubfiles": len(corpus.hubfiles)},
+        "load": load,
+        "queries": queries,
+    }
+
+
+def compare_reports(baseline, current):
+    """Relative change of the p95 latency per category, e.g. ``{"typo": 0.12}`` for 12% slower."""
+    changes = {}
+    for category, stats in current.get("queries", {}).items():
+        before = baseline.get("queries", {}).get(category, {}).get("latency_ms", {}).get("p95")
+        after = stats["latency_ms"]["p95"]
+        if before and after is not None:
+            changes[category] = round((after - before) / before, 4)
+    return changes
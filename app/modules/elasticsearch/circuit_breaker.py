@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+
+from elasticsearch import ConnectionError
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without contacting Elasticsearch while the circuit breaker is open."""
+
+    def __init__(self, retry_in):
+        super().__init__(f"Elasticsearch circuit breaker is open, retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker shared by every Elasticsearch call.
+
+    After ``failure_threshold`` consecutive connection failures the circuit opens and calls fail
+    immediately for ``reset_timeout`` seconds. The next call is then let through as a trial
+    (half-open): a success closes the circuit again, a failure reopens it.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30, on_close=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_close = on_close
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._state = CLOSED
+        self.failure_count = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def before_call(self):
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            # Only one trial call at a time while half-open; everyone else keeps failing fast
+            if state == HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return
+            retry_in = max(self.reset_timeout - (self.clock() - self.opened_at), 0)
+        raise CircuitOpenError(retry_in)
+
+    def record_success(self):
+        with self._lock:
+            was_closed = self._state == CLOSED
+            self.reset()
+        if not was_closed:
+            logger.info("[SEARCH] Elasticsearch circuit breaker closed")
+            if self.on_close:
+                self.on_close()
+
+    def record_failure(self):
+        with self._lock:
+            self.failure_count += 1
+            self._trial_in_progress = False
+            if self._state == OPEN or self.failure_count >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(
+                        "[SEARCH] Elasticsearch circuit breaker opened after %s failures", self.failure_count
+                    )
+                self._state = OPEN
+                self.opened_at = self.clock()
+
+    def call(self, func, *args, failure_exceptions=(ConnectionError,), **kwargs):
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except failure_exceptions:
+            self.record_failure()
+            raise
+        except Exception:
+            # Any other error means Elasticsearch answered, so the connection itself is healthy
+            self.record_success()
+            raise
+        finally:
+            # Never leave the half-open trial claimed, whatever interrupted the call
+            with self._lock:
+                self._trial_in_progress = False
+        self.record_success()
+        return result
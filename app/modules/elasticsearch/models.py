@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from app import db
 
 
@@ -6,3 +8,21 @@ class Elasticsearch(db.Model):
 
     def __repr__(self):
         return f"Elasticsearch<{self.id}>"
+
+
+class SearchIndexOutbox(db.Model):
+    """
+    Pending search index change for a dataset, written in the same transaction as the change itself.
+    There is no foreign key on dataset_id so deletions can still be propagated to the index.
+    ``partial_fields`` lists the document fields to patch in place; NULL means a full reindex.
+    """
+
+    __tablename__ = "search_index_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_id = db.Column(db.Integer, nullable=False, index=True)
+    partial_fields = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"SearchIndexOutbox<{self.id}> dataset={self.dataset_id}"
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from app.modules.elasticsearch.models import SearchIndexOutbox
+
+logger = logging.getLogger(__name__)
+
+# Columns that are not part of any search document (e.g. bumped on every download)
+UNINDEXED_ATTRIBUTES = {"download_counter"}
+# Metadata columns whose edits are applied as partial document updates
+PARTIAL_METADATA_FIELDS = {"title", "tags"}
+
+_PENDING_KEY = "search_index_outbox_pending"
+
+outbox_signal = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def register_outbox_listeners():
+    if event.contains(Session, "after_flush", record_outbox_entries):
+        return
+    event.listen(Session, "after_flush", record_outbox_entries)
+    event.listen(Session, "after_commit", notify_outbox_worker)
+    event.listen(Session, "after_rollback", discard_outbox_notification)
+
+
+def _changed_attributes(instance):
+    return {
+        attr.key
+        for attr in inspect(instance).attrs
+        if attr.history.has_changes() and attr.key not in UNINDEXED_ATTRIBUTES
+    }
+
+
+def _merge_change(changes, key, fields):
+    """Accumulate the fields to patch for ``key``; ``None`` (full reindex) wins over any partial update."""
+    if key is None:
+        return
+    if fields is None or (key in changes and changes[key] is None):
+        changes[key] = None
+    else:
+        changes.setdefault(key, set()).update(fields)
+
+
+def _changed_datasets(session):
+    """
+    Datasets touched by the flush, mapped to the set of document fields that can be patched in
+    place, or to ``None`` when the dataset documents must be rebuilt.
+    """
+    from app.modules.community.models import CommunityDataSet
+    from app.modules.dataset.models import Author, DataSet, DSMetaData
+    from app.modules.fitsmodel.models import FitsModel
+    from app.modules.hubfile.models import Hubfile
+
+    dataset_changes = {}
+    ds_meta_data_changes = {}
+    fits_model_ids = set()
+
+    tracked = (DataSet, DSMetaData, Author, Hubfile, CommunityDataSet)
+    # New and deleted instances always rebuild; dirty ones carry the attributes that changed
+    changes = [
+        (instance, None) for instance in list(session.new) + list(session.deleted) if isinstance(instance, tracked)
+    ]
+    for instance in session.dirty:
+        if isinstance(instance, tracked):
+            changed = _changed_attributes(instance)
+            if changed:
+                changes.append((instance, changed))
+
+    for instance, changed in changes:
+        if isinstance(instance, DataSet):
+            _merge_change(dataset_changes, instance.id, None)
+        elif isinstance(instance, DSMetaData):
+            # Title and tag edits only patch the documents; anything else rebuilds them
+            partial = changed if changed is not None and changed <= PARTIAL_METADATA_FIELDS else None
+            _merge_change(ds_meta_data_changes, instance.id, partial)
+        elif isinstance(instance, Author):
+            _merge_change(ds_meta_data_changes, instance.ds_meta_data_id, None)
+        elif isinstance(instance, Hubfile):
+            if instance.fits_model_id is not None:
+                fits_model_ids.add(instance.fits_model_id)
+        elif isinstance(instance, CommunityDataSet):
+            _merge_change(dataset_changes, instance.dataset_id, {"community_ids"})
+
+    # Resolve the owning datasets with plain queries; relationships are not lazy loaded mid-flush
+    connection = session.connection()
+    if ds_meta_data_changes:
+        rows = connection.execute(
+            select(DataSet.id, DataSet.ds_meta_data_id).where(DataSet.ds_meta_data_id.in_(ds_meta_data_changes))
+        )
+        for dataset_id, ds_meta_data_id in rows:
+            _merge_change(dataset_changes, dataset_id, ds_meta_data_changes[ds_meta_data_id])
+    if fits_model_ids:
+        rows = connection.execute(select(FitsModel.data_set_id).where(FitsModel.id.in_(fits_model_ids))).scalars()
+        for dataset_id in rows:
+            _merge_change(dataset_changes, dataset_id, None)
+
+    return dataset_changes
+
+
+def record_outbox_entries(session, flush_context):
+    dataset_changes = _changed_datasets(session)
+    if not dataset_changes:
+        return
+
+    session.connection().execute(
+        insert(SearchIndexOutbox.__table__),
+        [
+            {
+                "dataset_id": dataset_id,
+                "partial_fields": ",".join(sorted(fields)) if fields is not None else None,
+            }
+            for dataset_id, fields in sorted(dataset_changes.items())
+        ],
+    )
+    session.info[_PENDING_KEY] = True
+
+
+def notify_outbox_worker(session):
+    if not session.info.pop(_PENDING_KEY, False):
+        return
+    ensure_outbox_worker()
+    outbox_signal.set()
+
+
+def discard_outbox_notification(session):
+    # The outbox rows were rolled back together with the change itself
+    session.info.pop(_PENDING_KEY, None)
+
+
+def ensure_outbox_worker():
+    global _worker
+
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return
+
+    if not app.config.get("SEARCH_OUTBOX_WORKER_ENABLED", False):
+        return
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = SearchIndexOutboxWorker(
+                app,
+                debounce_seconds=app.config.get("SEARCH_OUTBOX_DEBOUNCE_SECONDS", 2),
+                batch_size=app.config.get("SEARCH_OUTBOX_BATCH_SIZE", 100),
+                poll_interval=app.config.get("SEARCH_OUTBOX_POLL_SECONDS", 30),
+            )
+            _worker.start()
+
+
+class SearchIndexOutboxWorker(threading.Thread):
+    """
+    Background thread that drains the search index outbox. It wakes up on every commit that
+    queued entries, waits for the burst of edits to settle and then reindexes in bulk. It also
+    polls periodically so entries left behind while Elasticsearch was down are replayed.
+    """
+
+    def __init__(self, app, debounce_seconds=2, batch_size=100, poll_interval=30):
+        super().__init__(name="search-index-outbox", daemon=True)
+        self.app = app
+        self.debounce_seconds = debounce_seconds
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def run(self):
+        from app import db
+        from app.modules.elasticsearch.services import SearchIndexOutboxService
+
+        while True:
+            outbox_signal.wait(timeout=self.poll_interval)
+            outbox_signal.clear()
+            time.sleep(self.debounce_seconds)
+
+            with self.app.app_context():
+                try:
+                    processed = SearchIndexOutboxService().drain_all(
+                        debounce_seconds=self.debounce_seconds, batch_size=self.batch_size
+                    )
+                    if processed:
+                        logger.info("[INDEX OUTBOX] %s dataset(s) reindexed", processed)
+                except Exception as exc:
+                    logger.warning("[INDEX OUTBOX] Drain failed, entries kept for retry: %s", exc)
+                finally:
+                    db.session.remove()
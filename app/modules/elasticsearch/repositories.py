@@ -1,7 +1,61 @@
-from app.modules.elasticsearch.models import Elasticsearch
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from app.modules.elasticsearch.models import Elasticsearch, SearchIndexOutbox
 from core.repositories.BaseRepository import BaseRepository
 
 
 class ElasticsearchRepository(BaseRepository):
     def __init__(self):
         super().__init__(Elasticsearch)
+
+
+class SearchIndexOutboxRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(SearchIndexOutbox)
+
+    def get_settled_batch(self, settled_before, limit: int) -> List[Tuple[int, int]]:
+        """
+        Datasets whose most recent outbox entry is older than ``settled_before``, as
+        ``(dataset_id, max_entry_id)`` pairs. Several entries for one dataset collapse into one.
+        """
+        return (
+            self.session.query(self.model.dataset_id, func.max(self.model.id))
+            .group_by(self.model.dataset_id)
+            .having(func.max(self.model.created_at) <= settled_before)
+            .order_by(func.min(self.model.id))
+            .limit(limit)
+            .all()
+        )
+
+    def get_pending_fields(self, dataset_ids, max_entry_id: int) -> Dict[int, Optional[Set[str]]]:
+        """
+        Fields to patch for each dataset of a batch, merged over all its pending entries.
+        ``None`` means at least one entry asked for a full reindex.
+        """
+        pending = {}
+        rows = (
+            self.session.query(self.model.dataset_id, self.model.partial_fields)
+            .filter(self.model.dataset_id.in_(dataset_ids), self.model.id <= max_entry_id)
+            .all()
+        )
+        for dataset_id, partial_fields in rows:
+            if partial_fields is None or (dataset_id in pending and pending[dataset_id] is None):
+                pending[dataset_id] = None
+            else:
+                pending.setdefault(dataset_id, set()).update(partial_fields.split(","))
+        return pending
+
+    def delete_processed(self, dataset_ids, max_entry_id: int) -> int:
+        # Entries added after the batch was read have a higher id and are kept for the next drain
+        deleted = (
+            self.session.query(self.model)
+            .filter(self.model.dataset_id.in_(dataset_ids), self.model.id <= max_entry_id)
+            .delete(synchronize_session=False)
+        )
+        self.session.commit()
+        return deleted
+
+    def count_pending(self) -> int:
+        return self.session.query(func.count(self.model.id)).scalar() or 0
@@ -1,20 +1,306 @@
+import re
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from elasticsearch import (
     ApiError,
     BadRequestError,
     ConnectionError,
+    ConnectionTimeout,
     Elasticsearch,
     NotFoundError,
+    helpers,
 )
 from flask import current_app
 
-from app.modules.elasticsearch.repositories import ElasticsearchRepository
+from app.modules.elasticsearch.circuit_breaker import CircuitBreaker
+from app.modules.elasticsearch.repositories import ElasticsearchRepository, SearchIndexOutboxRepository
 from core.services.BaseService import BaseService
 
+FACET_PUBLICATION_TYPES_SIZE = 25
+FACET_TAGS_SIZE = 20
+FACET_COMMUNITIES_SIZE = 50
+FACET_SIZE_RANGES = [
+    {"key": "< 1 MB", "to": 1024**2},
+    {"key": "1 MB - 10 MB", "from": 1024**2, "to": 10 * 1024**2},
+    {"key": "10 MB - 100 MB", "from": 10 * 1024**2, "to": 100 * 1024**2},
+    {"key": "100 MB - 1 GB", "from": 100 * 1024**2, "to": 1024**3},
+    {"key": "> 1 GB", "from": 1024**3},
+]
 
-class ElasticsearchService(BaseService):
+SUGGEST_MAX_SIZE = 10
+SUGGEST_MAX_PREFIX_LENGTH = 50
+SUGGEST_SOURCE_FIELDS = ["type", "id", "title", "filename", "url", "dataset_doi"]
+
+SEARCH_MODES = ("auto", "exact", "prefix", "fuzzy")
+# Un DOI (con o sin el prefijo https://doi.org/ o doi:) o un nombre de fichero FITS se buscan por keyword exacta
+DOI_PATTERN = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:)?(10\.\d{4,9}/\S+)$", re.IGNORECASE)
+FITS_FILENAME_PATTERN = re.compile(r"^\S+\.fits$", re.IGNORECASE)
+# Límites de expansión de términos: cada expansión es una cláusula más en la consulta final
+FUZZY_PREFIX_LENGTH = 1
+FUZZY_MAX_EXPANSIONS = 20
+PREFIX_MAX_EXPANSIONS = 20
+
+_elasticsearch_breaker = None
+_sqlite_backends_lock = threading.Lock()
+
+
+def _replay_outbox():
+    from app.modules.elasticsearch.outbox import outbox_signal
+
+    # Las escrituras que quedaron pendientes en el outbox se reenvían en cuanto Elasticsearch vuelve
+    outbox_signal.set()
+
+
+def get_elasticsearch_breaker() -> CircuitBreaker:
+    """Circuit breaker compartido por todas las llamadas a Elasticsearch del proceso."""
+    global _elasticsearch_breaker
+
+    if _elasticsearch_breaker is None:
+        try:
+            config = current_app.config
+        except RuntimeError:
+            config = {}
+        _elasticsearch_breaker = CircuitBreaker(
+            failure_threshold=int(config.get("ELASTICSEARCH_BREAKER_FAILURE_THRESHOLD", 3)),
+            reset_timeout=float(config.get("ELASTICSEARCH_BREAKER_RESET_SECONDS", 30)),
+            on_close=_replay_outbox,
+        )
+    return _elasticsearch_breaker
+
+
+class SearchBackend:
+    """
+    Interfaz común de los motores de búsqueda. Elasticsearch es el motor por defecto;
+    ``SQLiteSearchBackend`` ofrece el mismo contrato sobre SQLite FTS5 para despliegues
+    pequeños y entornos locales sin Elasticsearch.
+    """
+
+    # Tiempo de la última búsqueda según el propio motor (``took`` de Elasticsearch), si lo informa
+    last_took = None
+
+    def create_index_if_not_exists(self):
+        raise NotImplementedError("The 'create_index_if_not_exists' method must be implemented by the child class.")
+
+    def index_document(self, doc_id: str, data: dict):
+        raise NotImplementedError("The 'index_document' method must be implemented by the child class.")
+
+    def delete_document(self, doc_id: str):
+        raise NotImplementedError("The 'delete_document' method must be implemented by the child class.")
+
+    def bulk(self, actions) -> int:
+        raise NotImplementedError("The 'bulk' method must be implemented by the child class.")
+
+    def update_documents(self, actions) -> list:
+        raise NotImplementedError("The 'update_documents' method must be implemented by the child class.")
+
+    def delete_stale_hubfiles(self, dataset_ids, keep_hubfile_ids):
+        raise NotImplementedError("The 'delete_stale_hubfiles' method must be implemented by the child class.")
+
+    def update_dataset_hubfiles(self, dataset_id, fields: dict):
+        raise NotImplementedError("The 'update_dataset_hubfiles' method must be implemented by the child class.")
+
+    def search(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        raise NotImplementedError("The 'search' method must be implemented by the child class.")
+
+    def search_with_facets(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        raise NotImplementedError("The 'search_with_facets' method must be implemented by the child class.")
+
+    def suggest(self, prefix: str, size=5):
+        raise NotImplementedError("The 'suggest' method must be implemented by the child class.")
+
+    def _normalize_publication_type(self, publication_type):
+        # Ignorar valores sentinela como "any"/"all"
+        normalized = (publication_type or "").strip().lower()
+        if normalized in ("", "any", "all"):
+            return None
+        return normalized
+
+    def _normalize_search_mode(self, mode):
+        normalized = (mode or "auto").strip().lower()
+        if normalized not in SEARCH_MODES:
+            raise ValueError(f"Modo de búsqueda inválido: {mode}")
+        return normalized
+
+    def _identifier_lookup(self, query):
+        """
+        Detecta las consultas que identifican un único documento: devuelve ``("doi", doi)`` o
+        ``("filename", nombre)`` para resolverlas con una búsqueda exacta, o ``None``.
+        """
+        query = (query or "").strip()
+        doi_match = DOI_PATTERN.match(query)
+        if doi_match:
+            return "doi", doi_match.group(1).lower()
+        if FITS_FILENAME_PATTERN.match(query):
+            return "filename", query.lower()
+        return None
+
+    def _normalize_date_range(self, date_from, date_to):
+        try:
+            dt_from = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+            dt_to = datetime.strptime(date_to, "%Y-%m-%d") if date_to else None
+        except ValueError as e:
+            print(f"[WARN] Formato de fecha inválido recibido: from={date_from}, to={date_to}. Error: {e}")
+            return None, None
+        return dt_from, dt_to
+
+    def _format_suggestion(self, option):
+        source = option.get("_source", {})
+        return {
+            "text": option.get("text"),
+            "type": source.get("type"),
+            "id": source.get("id"),
+            "url": source.get("url") or source.get("dataset_doi"),
+        }
+
+    def _normalize_community_filter(self, community):
+        if community in (None, "", [], "any"):
+            return []
+        if isinstance(community, (list, tuple)):
+            raw_values = community
+        else:
+            raw_values = [value.strip() for value in str(community).split(",")]
+        normalized = []
+        for value in raw_values:
+            if not value:
+                continue
+            if not str(value).isdigit():
+                raise ValueError(f"El valor de comunidad inválido: {value}")
+            normalized.append(int(value))
+        return normalized
+
+    def _format_hit(self, hit):
+        source = hit["_source"]
+
+        # Formato de fecha
+        if "created_at" in source:
+            try:
+                dt = datetime.fromisoformat(source["created_at"])
+                source["created_at"] = dt.strftime("%d %b %Y, %H:%M")
+            except Exception:
+                pass
+
+        # Tamaño legible
+        if "total_size_in_bytes" in source:
+            source["total_size_in_human_format"] = self._human_readable_size(source["total_size_in_bytes"])
+
+        return source
+
+    def _human_readable_size(self, size_bytes):
+        if size_bytes is None:
+            return ""
+        if size_bytes == 0:
+            return "0 B"
+        size_name = ("B", "KB", "MB", "GB", "TB")
+        i = int(min(len(size_name) - 1, max(0, (size_bytes.bit_length() - 1) // 10)))
+        p = 1 << (i * 10)
+        s = round(size_bytes / p, 2)
+        return f"{s} {size_name[i]}"
+
+
+class DatabaseSearchFallback(SearchBackend):
+    """
+    Búsqueda degradada sobre la consulta SQL de explore, usada mientras Elasticsearch no está
+    disponible. Sólo devuelve datasets y no calcula facetas ni sugerencias.
+    """
+
+    def search(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        from app.modules.elasticsearch.utils import build_dataset_document
+        from app.modules.explore.services import ExploreService
+
+        # La consulta SQL siempre busca subcadenas: el modo sólo se valida
+        self._normalize_search_mode(mode)
+        dt_from, dt_to = self._normalize_date_range(date_from, date_to)
+        filters = {
+            "query": query,
+            "publication_type": self._normalize_publication_type(publication_type) or "any",
+            "tags": tags or [],
+            "date_from": dt_from,
+            "date_to": dt_to.replace(hour=23, minute=59, second=59, microsecond=999999) if dt_to else None,
+            "community_ids": self._normalize_community_filter(community),
+        }
+
+        explore_service = ExploreService()
+        datasets = explore_service.filter(
+            sorting=sorting if sorting in ("oldest", "largest") else "newest",
+            page=page,
+            size=size,
+            profile="document",
+            **filters,
+        )
+        total = explore_service.count_filtered(**filters)
+
+        return [self._format_hit({"_source": build_dataset_document(dataset)}) for dataset in datasets], total
+
+    def search_with_facets(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        results, total = self.search(
+            query=query,
+            publication_type=publication_type,
+            sorting=sorting,
+            tags=tags,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            size=size,
+            community=community,
+            mode=mode,
+        )
+        return results, total, {}
+
+    def suggest(self, prefix: str, size=5):
+        return []
+
+
+class ElasticsearchService(BaseService, SearchBackend):
     def __init__(self, host=None, index_name=None):
         config = {}
         try:
@@ -56,17 +342,8 @@ class ElasticsearchService(BaseService):
         self.retry_attempts = retry_attempts
         self.retry_delay = retry_delay
 
-        if not self.wait_for_elasticsearch(retries=self.retry_attempts, delay=self.retry_delay):
-            raise ConnectionError(f"No se pudo conectar a Elasticsearch en el host proporcionado: {host}")
-
-        try:
-            self.create_index_if_not_exists()
-        except Exception:
-            # Si la creación falla, permitimos que continúe; las búsquedas gestionarán el error.
-            try:
-                current_app.logger.exception("No se pudo asegurar la existencia del índice de Elasticsearch")
-            except RuntimeError:
-                print("[WARN] No se pudo asegurar la existencia del índice de Elasticsearch")
+        # Sin comprobaciones ni esperas aquí: cada llamada pasa por el circuit breaker, que registra los fallos.
+        # El índice se crea al arrancar (init_search_index), no en cada petición.
 
     def wait_for_elasticsearch(self, retries=5, delay=2):
         for attempt in range(retries):
@@ -75,16 +352,23 @@ class ElasticsearchService(BaseService):
                     return True
             except ConnectionError:
                 pass
-            time.sleep(delay)
+            if attempt < retries - 1:
+                time.sleep(delay)
         return False
 
+    def _call(self, func, *args, **kwargs):
+        return get_elasticsearch_breaker().call(
+            func, *args, failure_exceptions=(ConnectionError, ConnectionTimeout), **kwargs
+        )
+
     def create_index_if_not_exists(self):
         print(f"Verificando si el índice '{self.index_name}' existe...")
         try:
-            existe_index = self.es.indices.exists(index=self.index_name)
+            existe_index = self._call(self.es.indices.exists, index=self.index_name)
 
             if not existe_index:
-                self.es.indices.create(
+                self._call(
+                    self.es.indices.create,
                     index=self.index_name,
                     body={
                         "settings": {
@@ -101,6 +385,12 @@ class ElasticsearchService(BaseService):
                                         "filter": ["lowercase", "asciifolding"],
                                     },
                                 },
+                                "normalizer": {
+                                    "lowercase_normalizer": {
+                                        "type": "custom",
+                                        "filter": ["lowercase", "asciifolding"],
+                                    }
+                                },
                                 "tokenizer": {
                                     "custom_filename_tokenizer": {
                                         "type": "pattern",
@@ -124,6 +414,7 @@ class ElasticsearchService(BaseService):
                                 "filename": {
                                     "type": "text",
                                     "analyzer": "custom_filename_analyzer",
+                                    "fields": {"keyword": {"type": "keyword", "normalizer": "lowercase_normalizer"}},
                                 },
                                 "tags": {
                                     "type": "text",
@@ -137,6 +428,8 @@ class ElasticsearchService(BaseService):
                                 },
                                 "created_at": {"type": "date"},
                                 "doi": {"type": "keyword"},
+                                "dataset_doi": {"type": "keyword", "normalizer": "lowercase_normalizer"},
+                                "publication_doi": {"type": "keyword", "normalizer": "lowercase_normalizer"},
                                 "authors": {
                                     "type": "nested",
                                     "properties": {
@@ -156,6 +449,12 @@ class ElasticsearchService(BaseService):
                                     "analyzer": "custom_text_analyzer",
                                 },
                                 "url": {"type": "keyword"},
+                                "suggest": {
+                                    "type": "completion",
+                                    "analyzer": "custom_text_analyzer",
+                                    "search_analyzer": "custom_text_analyzer",
+                                    "max_input_length": SUGGEST_MAX_PREFIX_LENGTH,
+                                },
                                 "dataset_id": {"type": "integer"},
                                 "community_ids": {"type": "integer"},
                                 "fits_model_id": {"type": "integer"},
@@ -191,20 +490,86 @@ class ElasticsearchService(BaseService):
 
     def index_document(self, doc_id: str, data: dict):
         try:
-            self.es.index(index=self.index_name, id=doc_id, document=data)
+            self._call(self.es.index, index=self.index_name, id=doc_id, document=data)
         except Exception as e:
             print(f"Error al indexar el documento con ID '{doc_id}': {str(e)}")
             raise
 
     def delete_document(self, doc_id: str):
         try:
-            self.es.delete(index=self.index_name, id=doc_id)
+            self._call(self.es.delete, index=self.index_name, id=doc_id)
         except NotFoundError:
             print(f"Documento con ID '{doc_id}' no encontrado para eliminar.")
         except Exception as e:
             print(f"Error al eliminar el documento con ID '{doc_id}': {str(e)}")
             raise
 
+    def bulk(self, actions) -> int:
+        if not actions:
+            return 0
+        try:
+            # Deleting a document that was never indexed is not an error
+            success, _ = self._call(helpers.bulk, self.es, actions, index=self.index_name, ignore_status=(404,))
+            return success
+        except Exception as e:
+            print(f"Error en la indexación masiva de {len(actions)} operaciones: {str(e)}")
+            raise
+
+    def update_documents(self, actions) -> list:
+        """Aplica acciones ``update`` parciales y devuelve los ids de los documentos que no existen."""
+        if not actions:
+            return []
+        try:
+            _, errors = self._call(helpers.bulk, self.es, actions, index=self.index_name, ignore_status=(404,))
+        except Exception as e:
+            print(f"Error en la actualización masiva de {len(actions)} documentos: {str(e)}")
+            raise
+        return [error["update"]["_id"] for error in errors if error.get("update", {}).get("status") == 404]
+
+    def delete_stale_hubfiles(self, dataset_ids, keep_hubfile_ids):
+        """Elimina los documentos de ficheros de esos datasets que ya no existen en la base de datos."""
+        try:
+            self._call(
+                self.es.delete_by_query,
+                index=self.index_name,
+                query={
+                    "bool": {
+                        "filter": [
+                            {"term": {"type": "hubfile"}},
+                            {"terms": {"dataset_id": list(dataset_ids)}},
+                        ],
+                        "must_not": [{"terms": {"id": list(keep_hubfile_ids)}}],
+                    }
+                },
+                conflicts="proceed",
+            )
+        except NotFoundError:
+            print(f"Índice '{self.index_name}' no encontrado al limpiar ficheros obsoletos.")
+
+    def update_dataset_hubfiles(self, dataset_id, fields: dict):
+        """Copia los campos indicados en todos los documentos de ficheros de un dataset con un único update_by_query."""
+        try:
+            self._call(
+                self.es.update_by_query,
+                index=self.index_name,
+                query={
+                    "bool": {
+                        "filter": [
+                            {"term": {"type": "hubfile"}},
+                            {"term": {"dataset_id": dataset_id}},
+                        ]
+                    }
+                },
+                script={
+                    "source": "ctx._source.putAll(params.fields)",
+                    "lang": "painless",
+                    "params": {"fields": fields},
+                },
+                conflicts="proceed",
+            )
+        except NotFoundError:
+            print(f"Índice '{self.index_name}' no encontrado al actualizar los ficheros del dataset {dataset_id}.")
+
     def search(
         self,
         query: str,
@@ -216,6 +581,67 @@ class ElasticsearchService(BaseService):
         page=1,
         size=10,
         community=None,
+        mode=None,
+    ):
+        results, total, _ = self._run_search(
+            query=query,
+            publication_type=publication_type,
+            sorting=sorting,
+            tags=tags,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            size=size,
+            community=community,
+            mode=mode,
+            facets=False,
+        )
+        return results, total
+
+    def search_with_facets(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        """
+        Igual que ``search`` pero devuelve también los contadores de cada faceta,
+        calculados en la misma petición a Elasticsearch.
+        """
+        return self._run_search(
+            query=query,
+            publication_type=publication_type,
+            sorting=sorting,
+            tags=tags,
+            date_from=date_from,
+            date_to=date_to,
+            page=page,
+            size=size,
+            community=community,
+            mode=mode,
+            facets=True,
+        )
+
+    def _run_search(
+        self,
+        query,
+        publication_type,
+        sorting,
+        tags,
+        date_from,
+        date_to,
+        page,
+        size,
+        community,
+        mode,
+        facets,
     ):
         try:
             print(
@@ -225,109 +651,83 @@ class ElasticsearchService(BaseService):
                 f"tags: {tags}, "
                 f"orden: {sorting}, "
                 f"página: {page}, tamaño: {size}, "
-                f"comunidad: {community}"
+                f"comunidad: {community}, "
+                f"modo: {mode}, "
+                f"facetas: {facets}"
             )
 
             must_clauses = []
-            filter_clauses = []
+            # Filtros indexados por faceta, para poder excluir el propio filtro al agregar
+            facet_filters = {}
 
             # Texto libre
             if query:
-                text_fields_clause = {
-                    "multi_match": {
-                        "query": query,
-                        "fields": [
-                            "title^4",
-                            "description^3",
-                            "filename^2",
-                        ],
-                        "fuzziness": "AUTO",
-                    }
-                }
+                must_clauses.append(self._build_text_query(query, self._normalize_search_mode(mode)))
 
-                author_nested_clause = {
-                    "nested": {
-                        "path": "authors",
-                        "score_mode": "avg",
-                        "query": {
-                            "multi_match": {
-                                "query": query,
-                                "fields": [
-                                    "authors.name^2",
-                                    "authors.affiliation",
-                                ],
-                                "fuzziness": "AUTO",
-                                "operator": "and",
-                            }
-                        },
-                    }
-                }
-
-                must_clauses.append(
-                    {
-                        "bool": {
-                            "should": [text_fields_clause, author_nested_clause],
-                            "minimum_should_match": 1,
-                        }
-                    }
-                )
-
-            # Filtro por tipo de publicación (ignorar valores sentinela como "any"/"all")
-            normalized_publication_type = (publication_type or "").strip()
+            # Filtro por tipo de publicación
+            normalized_publication_type = self._normalize_publication_type(publication_type)
             if normalized_publication_type:
-                normalized_publication_type = normalized_publication_type.lower()
-
-            if normalized_publication_type not in ("", "any", "all"):
-                filter_clauses.append({"term": {"publication_type": normalized_publication_type}})
+                facet_filters["publication_type"] = {"term": {"publication_type": normalized_publication_type}}
 
             # Filtro por tags
             if tags:
-                filter_clauses.append({"terms": {"tags.keyword": tags}})
+                facet_filters["tags"] = {"terms": {"tags.keyword": tags}}
 
             # Filtro por fechas
-            if date_from or date_to:
-                try:
-                    range_query = {"range": {"created_at": {}}}
-
-                    if date_from:
-                        # Normalizar y validar formato
-                        dt_from = datetime.strptime(date_from, "%Y-%m-%d")
-                        range_query["range"]["created_at"]["gte"] = dt_from.strftime("%Y-%m-%dT00:00:00Z")
-
-                    if date_to:
-                        dt_to = datetime.strptime(date_to, "%Y-%m-%d")
-                        range_query["range"]["created_at"]["lte"] = dt_to.strftime("%Y-%m-%dT23:59:59Z")
-
-                    if "gte" in range_query["range"]["created_at"] or "lte" in range_query["range"]["created_at"]:
-                        filter_clauses.append(range_query)
-
-                except ValueError as e:
-                    print(f"[WARN] Formato de fecha inválido recibido: from={date_from}, to={date_to}. Error: {e}")
+            dt_from, dt_to = self._normalize_date_range(date_from, date_to)
+            if dt_from or dt_to:
+                range_query = {"range": {"created_at": {}}}
+                if dt_from:
+                    range_query["range"]["created_at"]["gte"] = dt_from.strftime("%Y-%m-%dT00:00:00Z")
+                if dt_to:
+                    range_query["range"]["created_at"]["lte"] = dt_to.strftime("%Y-%m-%dT23:59:59Z")
+                facet_filters["created_at"] = range_query
 
             community_filter = self._normalize_community_filter(community)
             if community_filter:
-                filter_clauses.append({"terms": {"community_ids": community_filter}})
+                facet_filters["community_ids"] = {"terms": {"community_ids": community_filter}}
+
+            filter_clauses = list(facet_filters.values())
 
             # Ordenación
-            sort_clause = [
-                {"created_at": {"order": "desc"}} if sorting == "newest" else {"created_at": {"order": "asc"}}
-            ]
+            if sorting == "relevance":
+                sort_clause = ["_score", {"created_at": {"order": "desc"}}]
+            elif sorting == "largest":
+                sort_clause = [{"total_size_in_bytes": {"order": "desc"}}, {"created_at": {"order": "desc"}}]
+            else:
+                sort_clause = [
+                    {"created_at": {"order": "desc"}} if sorting == "newest" else {"created_at": {"order": "asc"}}
+                ]
 
             # Calcular offset
             from_ = (page - 1) * size
 
-            body = {
-                "query": {
-                    "bool": {
-                        "must": must_clauses if must_clauses else [{"match_all": {}}],
-                        "filter": filter_clauses,
-                    }
-                },
-                "sort": sort_clause,
-            }
+            if facets:
+                # Los filtros van en post_filter para que cada faceta cuente sin su propio filtro
+                body = {
+                    "query": {
+                        "bool": {
+                            "must": must_clauses if must_clauses else [{"match_all": {}}],
+                        }
+                    },
+                    "post_filter": {"bool": {"filter": filter_clauses}},
+                    "aggs": self._build_facet_aggregations(facet_filters),
+                    "sort": sort_clause,
+                }
+            else:
+                body = {
+                    "query": {
+                        "bool": {
+                            "must": must_clauses if must_clauses else [{"match_all": {}}],
+                            "filter": filter_clauses,
+                        }
+                    },
+                    "sort": sort_clause,
+                }
 
             try:
-                result = self.es.search(
+                result = self._call(
+                    self.es.search,
                     index=self.index_name,
                     body=body,
                     from_=from_,
@@ -335,64 +735,166 @@ class ElasticsearchService(BaseService):
                 )
             except NotFoundError:
                 self.create_index_if_not_exists()
-                return [], 0
+                return [], 0, {}
 
             hits = result["hits"]["hits"]
             total = result["hits"]["total"]["value"]
+            self.last_took = result.get("took")
 
             print(f"[SUCCESS] Búsqueda completada. Página {page}, resultados: {len(hits)}, total: {total}")
 
-            return [self._format_hit(hit) for hit in hits], total
+            facet_counts = self._format_facets(result.get("aggregations", {})) if facets else {}
+
+            return [self._format_hit(hit) for hit in hits], total, facet_counts
 
         except Exception as e:
             print(f"[ERROR] Fallo en la búsqueda: {e}")
             raise
 
-    def _normalize_community_filter(self, community):
-        if community in (None, "", [], "any"):
-            return []
-        if isinstance(community, (list, tuple)):
-            raw_values = community
+    def _build_text_query(self, query, mode):
+        """
+        Consulta de texto libre según el modo: ``exact`` (keyword o frase), ``prefix`` o ``fuzzy``.
+        En modo ``auto`` los DOI y nombres de fichero van a la búsqueda exacta y el resto es difuso.
+        """
+        if mode in ("auto", "exact"):
+            identifier = self._identifier_lookup(query)
+            if identifier:
+                return self._build_identifier_query(*identifier)
+            if mode == "auto":
+                mode = "fuzzy"
+
+        if mode == "exact":
+            text_options = {"type": "phrase"}
+            author_options = {"type": "phrase"}
+        elif mode == "prefix":
+            text_options = {"type": "bool_prefix", "max_expansions": PREFIX_MAX_EXPANSIONS}
+            author_options = {"type": "bool_prefix", "max_expansions": PREFIX_MAX_EXPANSIONS, "operator": "and"}
         else:
-            raw_values = [value.strip() for value in str(community).split(",")]
-        normalized = []
-        for value in raw_values:
-            if not value:
-                continue
-            if not str(value).isdigit():
-                raise ValueError(f"El valor de comunidad inválido: {value}")
-            normalized.append(int(value))
-        return normalized
+            fuzzy_options = {
+                "fuzziness": "AUTO",
+                "prefix_length": FUZZY_PREFIX_LENGTH,
+                "max_expansions": FUZZY_MAX_EXPANSIONS,
+            }
+            text_options = dict(fuzzy_options)
+            author_options = {**fuzzy_options, "operator": "and"}
 
-    def _format_hit(self, hit):
-        from datetime import datetime
+        text_fields_clause = {
+            "multi_match": {
+                "query": query,
+                "fields": [
+                    "title^4",
+                    "description^3",
+                    "filename^2",
+                ],
+                **text_options,
+            }
+        }
 
-        source = hit["_source"]
+        author_nested_clause = {
+            "nested": {
+                "path": "authors",
+                "score_mode": "avg",
+                "query": {
+                    "multi_match": {
+                        "query": query,
+                        "fields": [
+                            "authors.name^2",
+                            "authors.affiliation",
+                        ],
+                        **author_options,
+                    }
+                },
+            }
+        }
 
-        # Formato de fecha
-        if "created_at" in source:
-            try:
-                dt = datetime.fromisoformat(source["created_at"])
-                source["created_at"] = dt.strftime("%d %b %Y, %H:%M")
-            except Exception:
-                pass
+        return {
+            "bool": {
+                "should": [text_fields_clause, author_nested_clause],
+                "minimum_should_match": 1,
+            }
+        }
 
-        # Tamaño legible
-        if "total_size_in_bytes" in source:
-            source["total_size_in_human_format"] = self._human_readable_size(source["total_size_in_bytes"])
+    def _build_identifier_query(self, kind, value):
+        # Términos exactos sobre campos keyword: sin análisis ni expansión de términos
+        if kind == "doi":
+            should = [{"term": {"dataset_doi": value}}, {"term": {"publication_doi": value}}]
+        else:
+            should = [{"term": {"filename.keyword": value}}]
+        return {"bool": {"should": should, "minimum_should_match": 1}}
 
-        return source
+    def _build_facet_aggregations(self, facet_filters):
+        facet_definitions = {
+            "publication_type": {"terms": {"field": "publication_type", "size": FACET_PUBLICATION_TYPES_SIZE}},
+            "tags": {"terms": {"field": "tags.keyword", "size": FACET_TAGS_SIZE}},
+            "community_ids": {"terms": {"field": "community_ids", "size": FACET_COMMUNITIES_SIZE}},
+            "created_at": {
+                "date_histogram": {
+                    "field": "created_at",
+                    "calendar_interval": "month",
+                    "format": "yyyy-MM",
+                    "min_doc_count": 1,
+                }
+            },
+            "size": {"range": {"field": "total_size_in_bytes", "ranges": FACET_SIZE_RANGES}},
+        }
 
-    def _human_readable_size(self, size_bytes):
-        if size_bytes is None:
-            return ""
-        if size_bytes == 0:
-            return "0 B"
-        size_name = ("B", "KB", "MB", "GB", "TB")
-        i = int(min(len(size_name) - 1, max(0, (size_bytes.bit_length() - 1) // 10)))
-        p = 1 << (i * 10)
-        s = round(size_bytes / p, 2)
-        return f"{s} {size_name[i]}"
+        aggregations = {}
+        for facet_name, facet_aggregation in facet_definitions.items():
+            # Cada faceta aplica el resto de filtros, pero no el suyo propio
+            other_filters = [clause for name, clause in facet_filters.items() if name != facet_name]
+            aggregations[facet_name] = {
+                "filter": {"bool": {"filter": [{"term": {"type": "dataset"}}] + other_filters}},
+                "aggs": {"values": facet_aggregation},
+            }
+        return aggregations
+
+    def _format_facets(self, aggregations):
+        facet_counts = {}
+        for facet_name, aggregation in aggregations.items():
+            buckets = aggregation.get("values", {}).get("buckets", [])
+            facet_counts[facet_name] = [
+                {
+                    "key": bucket.get("key_as_string", bucket.get("key")),
+                    "count": bucket.get("doc_count", 0),
+                }
+                for bucket in buckets
+            ]
+        return facet_counts
+
+    def suggest(self, prefix: str, size=5):
+        """
+        Autocompletado de títulos, tags, autores y nombres de fichero mediante el
+        completion suggester, sin pasar por la búsqueda principal.
+        """
+        prefix = (prefix or "").strip()[:SUGGEST_MAX_PREFIX_LENGTH]
+        if not prefix:
+            return []
+
+        size = max(1, min(int(size), SUGGEST_MAX_SIZE))
+
+        body = {
+            "_source": SUGGEST_SOURCE_FIELDS,
+            "suggest": {
+                "autocomplete": {
+                    "prefix": prefix,
+                    "completion": {
+                        "field": "suggest",
+                        "size": size,
+                        "skip_duplicates": True,
+                    },
+                }
+            },
+        }
+
+        try:
+            result = self._call(self.es.search, index=self.index_name, body=body, size=0)
+        except NotFoundError:
+            self.create_index_if_not_exists()
+            return []
+
+        options = result.get("suggest", {}).get("autocomplete", [{}])[0].get("options", [])
+
+        return [self._format_suggestion(option) for option in options]
 
 
 class IndexingService:
@@ -423,3 +925,153 @@ class IndexingService:
         except Exception as exc:
             self.logger.exception(f"[INDEX ERROR] Failed to index dataset {dataset.id}: {exc}")
             raise
+
+
+class SearchIndexOutboxService(BaseService):
+    """
+    Vacía el outbox de cambios del índice de búsqueda: agrupa las entradas por dataset,
+    de modo que varias ediciones seguidas producen una única reindexación, y las envía en bloque.
+    """
+
+    def __init__(self):
+        super().__init__(SearchIndexOutboxRepository())
+
+    def drain(self, debounce_seconds=2, batch_size=100) -> int:
+        settled_before = datetime.utcnow() - timedelta(seconds=debounce_seconds)
+        batch = self.repository.get_settled_batch(settled_before, batch_size)
+        if not batch:
+            return 0
+
+        dataset_ids = [dataset_id for dataset_id, _ in batch]
+        max_entry_id = max(entry_id for _, entry_id in batch)
+
+        # Los cambios de comunidad, título o tags se aplican como actualizaciones parciales
+        pending_fields = self.repository.get_pending_fields(dataset_ids, max_entry_id)
+        partial = {dataset_id: fields for dataset_id, fields in pending_fields.items() if fields}
+
+        # Si el motor de búsqueda falla, las entradas se conservan y se reintentan en el siguiente vaciado
+        search = get_search_backend()
+        partial_actions, hubfile_updates, rebuild_ids = self._build_partial_updates(partial)
+
+        # Un documento que aún no está en el índice no admite actualizaciones parciales: se indexa completo
+        missing_ids = [int(doc_id.removeprefix("dataset-")) for doc_id in search.update_documents(partial_actions)]
+        hubfile_updates = [update for update in hubfile_updates if update[0] not in missing_ids]
+
+        full_ids = [dataset_id for dataset_id in dataset_ids if dataset_id not in partial] + rebuild_ids + missing_ids
+        actions, kept_hubfile_ids = self._build_bulk_actions(full_ids) if full_ids else ([], [])
+
+        search.bulk(actions)
+        if full_ids:
+            search.delete_stale_hubfiles(full_ids, kept_hubfile_ids)
+        for dataset_id, fields in hubfile_updates:
+            search.update_dataset_hubfiles(dataset_id, fields)
+
+        self.repository.delete_processed(dataset_ids, max_entry_id)
+        return len(dataset_ids)
+
+    def drain_all(self, debounce_seconds=2, batch_size=100) -> int:
+        total = 0
+        while True:
+            processed = self.drain(debounce_seconds=debounce_seconds, batch_size=batch_size)
+            if not processed:
+                return total
+            total += processed
+
+    def count_pending(self) -> int:
+        return self.repository.count_pending()
+
+    def _build_partial_updates(self, partial):
+        """
+        Acciones ``update`` con sólo los campos modificados de cada dataset, y los campos a copiar
+        en sus ficheros. Los datasets borrados o sin DOI se devuelven aparte para reindexarlos completos.
+        """
+        from app.modules.dataset.repositories import DataSetRepository
+        from app.modules.elasticsearch.utils import build_dataset_partial_document, build_hubfile_partial_document
+
+        if not partial:
+            return [], [], []
+
+        datasets = {dataset.id: dataset for dataset in DataSetRepository().get_many(partial)}
+
+        actions = []
+        hubfile_updates = []
+        rebuild_ids = []
+        for dataset_id, fields in partial.items():
+            dataset = datasets.get(dataset_id)
+            if not dataset or not dataset.ds_meta_data or not dataset.ds_meta_data.dataset_doi:
+                rebuild_ids.append(dataset_id)
+                continue
+
+            actions.append(
+                {
+                    "_op_type": "update",
+                    "_id": f"dataset-{dataset.id}",
+                    "doc": build_dataset_partial_document(dataset, fields),
+                }
+            )
+            hubfile_fields = build_hubfile_partial_document(dataset, fields)
+            if hubfile_fields:
+                hubfile_updates.append((dataset.id, hubfile_fields))
+
+        return actions, hubfile_updates, rebuild_ids
+
+    def _build_bulk_actions(self, dataset_ids):
+        from app.modules.dataset.repositories import DataSetRepository
+        from app.modules.elasticsearch.utils import build_dataset_document, build_hubfile_document
+
+        datasets = {dataset.id: dataset for dataset in DataSetRepository().get_many(dataset_ids)}
+
+        actions = []
+        kept_hubfile_ids = []
+        for dataset_id in dataset_ids:
+            dataset = datasets.get(dataset_id)
+
+            # Datasets borrados o sin DOI no deben aparecer en el índice
+            if not dataset or not dataset.ds_meta_data or not dataset.ds_meta_data.dataset_doi:
+                actions.append({"_op_type": "delete", "_id": f"dataset-{dataset_id}"})
+                continue
+
+            actions.append(
+                {"_op_type": "index", "_id": f"dataset-{dataset.id}", "_source": build_dataset_document(dataset)}
+            )
+            for fits_model in dataset.fits_models:
+                for hubfile in fits_model.files:
+                    actions.append(
+                        {
+                            "_op_type": "index",
+                            "_id": f"hubfile-{hubfile.id}",
+                            "_source": build_hubfile_document(hubfile, dataset),
+                        }
+                    )
+                    kept_hubfile_ids.append(hubfile.id)
+
+        return actions, kept_hubfile_ids
+
+
+def release_search_connections(exc=None):
+    """Devuelve las conexiones que el hilo actual tomó de los backends SQLite de la aplicación."""
+    for backend in list(current_app.extensions.get("sqlite_search_backends", {}).values()):
+        backend.release_connection()
+
+
+def get_search_backend() -> SearchBackend:
+    """Devuelve el motor de búsqueda configurado en ``SEARCH_BACKEND`` ("elasticsearch" o "sqlite")."""
+    try:
+        backend = current_app.config.get("SEARCH_BACKEND", "elasticsearch")
+    except RuntimeError:
+        backend = "elasticsearch"
+
+    if backend == "sqlite":
+        from app.modules.elasticsearch.sqlite_backend import SQLiteSearchBackend
+
+        # Un único backend por aplicación y ruta: el esquema se crea una vez y las conexiones se reutilizan
+        app = current_app._get_current_object()
+        path = app.config.get("SEARCH_SQLITE_PATH")
+        with _sqlite_backends_lock:
+            backends = app.extensions.setdefault("sqlite_search_backends", {})
+            if path not in backends:
+                backends[path] = SQLiteSearchBackend(path=path)
+            return backends[path]
+    if backend != "elasticsearch":
+        raise ValueError(f"Motor de búsqueda desconocido: {backend}")
+    return ElasticsearchService()
@@ -0,0 +1,546 @@
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+from flask import current_app
+
+from app.modules.elasticsearch.services import (
+    FACET_COMMUNITIES_SIZE,
+    FACET_PUBLICATION_TYPES_SIZE,
+    FACET_SIZE_RANGES,
+    FACET_TAGS_SIZE,
+    SUGGEST_MAX_PREFIX_LENGTH,
+    SUGGEST_MAX_SIZE,
+    SearchBackend,
+)
+
+# Nombres únicos para las bases en memoria compartidas entre los hilos de un mismo backend
+_memory_database_ids = itertools.count()
+
+# Conexiones libres que se conservan para reutilizarlas; el resto se cierra al liberarlas
+SQLITE_IDLE_CONNECTIONS = 4
+
+# Pesos BM25 por columna de documents_fts, equivalentes a los boosts de Elasticsearch
+FTS_COLUMN_WEIGHTS = (4.0, 3.0, 2.0, 2.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_id TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    item_id INTEGER,
+    dataset_id INTEGER,
+    publication_type TEXT,
+    created_at TEXT,
+    total_size_in_bytes INTEGER,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_documents_created_at ON documents (created_at);
+CREATE INDEX IF NOT EXISTS ix_documents_type_dataset_id ON documents (type, dataset_id);
+
+CREATE TABLE IF NOT EXISTS document_tags (
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_document_tags_tag ON document_tags (tag, document_id);
+CREATE INDEX IF NOT EXISTS ix_document_tags_document_id ON document_tags (document_id);
+
+CREATE TABLE IF NOT EXISTS document_communities (
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    community_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_document_communities_community_id ON document_communities (community_id, document_id);
+CREATE INDEX IF NOT EXISTS ix_document_communities_document_id ON document_communities (document_id);
+
+CREATE TABLE IF NOT EXISTS document_suggestions (
+    document_id INTEGER NOT NULL REFERENCES documents (id) ON DELETE CASCADE,
+    input TEXT NOT NULL,
+    folded TEXT NOT NULL,
+    weight INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_document_suggestions_folded ON document_suggestions (folded);
+CREATE INDEX IF NOT EXISTS ix_document_suggestions_document_id ON document_suggestions (document_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5 (
+    title,
+    description,
+    filename,
+    authors,
+    affiliations,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def _fold(text):
+    """Minúsculas y sin diacríticos, como el analizador custom_text_analyzer."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    Motor de búsqueda embebido sobre SQLite FTS5. Implementa el mismo contrato que
+    ``ElasticsearchService`` (filtros, facetas, autocompletado y paginación) con ranking BM25.
+    La búsqueda difusa de Elasticsearch se sustituye por coincidencia por prefijo de cada término;
+    el modo ``exact`` busca la frase completa y los DOI o nombres de fichero se resuelven por igualdad.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            try:
+                path = current_app.config.get("SEARCH_SQLITE_PATH")
+            except RuntimeError:
+                path = None
+        self.path = path or "search_index.sqlite3"
+
+        if self.path == ":memory:":
+            # Cada hilo abre su propia conexión; la caché compartida hace que todas vean la misma base
+            self._database = f"file:search-index-{next(_memory_database_ids)}?mode=memory&cache=shared"
+        else:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._database = self.path
+
+        self._local = threading.local()
+        self._connections = set()
+        self._idle = []
+        self._connections_lock = threading.Lock()
+
+        self.create_index_if_not_exists()
+
+    @property
+    def conn(self):
+        """
+        Conexión del hilo actual: sqlite3 no permite usar una conexión desde dos hilos a la vez. Se toma de
+        las libres o se abre una nueva, y vuelve a ellas con ``release_connection`` al acabar el contexto.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._connections_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self._database, timeout=30, uri=self.path == ":memory:", check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        if self.path != ":memory:":
+            conn.execute("PRAGMA journal_mode = WAL")
+        with self._connections_lock:
+            self._connections.add(conn)
+        return conn
+
+    def release_connection(self):
+        """Devuelve la conexión del hilo actual; se cierra si ya hay suficientes libres."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        with self._connections_lock:
+            # Siempre queda al menos una libre, que mantiene viva una base en memoria
+            if len(self._idle) < SQLITE_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+            self._connections.discard(conn)
+        conn.close()
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = set()
+            self._idle = []
+        self._local = threading.local()
+
+    def create_index_if_not_exists(self):
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    # Indexación
+
+    def index_document(self, doc_id: str, data: dict):
+        try:
+            with self.conn:
+                self._delete(doc_id)
+                self._insert(doc_id, data)
+        except Exception as e:
+            print(f"Error al indexar el documento con ID '{doc_id}': {str(e)}")
+            raise
+
+    def delete_document(self, doc_id: str):
+        with self.conn:
+            if not self._delete(doc_id):
+                print(f"Documento con ID '{doc_id}' no encontrado para eliminar.")
+
+    def bulk(self, actions) -> int:
+        if not actions:
+            return 0
+        success = 0
+        try:
+            with self.conn:
+                for action in actions:
+                    doc_id = action["_id"]
+                    op_type = action.get("_op_type", "index")
+                    if op_type == "delete":
+                        # Borrar un documento que nunca se indexó no es un error
+                        self._delete(doc_id)
+                    elif op_type == "update":
+                        self._update(doc_id, action["doc"])
+                    else:
+                        self._delete(doc_id)
+                        self._insert(doc_id, action["_source"])
+                    success += 1
+        except Exception as e:
+            print(f"Error en la indexación masiva de {len(actions)} operaciones: {str(e)}")
+            raise
+        return success
+
+    def update_documents(self, actions) -> list:
+        missing = []
+        with self.conn:
+            for action in actions:
+                if not self._update(action["_id"], action["doc"]):
+                    missing.append(action["_id"])
+        return missing
+
+    def delete_stale_hubfiles(self, dataset_ids, keep_hubfile_ids):
+        dataset_ids = list(dataset_ids)
+        if not dataset_ids:
+            return
+        keep_hubfile_ids = list(keep_hubfile_ids)
+
+        sql = "SELECT doc_id FROM documents WHERE type = 'hubfile' "
+        sql += f"AND dataset_id IN ({self._placeholders(dataset_ids)})"
+        params = dataset_ids
+        if keep_hubfile_ids:
+            sql += f" AND item_id NOT IN ({self._placeholders(keep_hubfile_ids)})"
+            params = dataset_ids + keep_hubfile_ids
+
+        with self.conn:
+            for row in self.conn.execute(sql, params).fetchall():
+                self._delete(row["doc_id"])
+
+    def update_dataset_hubfiles(self, dataset_id, fields: dict):
+        with self.conn:
+            rows = self.conn.execute(
+                "SELECT doc_id FROM documents WHERE type = 'hubfile' AND dataset_id = ?", (dataset_id,)
+            ).fetchall()
+            for row in rows:
+                self._update(row["doc_id"], fields)
+
+    def _update(self, doc_id, fields):
+        row = self.conn.execute("SELECT source FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return False
+        data = json.loads(row["source"])
+        data.update(fields)
+        self._delete(doc_id)
+        self._insert(doc_id, data)
+        return True
+
+    def _insert(self, doc_id, data):
+        authors = data.get("authors") or []
+        cursor = self.conn.execute(
+            "INSERT INTO documents (doc_id, type, item_id, dataset_id, publication_type, created_at, "
+            "total_size_in_bytes, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                doc_id,
+                data.get("type"),
+                data.get("id"),
+                data.get("dataset_id"),
+                data.get("publication_type"),
+                data.get("created_at"),
+                data.get("total_size_in_bytes"),
+                json.dumps(data),
+            ),
+        )
+        document_id = cursor.lastrowid
+
+        self.conn.execute(
+            "INSERT INTO documents_fts (rowid, title, description, filename, authors, affiliations) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                document_id,
+                data.get("title") or "",
+                data.get("description") or "",
+                data.get("filename") or "",
+                " ".join(author.get("name") or "" for author in authors),
+                " ".join(author.get("affiliation") or "" for author in authors),
+            ),
+        )
+        self.conn.executemany(
+            "INSERT INTO document_tags (document_id, tag) VALUES (?, ?)",
+            [(document_id, tag) for tag in set(data.get("tags") or []) if tag],
+        )
+        self.conn.executemany(
+            "INSERT INTO document_communities (document_id, community_id) VALUES (?, ?)",
+            [(document_id, community_id) for community_id in set(data.get("community_ids") or [])],
+        )
+        self.conn.executemany(
+            "INSERT INTO document_suggestions (document_id, input, folded, weight) VALUES (?, ?, ?, ?)",
+            [
+                (document_id, text, _fold(text[:SUGGEST_MAX_PREFIX_LENGTH]), entry.get("weight", 1))
+                for entry in data.get("suggest") or []
+                for text in entry.get("input", [])
+            ],
+        )
+
+    def _delete(self, doc_id):
+        row = self.conn.execute("SELECT id FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return False
+        self.conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row["id"],))
+        self.conn.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+        return True
+
+    # Búsqueda
+
+    def search(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        results, total, _ = self._run_search(
+            query, publication_type, sorting, tags, date_from, date_to, page, size, community, mode, facets=False
+        )
+        return results, total
+
+    def search_with_facets(
+        self,
+        query: str,
+        publication_type=None,
+        sorting="newest",
+        tags=None,
+        date_from=None,
+        date_to=None,
+        page=1,
+        size=10,
+        community=None,
+        mode=None,
+    ):
+        return self._run_search(
+            query, publication_type, sorting, tags, date_from, date_to, page, size, community, mode, facets=True
+        )
+
+    def _run_search(
+        self, query, publication_type, sorting, tags, date_from, date_to, page, size, community, mode, facets
+    ):
+        mode = self._normalize_search_mode(mode)
+        facet_filters = self._build_filters(publication_type, tags, date_from, date_to, community)
+
+        identifier = self._identifier_lookup(query) if mode in ("auto", "exact") else None
+        if identifier:
+            # DOI o nombre de fichero: igualdad exacta sobre el documento, sin pasar por FTS
+            match_expression = None
+            facet_filters["identifier"] = self._identifier_filter(*identifier)
+        else:
+            match_expression = self._match_expression(query, mode)
+            if not match_expression and (query or "").strip():
+                # Una consulta sin ningún término no coincide con nada; sólo la consulta vacía lo lista todo
+                facet_filters["text"] = ("0 = 1", [])
+
+        if sorting == "relevance":
+            order_by = "score, d.created_at IS NULL, d.created_at DESC"
+        elif sorting == "newest":
+            order_by = "d.created_at IS NULL, d.created_at DESC, score"
+        elif sorting == "largest":
+            order_by = "d.total_size_in_bytes IS NULL, d.total_size_in_bytes DESC, d.created_at DESC"
+        else:
+            order_by = "d.created_at IS NULL, d.created_at ASC, score"
+
+        if match_expression:
+            # La ordenación por relevancia usa bm25 sobre el mismo MATCH que filtra
+            weights = ", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+            source = "documents_fts JOIN documents d ON d.id = documents_fts.rowid"
+            score = f"bm25(documents_fts, {weights})"
+            where, params = self._where(None, facet_filters.values())
+            where = f"documents_fts MATCH ? AND {where}"
+            params = [match_expression] + params
+        else:
+            source = "documents d"
+            score = "0"
+            where, params = self._where(None, facet_filters.values())
+
+        total = self.conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT d.source, {score} AS score FROM {source} WHERE {where} ORDER BY {order_by} LIMIT ? OFFSET ?",
+            params + [size, max(0, (page - 1) * size)],
+        ).fetchall()
+
+        results = [self._format_hit({"_source": json.loads(row["source"])}) for row in rows]
+        facet_counts = self._facet_counts(match_expression, facet_filters) if facets else {}
+
+        return results, total, facet_counts
+
+    def _match_expression(self, query, mode="auto"):
+        terms = re.findall(r"\w+", query or "")
+        if not terms:
+            return ""
+        if mode == "exact":
+            # Frase: los términos consecutivos y en orden dentro de una misma columna
+            return '"' + " ".join(terms) + '"'
+        # Cada término coincide por prefijo; la unión con OR replica el operador por defecto de multi_match
+        return " OR ".join(f'"{term}"*' for term in terms)
+
+    def _identifier_filter(self, kind, value):
+        if kind == "doi":
+            return (
+                "lower(json_extract(d.source, '$.dataset_doi')) = ? "
+                "OR lower(json_extract(d.source, '$.publication_doi')) = ?",
+                [value, value],
+            )
+        return ("lower(json_extract(d.source, '$.filename')) = ?", [value])
+
+    def _build_filters(self, publication_type, tags, date_from, date_to, community):
+        facet_filters = {}
+
+        normalized_publication_type = self._normalize_publication_type(publication_type)
+        if normalized_publication_type:
+            facet_filters["publication_type"] = ("d.publication_type = ?", [normalized_publication_type])
+
+        if tags:
+            facet_filters["tags"] = (
+                f"d.id IN (SELECT document_id FROM document_tags WHERE tag IN ({self._placeholders(tags)}))",
+                list(tags),
+            )
+
+        dt_from, dt_to = self._normalize_date_range(date_from, date_to)
+        date_clauses, date_params = [], []
+        if dt_from:
+            date_clauses.append("d.created_at >= ?")
+            date_params.append(dt_from.strftime("%Y-%m-%dT00:00:00"))
+        if dt_to:
+            date_clauses.append("d.created_at <= ?")
+            date_params.append(dt_to.strftime("%Y-%m-%dT23:59:59.999999"))
+        if date_clauses:
+            facet_filters["created_at"] = (" AND ".join(date_clauses), date_params)
+
+        community_filter = self._normalize_community_filter(community)
+        if community_filter:
+            facet_filters["community_ids"] = (
+                "d.id IN (SELECT document_id FROM document_communities "
+                f"WHERE community_id IN ({self._placeholders(community_filter)}))",
+                community_filter,
+            )
+
+        return facet_filters
+
+    def _where(self, match_expression, filters):
+        clauses, params = ["1 = 1"], []
+        if match_expression:
+            clauses.append("d.id IN (SELECT rowid FROM documents_fts WHERE documents_fts MATCH ?)")
+            params.append(match_expression)
+        for clause, clause_params in filters:
+            clauses.append(f"({clause})")
+            params.extend(clause_params)
+        return " AND ".join(clauses), params
+
+    def _facet_counts(self, match_expression, facet_filters):
+        def facet_where(facet_name):
+            # Cada faceta aplica el resto de filtros, pero no el suyo propio
+            other_filters = [clause for name, clause in facet_filters.items() if name != facet_name]
+            where, params = self._where(match_expression, other_filters)
+            return f"d.type = 'dataset' AND {where}", params
+
+        def buckets(sql, params):
+            return [{"key": row[0], "count": row[1]} for row in self.conn.execute(sql, params).fetchall()]
+
+        where, params = facet_where("publication_type")
+        publication_types = buckets(
+            f"SELECT d.publication_type, COUNT(*) AS n FROM documents d WHERE {where} "
+            "AND d.publication_type IS NOT NULL GROUP BY d.publication_type ORDER BY n DESC, 1 LIMIT ?",
+            params + [FACET_PUBLICATION_TYPES_SIZE],
+        )
+
+        where, params = facet_where("tags")
+        tags = buckets(
+            f"SELECT t.tag, COUNT(*) AS n FROM document_tags t JOIN documents d ON d.id = t.document_id "
+            f"WHERE {where} GROUP BY t.tag ORDER BY n DESC, 1 LIMIT ?",
+            params + [FACET_TAGS_SIZE],
+        )
+
+        where, params = facet_where("community_ids")
+        communities = buckets(
+            f"SELECT c.community_id, COUNT(*) AS n FROM document_communities c "
+            f"JOIN documents d ON d.id = c.document_id WHERE {where} "
+            "GROUP BY c.community_id ORDER BY n DESC, 1 LIMIT ?",
+            params + [FACET_COMMUNITIES_SIZE],
+        )
+
+        where, params = facet_where("created_at")
+        months = buckets(
+            f"SELECT substr(d.created_at, 1, 7) AS month, COUNT(*) FROM documents d WHERE {where} "
+            "AND d.created_at IS NOT NULL GROUP BY month ORDER BY month",
+            params,
+        )
+
+        where, params = facet_where("size")
+        range_columns, range_params = [], []
+        for size_range in FACET_SIZE_RANGES:
+            conditions = ["d.total_size_in_bytes IS NOT NULL"]
+            if "from" in size_range:
+                conditions.append("d.total_size_in_bytes >= ?")
+                range_params.append(size_range["from"])
+            if "to" in size_range:
+                conditions.append("d.total_size_in_bytes < ?")
+                range_params.append(size_range["to"])
+            range_columns.append(f"COALESCE(SUM(CASE WHEN {' AND '.join(conditions)} THEN 1 ELSE 0 END), 0)")
+        row = self.conn.execute(
+            f"SELECT {', '.join(range_columns)} FROM documents d WHERE {where}", range_params + params
+        ).fetchone()
+        sizes = [{"key": size_range["key"], "count": row[i]} for i, size_range in enumerate(FACET_SIZE_RANGES)]
+
+        return {
+            "publication_type": publication_types,
+            "tags": tags,
+            "community_ids": communities,
+            "created_at": months,
+            "size": sizes,
+        }
+
+    def suggest(self, prefix: str, size=5):
+        prefix = (prefix or "").strip()[:SUGGEST_MAX_PREFIX_LENGTH]
+        if not prefix:
+            return []
+
+        size = max(1, min(int(size), SUGGEST_MAX_SIZE))
+        folded = _fold(prefix)
+
+        # Un rango sobre folded, a diferencia de LIKE, puede recorrer el índice ix_document_suggestions_folded
+        rows = self.conn.execute(
+            "SELECT s.input, d.source FROM document_suggestions s JOIN documents d ON d.id = s.document_id "
+            "WHERE s.folded >= ? AND s.folded < ? ORDER BY s.weight DESC, s.input LIMIT ?",
+            (folded, folded + "\U0010ffff", size * 4),
+        ).fetchall()
+
+        suggestions, seen = [], set()
+        for row in rows:
+            # Equivalente a skip_duplicates del completion suggester
+            if row["input"] in seen:
+                continue
+            seen.add(row["input"])
+            suggestions.append(self._format_suggestion({"text": row["input"], "_source": json.loads(row["source"])}))
+            if len(suggestions) == size:
+                break
+        return suggestions
+
+    def _placeholders(self, values):
+        return ", ".join("?" for _ in values)
@@ -14,6 +14,7 @@ from app.modules.elasticsearch import utils as es_utils
 def _patch_repository_and_sleep(monkeypatch):
     monkeypatch.setattr(es_services, "ElasticsearchRepository", lambda: object())
     monkeypatch.setattr(es_services.time, "sleep", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(es_services, "_elasticsearch_breaker", None)
 
 
 @pytest.fixture(autouse=True)
@@ -67,72 +68,15 @@ def test_service_init_validation_errors(monkeypatch, invalid_name):
         es_services.ElasticsearchService(host="http://fake", index_name=invalid_name)
 
 
-def test_service_init_wait_failure(monkeypatch, es_exceptions):
-    monkeypatch.setattr(es_services, "Elasticsearch", lambda *a, **k: MagicMock())
-    monkeypatch.setattr(
-        es_services.ElasticsearchService,
-        "wait_for_elasticsearch",
-        lambda self, **_: False,
-    )
-    monkeypatch.setattr(
-        es_services.ElasticsearchService,
-        "create_index_if_not_exists",
-        lambda self: None,
-    )
-
-    with pytest.raises(es_exceptions.ConnectionError):
-        es_services.ElasticsearchService(host="http://fake", index_name="validindex")
-
-
-def test_service_init_logs_when_index_creation_fails(monkeypatch):
-    es_client = MagicMock()
-    es_client.ping.return_value = True
-    monkeypatch.setattr(es_services, "Elasticsearch", lambda *a, **k: es_client)
-    monkeypatch.setattr(
-        es_services.ElasticsearchService,
-        "wait_for_elasticsearch",
-        lambda self, **_: True,
-    )
-
-    def raise_creation(self):
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(es_services.ElasticsearchService, "create_index_if_not_exists", raise_creation)
-
-    logger = MagicMock()
-    fake_app = SimpleNamespace(config={}, logger=logger)
-    monkeypatch.setattr(es_services, "current_app", fake_app)
-
-    es_services.ElasticsearchService(host="http://fake", index_name="validindex")
-
-    logger.exception.assert_called_once()
-
-
-def test_service_init_warns_when_no_app_context(monkeypatch, capsys):
+def test_service_init_does_not_contact_elasticsearch(monkeypatch):
     es_client = MagicMock()
-    es_client.ping.return_value = True
     monkeypatch.setattr(es_services, "Elasticsearch", lambda *a, **k: es_client)
-    monkeypatch.setattr(
-        es_services.ElasticsearchService,
-        "wait_for_elasticsearch",
-        lambda self, **_: True,
-    )
-
-    def raise_creation(self):
-        raise RuntimeError("boom")
-
-    monkeypatch.setattr(es_services.ElasticsearchService, "create_index_if_not_exists", raise_creation)
-
-    class NoApp:
-        def __getattr__(self, _):
-            raise RuntimeError("no app context")
-
-    monkeypatch.setattr(es_services, "current_app", NoApp())
 
     es_services.ElasticsearchService(host="http://fake", index_name="validindex")
 
-    captured = capsys.readouterr()
-    assert "[WARN]" in captured.out
+    es_client.ping.assert_not_called()
+    es_client.indices.exists.assert_not_called()
+    es_client.indices.create.assert_not_called()
 
 
 def test_wait_for_elasticsearch_success():
@@ -272,6 +216,55 @@ def test_search_builds_filters_and_formats_hits():
     assert body["sort"][0]["created_at"]["order"] == "asc"
 
 
+def _text_query(client):
+    return client.search.call_args.kwargs["body"]["query"]["bool"]["must"][0]
+
+
+def test_search_auto_mode_uses_keyword_lookup_for_identifiers():
+    client = MagicMock()
+    client.search.return_value = {"hits": {"hits": [], "total": {"value": 0}}}
+    service = make_service(client)
+
+    service.search(query="https://doi.org/10.5281/FitsHub.1")
+    assert _text_query(client)["bool"]["should"] == [
+        {"term": {"dataset_doi": "10.5281/fitshub.1"}},
+        {"term": {"publication_doi": "10.5281/fitshub.1"}},
+    ]
+
+    service.search(query="Galaxy_Field_01.FITS", mode="exact")
+    assert _text_query(client)["bool"]["should"] == [{"term": {"filename.keyword": "galaxy_field_01.fits"}}]
+
+    # Forcing fuzzy mode skips the detection
+    service.search(query="galaxy_field_01.fits", mode="fuzzy")
+    assert "multi_match" in _text_query(client)["bool"]["should"][0]
+
+
+def test_search_modes_bound_the_term_expansion():
+    client = MagicMock()
+    client.search.return_value = {"hits": {"hits": [], "total": {"value": 0}}}
+    service = make_service(client)
+
+    service.search(query="galaxy survey")
+    text_clause, author_clause = _text_query(client)["bool"]["should"]
+    assert text_clause["multi_match"]["fuzziness"] == "AUTO"
+    assert text_clause["multi_match"]["prefix_length"] == es_services.FUZZY_PREFIX_LENGTH
+    assert text_clause["multi_match"]["max_expansions"] == es_services.FUZZY_MAX_EXPANSIONS
+    assert author_clause["nested"]["query"]["multi_match"]["operator"] == "and"
+
+    service.search(query="galaxy surv", mode="prefix")
+    text_clause, _ = _text_query(client)["bool"]["should"]
+    assert text_clause["multi_match"]["type"] == "bool_prefix"
+    assert "fuzziness" not in text_clause["multi_match"]
+
+    service.search(query="galaxy survey", mode="EXACT")
+    text_clause, author_clause = _text_query(client)["bool"]["should"]
+    assert text_clause["multi_match"]["type"] == "phrase"
+    assert author_clause["nested"]["query"]["multi_match"]["type"] == "phrase"
+
+    with pytest.raises(ValueError):
+        service.search(query="galaxy", mode="wildcard")
+
+
 def test_search_ignores_invalid_dates():
     client = MagicMock()
     client.search.return_value = {"hits": {"hits": [], "total": {"value": 0}}}
@@ -304,6 +297,93 @@ def test_search_reraises_other_errors():
         service.search(query="text")
 
 
+def test_search_with_facets_uses_post_filter_and_aggregations():
+    client = MagicMock()
+    client.search.return_value = {
+        "hits": {"hits": [], "total": {"value": 4}},
+        "aggregations": {
+            "publication_type": {"values": {"buckets": [{"key": "article", "doc_count": 3}]}},
+            "created_at": {"values": {"buckets": [{"key": 1704067200000, "key_as_string": "2024-01", "doc_count": 4}]}},
+        },
+    }
+    service = make_service(client)
+
+    results, total, facets = service.search_with_facets(
+        query="galaxy",
+        publication_type="article",
+        tags=["science"],
+        community="3",
+    )
+
+    assert (results, total) == ([], 4)
+    assert facets["publication_type"] == [{"key": "article", "count": 3}]
+    assert facets["created_at"] == [{"key": "2024-01", "count": 4}]
+
+    body = client.search.call_args.kwargs["body"]
+    assert "filter" not in body["query"]["bool"]
+    assert len(body["post_filter"]["bool"]["filter"]) == 3
+
+    type_facet_filters = body["aggs"]["publication_type"]["filter"]["bool"]["filter"]
+    assert {"term": {"type": "dataset"}} in type_facet_filters
+    assert {"term": {"publication_type": "article"}} not in type_facet_filters
+    assert {"terms": {"tags.keyword": ["science"]}} in type_facet_filters
+
+    tags_facet = body["aggs"]["tags"]
+    assert tags_facet["aggs"]["values"]["terms"]["field"] == "tags.keyword"
+    assert {"terms": {"tags.keyword": ["science"]}} not in tags_facet["filter"]["bool"]["filter"]
+    assert set(body["aggs"]) == {"publication_type", "tags", "community_ids", "created_at", "size"}
+
+
+def test_search_with_facets_handles_not_found(es_exceptions):
+    client = MagicMock()
+    client.search.side_effect = es_exceptions.NotFoundError("missing")
+    service = make_service(client)
+    service.create_index_if_not_exists = MagicMock()
+
+    assert service.search_with_facets(query="any") == ([], 0, {})
+
+
+def test_suggest_queries_completion_field_with_limits():
+    client = MagicMock()
+    client.search.return_value = {
+        "suggest": {
+            "autocomplete": [
+                {
+                    "options": [
+                        {"text": "Galaxy survey", "_source": {"type": "dataset", "id": 4, "url": "http://x/doi/1"}},
+                        {
+                            "text": "galaxy.fits",
+                            "_source": {"type": "hubfile", "id": 9, "dataset_doi": "http://x/doi/2"},
+                        },
+                    ]
+                }
+            ]
+        }
+    }
+    service = make_service(client)
+
+    suggestions = service.suggest("  gal ", size=500)
+
+    assert suggestions == [
+        {"text": "Galaxy survey", "type": "dataset", "id": 4, "url": "http://x/doi/1"},
+        {"text": "galaxy.fits", "type": "hubfile", "id": 9, "url": "http://x/doi/2"},
+    ]
+    call_kwargs = client.search.call_args.kwargs
+    assert call_kwargs["size"] == 0
+    completion = call_kwargs["body"]["suggest"]["autocomplete"]
+    assert completion["prefix"] == "gal"
+    assert completion["completion"]["field"] == "suggest"
+    assert completion["completion"]["size"] == es_services.SUGGEST_MAX_SIZE
+
+
+def test_suggest_skips_empty_prefix():
+    client = MagicMock()
+    service = make_service(client)
+
+    assert service.suggest("   ") == []
+    client.search.assert_not_called()
+
+
 def test_format_hit_handles_invalid_date_and_size():
     service = make_service(MagicMock())
     hit = {"_source": {"created_at": "not-a-date", "total_size_in_bytes": 0}}
@@ -366,9 +446,16 @@ def test_init_search_index_success(monkeypatch):
     created = {}
 
     class DummyService:
+        retry_attempts = 5
+        retry_delay = 2
+
         def __init__(self):
             created["instance"] = self
 
+        def wait_for_elasticsearch(self, retries, delay):
+            created["waited"] = (retries, delay)
+            return True
+
         def create_index_if_not_exists(self):
             created["called"] = True
 
@@ -376,9 +463,29 @@ def test_init_search_index_success(monkeypatch):
 
     es_utils.init_search_index()
 
+    assert created.get("waited") == (5, 2)
     assert created.get("called") is True
 
 
+def test_init_search_index_fails_when_elasticsearch_never_answers(monkeypatch):
+    from elasticsearch import ConnectionError as ESConnectionError
+
+    class DummyService:
+        retry_attempts = 2
+        retry_delay = 0
+        host = "http://fake"
+        create_index_if_not_exists = MagicMock()
+
+        def wait_for_elasticsearch(self, retries, delay):
+            return False
+
+    monkeypatch.setattr(es_services, "ElasticsearchService", DummyService)
+
+    with pytest.raises(ESConnectionError):
+        es_utils.init_search_index()
+    DummyService.create_index_if_not_exists.assert_not_called()
+
+
 def test_init_search_index_propagates_errors(monkeypatch):
     class DummyService:
         def __init__(self):
@@ -441,6 +548,11 @@ def test_index_dataset_indexes_payload(monkeypatch):
     assert recorded["doc_id"] == "dataset-42"
     assert recorded["data"]["authors"][0]["name"] == "Alice"
     assert recorded["data"]["tags"] == ["science", "data"]
+    assert recorded["data"]["suggest"] == [
+        {"input": ["Dataset"], "weight": 10},
+        {"input": ["science", "data"], "weight": 6},
+        {"input": ["Alice"], "weight": 4},
+    ]
 
 
 def test_index_hubfile_skips_without_dataset(monkeypatch):
@@ -522,3 +634,647 @@ def test_reindex_all_invokes_helpers(monkeypatch):
 
     assert ("dataset", 1) in calls and ("dataset", 2) in calls
     assert ("hubfile", 3) in calls
+
+
+def test_bulk_sends_actions_to_index(monkeypatch):
+    service = make_service()
+    calls = {}
+
+    def fake_bulk(client, actions, **kwargs):
+        calls["client"] = client
+        calls["actions"] = list(actions)
+        calls["kwargs"] = kwargs
+        return len(calls["actions"]), []
+
+    monkeypatch.setattr(es_services.helpers, "bulk", fake_bulk)
+
+    actions = [{"_op_type": "index", "_id": "dataset-1", "_source": {"id": 1}}]
+    assert service.bulk(actions) == 1
+    assert calls["client"] is service.es
+    assert calls["actions"] == actions
+    assert calls["kwargs"]["index"] == "test-index"
+    assert calls["kwargs"]["ignore_status"] == (404,)
+
+
+def test_bulk_skips_empty_actions(monkeypatch):
+    service = make_service()
+    monkeypatch.setattr(es_services.helpers, "bulk", MagicMock())
+
+    assert service.bulk([]) == 0
+    es_services.helpers.bulk.assert_not_called()
+
+
+def test_delete_stale_hubfiles_keeps_current_files():
+    es = MagicMock()
+    service = make_service(es)
+
+    service.delete_stale_hubfiles([1, 2], [10, 11])
+
+    kwargs = es.delete_by_query.call_args.kwargs
+    assert kwargs["index"] == "test-index"
+    assert kwargs["conflicts"] == "proceed"
+    query = kwargs["query"]["bool"]
+    assert {"term": {"type": "hubfile"}} in query["filter"]
+    assert {"terms": {"dataset_id": [1, 2]}} in query["filter"]
+    assert query["must_not"] == [{"terms": {"id": [10, 11]}}]
+
+
+def make_outbox_service(batches):
+    service = object.__new__(es_services.SearchIndexOutboxService)
+    service.repository = MagicMock()
+    service.repository.get_settled_batch.side_effect = batches
+    service.repository.get_pending_fields.return_value = {}
+    return service
+
+
+def test_outbox_drain_reindexes_batch_and_deletes_entries(monkeypatch):
+    search = MagicMock()
+    monkeypatch.setattr(es_services, "ElasticsearchService", lambda: search)
+    service = make_outbox_service([[(1, 5), (2, 7)], []])
+    actions = [{"_op_type": "index", "_id": "dataset-1"}, {"_op_type": "delete", "_id": "dataset-2"}]
+    monkeypatch.setattr(service, "_build_bulk_actions", lambda dataset_ids: (actions, [10]))
+
+    assert service.drain_all(debounce_seconds=0, batch_size=50) == 2
+
+    search.bulk.assert_called_once_with(actions)
+    search.delete_stale_hubfiles.assert_called_once_with([1, 2], [10])
+    service.repository.delete_processed.assert_called_once_with([1, 2], 7)
+    assert service.repository.get_settled_batch.call_args.args[1] == 50
+
+
+def test_outbox_drain_applies_partial_updates(monkeypatch):
+    search = MagicMock()
+    search.update_documents.return_value = []
+    monkeypatch.setattr(es_services, "ElasticsearchService", lambda: search)
+    service = make_outbox_service([[(1, 5), (2, 6)], []])
+    service.repository.get_pending_fields.return_value = {1: {"community_ids", "title"}, 2: None}
+    update = {"_op_type": "update", "_id": "dataset-1", "doc": {"community_ids": [3], "title": "New"}}
+    partial_calls = []
+
+    def fake_partial_updates(partial):
+        partial_calls.append(partial)
+        return [update], [(1, {"community_ids": [3], "dataset_title": "New"})], []
+
+    monkeypatch.setattr(service, "_build_partial_updates", fake_partial_updates)
+    monkeypatch.setattr(service, "_build_bulk_actions", lambda dataset_ids: ([{"_id": "dataset-2"}], [10]))
+
+    assert service.drain_all(debounce_seconds=0) == 2
+
+    assert partial_calls == [{1: {"community_ids", "title"}}]
+    search.update_documents.assert_called_once_with([update])
+    search.bulk.assert_called_once_with([{"_id": "dataset-2"}])
+    # Only fully reindexed datasets get their stale hubfiles removed
+    search.delete_stale_hubfiles.assert_called_once_with([2], [10])
+    search.update_dataset_hubfiles.assert_called_once_with(1, {"community_ids": [3], "dataset_title": "New"})
+
+
+def test_outbox_drain_fully_indexes_documents_missing_for_partial_updates(monkeypatch):
+    search = MagicMock()
+    search.update_documents.return_value = ["dataset-1"]
+    monkeypatch.setattr(es_services, "ElasticsearchService", lambda: search)
+    service = make_outbox_service([[(1, 5)], []])
+    service.repository.get_pending_fields.return_value = {1: {"title"}}
+    update = {"_op_type": "update", "_id": "dataset-1", "doc": {"title": "New"}}
+    monkeypatch.setattr(
+        service, "_build_partial_updates", lambda partial: ([update], [(1, {"dataset_title": "New"})], [])
+    )
+    built = []
+
+    def fake_bulk_actions(dataset_ids):
+        built.append(dataset_ids)
+        return [{"_op_type": "index", "_id": "dataset-1"}], [10]
+
+    monkeypatch.setattr(service, "_build_bulk_actions", fake_bulk_actions)
+
+    assert service.drain_all(debounce_seconds=0) == 1
+
+    assert built == [[1]]
+    search.bulk.assert_called_once_with([{"_op_type": "index", "_id": "dataset-1"}])
+    search.delete_stale_hubfiles.assert_called_once_with([1], [10])
+    search.update_dataset_hubfiles.assert_not_called()
+
+
+def test_update_documents_returns_missing_ids(monkeypatch):
+    service = make_service()
+    errors = [{"update": {"_id": "dataset-2", "status": 404}}]
+    bulk = MagicMock(return_value=(1, errors))
+    monkeypatch.setattr(es_services.helpers, "bulk", bulk)
+
+    actions = [{"_op_type": "update", "_id": f"dataset-{i}", "doc": {"title": "x"}} for i in (1, 2)]
+    assert service.update_documents(actions) == ["dataset-2"]
+    assert bulk.call_args.kwargs["ignore_status"] == (404,)
+    assert service.update_documents([]) == []
+
+
+def test_update_dataset_hubfiles_uses_update_by_query():
+    es = MagicMock()
+    service = make_service(es)
+
+    service.update_dataset_hubfiles(4, {"community_ids": [1, 2]})
+
+    kwargs = es.update_by_query.call_args.kwargs
+    assert kwargs["index"] == "test-index"
+    assert kwargs["conflicts"] == "proceed"
+    assert {"term": {"dataset_id": 4}} in kwargs["query"]["bool"]["filter"]
+    assert {"term": {"type": "hubfile"}} in kwargs["query"]["bool"]["filter"]
+    assert kwargs["script"]["lang"] == "painless"
+    assert kwargs["script"]["params"] == {"fields": {"community_ids": [1, 2]}}
+
+
+def test_build_partial_documents_only_include_changed_fields(monkeypatch):
+    monkeypatch.setattr(es_utils, "_accepted_community_ids", lambda dataset: [5])
+    metadata = SimpleNamespace(
+        title="Renamed",
+        description="Desc",
+        publication_doi=None,
+        tags="a, b",
+        authors=[SimpleNamespace(name="Alice")],
+    )
+    dataset = SimpleNamespace(id=1, ds_meta_data=metadata)
+
+    assert es_utils.build_dataset_partial_document(dataset, {"community_ids"}) == {"community_ids": [5]}
+    assert es_utils.build_hubfile_partial_document(dataset, {"tags"}) == {}
+
+    document = es_utils.build_dataset_partial_document(dataset, {"tags"})
+    assert document["tags"] == ["a", "b"]
+    assert set(document) == {"tags", "suggest"}
+
+    assert es_utils.build_hubfile_partial_document(dataset, {"title", "community_ids"}) == {
+        "community_ids": [5],
+        "dataset_title": "Renamed",
+    }
+
+
+def test_outbox_drain_keeps_entries_when_bulk_fails(monkeypatch, es_exceptions):
+    search = MagicMock()
+    search.bulk.side_effect = es_exceptions.ConnectionError("down")
+    monkeypatch.setattr(es_services, "ElasticsearchService", lambda: search)
+    service = make_outbox_service([[(1, 3)]])
+    monkeypatch.setattr(service, "_build_bulk_actions", lambda dataset_ids: ([], []))
+
+    with pytest.raises(es_exceptions.ConnectionError):
+        service.drain()
+
+    service.repository.delete_processed.assert_not_called()
+
+
+def test_outbox_records_dataset_changes_in_same_transaction(test_client):
+    from app import db
+    from app.modules.auth.models import User
+    from app.modules.dataset.models import DataSet, DSMetaData, PublicationType
+    from app.modules.elasticsearch.models import SearchIndexOutbox
+
+    user = User.query.filter_by(email="test@example.com").first()
+    metadata = DSMetaData(
+        title="Outbox dataset",
+        description="Outbox description",
+        publication_type=PublicationType.NONE,
+        dataset_doi="10.1234/outbox",
+    )
+    dataset = DataSet(user_id=user.id, ds_meta_data=metadata)
+    db.session.add(dataset)
+    db.session.commit()
+
+    entries = SearchIndexOutbox.query.filter_by(dataset_id=dataset.id).all()
+    assert len(entries) == 1
+
+    # Download counter bumps are not part of the search document
+    dataset.download_counter += 1
+    db.session.commit()
+    assert SearchIndexOutbox.query.filter_by(dataset_id=dataset.id).count() == 1
+
+    # Title and tag edits are recorded as partial updates, other metadata edits as full reindexes
+    metadata.title = "Outbox dataset renamed"
+    metadata.tags = "outbox"
+    db.session.commit()
+    metadata.description = "New description"
+    db.session.commit()
+    entries = SearchIndexOutbox.query.filter_by(dataset_id=dataset.id).order_by(SearchIndexOutbox.id).all()
+    assert [entry.partial_fields for entry in entries] == [None, "tags,title", None]
+
+    db.session.rollback()
+    metadata.title = "Rolled back title"
+    db.session.flush()
+    db.session.rollback()
+    assert SearchIndexOutbox.query.filter_by(dataset_id=dataset.id).count() == 3
+
+    from app.modules.elasticsearch.repositories import SearchIndexOutboxRepository
+
+    repository = SearchIndexOutboxRepository()
+    assert repository.get_pending_fields([dataset.id], entries[1].id) == {dataset.id: None}
+    SearchIndexOutbox.query.filter(SearchIndexOutbox.id != entries[1].id).delete()
+    db.session.commit()
+    assert repository.get_pending_fields([dataset.id], entries[1].id) == {dataset.id: {"tags", "title"}}
+
+
+def make_sqlite_backend():
+    from app.modules.elasticsearch.sqlite_backend import SQLiteSearchBackend
+
+    backend = SQLiteSearchBackend(path=":memory:")
+    backend.bulk(
+        [
+            {
+                "_op_type": "index",
+                "_id": "dataset-1",
+                "_source": {
+                    "type": "dataset",
+                    "id": 1,
+                    "title": "Galaxy survey",
+                    "description": "Deep field observations",
+                    "dataset_doi": "10.5281/fitshub.1",
+                    "authors": [{"name": "Ana Pérez", "affiliation": "US"}],
+                    "tags": ["galaxy", "survey"],
+                    "publication_type": "article",
+                    "community_ids": [3],
+                    "created_at": "2024-01-10T10:00:00",
+                    "total_size_in_bytes": 2048,
+                    "suggest": [{"input": ["Galaxy survey"], "weight": 10}],
+                },
+            },
+            {
+                "_op_type": "index",
+                "_id": "dataset-2",
+                "_source": {
+                    "type": "dataset",
+                    "id": 2,
+                    "title": "Stellar spectra",
+                    "description": "Spectra of nearby galaxy stars",
+                    "authors": [{"name": "Luis Gómez"}],
+                    "tags": ["stars"],
+                    "publication_type": "report",
+                    "community_ids": [],
+                    "created_at": "2024-03-05T09:00:00",
+                    "total_size_in_bytes": 5 * 1024**2,
+                    "suggest": [{"input": ["Stellar spectra"], "weight": 10}, {"input": ["Galaxy"], "weight": 6}],
+                },
+            },
+            {
+                "_op_type": "index",
+                "_id": "hubfile-7",
+                "_source": {
+                    "type": "hubfile",
+                    "id": 7,
+                    "filename": "galaxy_field_01.fits",
+                    "dataset_id": 1,
+                    "community_ids": [3],
+                    "suggest": [{"input": ["galaxy_field_01.fits"], "weight": 3}],
+                },
+            },
+        ]
+    )
+    return backend
+
+
+def test_sqlite_backend_search_ranks_and_paginates():
+    backend = make_sqlite_backend()
+
+    results, total = backend.search(query="galaxy", sorting="relevance", page=1, size=2)
+    assert total == 3
+    assert [hit["id"] for hit in results] == [1, 7]
+    assert results[0]["created_at"] == "10 Jan 2024, 10:00"
+    assert results[0]["total_size_in_human_format"] == "2.0 KB"
+
+    results, total = backend.search(query="galaxy", sorting="newest", page=2, size=2)
+    assert total == 3
+    assert [hit["id"] for hit in results] == [7]
+
+    # Prefijos y diacríticos, como el analizador de Elasticsearch
+    results, _ = backend.search(query="perez")
+    assert [hit["id"] for hit in results] == [1]
+    results, _ = backend.search(query="spectr")
+    assert [hit["id"] for hit in results] == [2]
+
+
+def test_sqlite_backend_applies_filters():
+    backend = make_sqlite_backend()
+
+    results, total = backend.search(query="", publication_type="report")
+    assert total == 1 and results[0]["id"] == 2
+
+    results, _ = backend.search(query="", tags=["survey"])
+    assert [hit["id"] for hit in results] == [1]
+
+    results, _ = backend.search(query="", date_from="2024-02-01", date_to="2024-03-05")
+    assert [hit["id"] for hit in results] == [2]
+
+    results, _ = backend.search(query="", community="3", sorting="oldest")
+    assert [hit["id"] for hit in results] == [1, 7]
+
+    with pytest.raises(ValueError):
+        backend.search(query="", community="abc")
+
+
+def test_sqlite_backend_facets_exclude_own_filter():
+    backend = make_sqlite_backend()
+
+    results, total, facets = backend.search_with_facets(query="", publication_type="article")
+
+    assert total == 1
+    assert facets["publication_type"] == [{"key": "article", "count": 1}, {"key": "report", "count": 1}]
+    assert facets["tags"] == [{"key": "galaxy", "count": 1}, {"key": "survey", "count": 1}]
+    assert facets["community_ids"] == [{"key": 3, "count": 1}]
+    assert facets["created_at"] == [{"key": "2024-01", "count": 1}]
+    assert {"key": "< 1 MB", "count": 1} in facets["size"]
+
+
+def test_sqlite_backend_keeps_index_in_sync():
+    backend = make_sqlite_backend()
+
+    backend.index_document(
+        "dataset-2",
+        {"type": "dataset", "id": 2, "title": "Renamed", "created_at": "2024-03-05T09:00:00", "tags": []},
+    )
+    _, total = backend.search(query="spectra")
+    assert total == 0
+
+    backend.delete_stale_hubfiles([1], [])
+    _, total = backend.search(query="galaxy")
+    assert total == 1
+
+    backend.delete_document("dataset-1")
+    backend.delete_document("dataset-404")
+    _, total = backend.search(query="")
+    assert total == 1
+
+
+def test_sqlite_backend_suggest_matches_prefix():
+    backend = make_sqlite_backend()
+
+    suggestions = backend.suggest("gal", size=5)
+
+    assert [suggestion["text"] for suggestion in suggestions] == ["Galaxy survey", "Galaxy", "galaxy_field_01.fits"]
+    assert suggestions[0]["id"] == 1
+    assert backend.suggest("  ") == []
+    assert backend.suggest("100%") == []
+
+
+def test_sqlite_backend_gives_each_thread_its_own_connection():
+    import threading
+
+    from app.modules.elasticsearch.sqlite_backend import SQLITE_IDLE_CONNECTIONS
+
+    backend = make_sqlite_backend()
+    barrier = threading.Barrier(SQLITE_IDLE_CONNECTIONS + 3)
+    seen = []
+
+    def search_in_thread():
+        barrier.wait()
+        seen.append((backend.conn, backend.search(query="galaxy")[0]))
+        barrier.wait()
+        backend.release_connection()
+
+    threads = [threading.Thread(target=search_in_thread) for _ in range(SQLITE_IDLE_CONNECTIONS + 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # An in-memory index is shared by every thread of the backend
+    assert len({id(conn) for conn, _ in seen}) == len(threads)
+    assert all(results == backend.search(query="galaxy")[0] != [] for _, results in seen)
+    # Released connections are kept for reuse up to a limit, the rest are closed
+    backend.release_connection()
+    assert len(backend._connections) == SQLITE_IDLE_CONNECTIONS
+    backend.close()
+
+
+def test_sqlite_backend_matches_nothing_for_a_query_without_terms():
+    backend = make_sqlite_backend()
+
+    assert backend.search(query="!!!") == ([], 0)
+    assert backend.search_with_facets(query="-")[1] == 0
+    assert backend.search(query="   ")[1] > 0
+    backend.close()
+
+
+def test_get_search_backend_uses_configuration(test_app, monkeypatch):
+    from app.modules.elasticsearch.sqlite_backend import SQLiteSearchBackend
+
+    monkeypatch.setitem(test_app.config, "SEARCH_BACKEND", "sqlite")
+    monkeypatch.setitem(test_app.config, "SEARCH_SQLITE_PATH", ":memory:")
+    monkeypatch.setitem(test_app.extensions, "sqlite_search_backends", {})
+    backend = es_services.get_search_backend()
+    assert isinstance(backend, SQLiteSearchBackend)
+    # The backend, and so its schema and connections, is built once per application
+    assert es_services.get_search_backend() is backend
+    with test_app.app_context():
+        connection = es_services.get_search_backend().conn
+    # Ending the context hands the connection back for the next one
+    assert getattr(backend._local, "conn", None) is None
+    assert backend._idle == [connection]
+    backend.close()
+
+    monkeypatch.setitem(test_app.config, "SEARCH_BACKEND", "elasticsearch")
+    monkeypatch.setattr(es_services, "ElasticsearchService", lambda: "es")
+    assert es_services.get_search_backend() == "es"
+
+    monkeypatch.setitem(test_app.config, "SEARCH_BACKEND", "solr")
+    with pytest.raises(ValueError):
+        es_services.get_search_backend()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_after_threshold_and_recovers():
+    from app.modules.elasticsearch.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+    clock = FakeClock()
+    on_close = MagicMock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, on_close=on_close, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now = 31
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    # Only one trial call goes through while half-open
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    on_close.assert_called_once()
+
+
+def test_circuit_breaker_reopens_when_trial_fails():
+    from app.modules.elasticsearch.circuit_breaker import HALF_OPEN, OPEN, CircuitBreaker
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    failing = MagicMock(side_effect=es_services.ConnectionError("down"))
+
+    with pytest.raises(es_services.ConnectionError):
+        breaker.call(failing, failure_exceptions=(es_services.ConnectionError,))
+    assert breaker.state == OPEN
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(es_services.ConnectionError):
+        breaker.call(failing, failure_exceptions=(es_services.ConnectionError,))
+    assert breaker.state == OPEN
+    assert failing.call_count == 2
+
+
+def test_search_failures_open_shared_breaker(es_exceptions):
+    from app.modules.elasticsearch.circuit_breaker import CircuitOpenError
+
+    es = MagicMock()
+    es.search.side_effect = es_exceptions.ConnectionError("down")
+    service = make_service(es)
+
+    for _ in range(3):
+        with pytest.raises(es_exceptions.ConnectionError):
+            service.search(query="galaxy")
+
+    with pytest.raises(CircuitOpenError):
+        service.search(query="galaxy")
+    assert es.search.call_count == 3
+
+
+def test_service_fails_fast_when_breaker_open(monkeypatch):
+    from app.modules.elasticsearch.circuit_breaker import CircuitOpenError
+
+    for _ in range(3):
+        es_services.get_elasticsearch_breaker().record_failure()
+
+    es = MagicMock()
+    service = make_service(es)
+
+    with pytest.raises(CircuitOpenError):
+        service.search(query="galaxy")
+    es.search.assert_not_called()
+
+
+def test_circuit_breaker_releases_trial_when_call_is_interrupted():
+    from app.modules.elasticsearch.circuit_breaker import HALF_OPEN, CircuitBreaker
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+
+    with pytest.raises(KeyboardInterrupt):
+        breaker.call(MagicMock(side_effect=KeyboardInterrupt))
+
+    # The next caller gets its own trial instead of failing fast forever
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(MagicMock(return_value="ok")) == "ok"
+
+
+def test_index_dataset_queues_write_when_search_unavailable(monkeypatch):
+    from elasticsearch import ConnectionError as ESConnectionError
+
+    from app.modules.elasticsearch import repositories as es_repositories
+
+    class BrokenService:
+        def __init__(self):
+            raise ESConnectionError("down")
+
+    repository = MagicMock()
+    monkeypatch.setattr(es_services, "ElasticsearchService", BrokenService)
+    monkeypatch.setattr(es_repositories, "SearchIndexOutboxRepository", lambda: repository)
+
+    dataset = SimpleNamespace(id=9, ds_meta_data=SimpleNamespace(dataset_doi="10.1/doi"))
+    es_utils.index_dataset(dataset)
+
+    repository.create.assert_called_once_with(dataset_id=9)
+
+
+def test_sqlite_backend_applies_partial_updates():
+    backend = make_sqlite_backend()
+
+    backend.bulk([{"_op_type": "update", "_id": "dataset-1", "doc": {"title": "Nebula survey", "community_ids": []}}])
+    backend.update_dataset_hubfiles(1, {"community_ids": [], "dataset_title": "Nebula survey"})
+
+    results, _ = backend.search(query="nebula")
+    assert [hit["id"] for hit in results] == [1]
+    assert results[0]["tags"] == ["galaxy", "survey"]
+
+    _, total = backend.search(query="", community="3")
+    assert total == 0
+
+    # Updating a document that was never indexed is ignored, like a 404 in Elasticsearch
+    assert backend.bulk([{"_op_type": "update", "_id": "dataset-404", "doc": {"title": "x"}}]) == 1
+    assert backend.update_documents([{"_op_type": "update", "_id": "dataset-404", "doc": {"title": "x"}}]) == [
+        "dataset-404"
+    ]
+
+
+def test_synthetic_corpus_is_reproducible():
+    from app.modules.elasticsearch.benchmark import SyntheticCorpus
+
+    first = SyntheticCorpus(datasets=20, seed=7)
+    second = SyntheticCorpus(datasets=20, seed=7)
+
+    assert first.datasets == second.datasets
+    assert first.query_mix(5) == second.query_mix(5)
+    assert SyntheticCorpus(datasets=20, seed=8).datasets != first.datasets
+    assert all(hubfile["filename"].endswith(".fits") for hubfile in first.hubfiles)
+
+
+def test_benchmark_percentile_uses_nearest_rank():
+    from app.modules.elasticsearch.benchmark import compare_reports, percentile
+
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+    baseline = {"queries": {"typo": {"latency_ms": {"p95": 10.0}}}}
+    current = {"queries": {"typo": {"latency_ms": {"p95": 12.0}}}}
+    assert compare_reports(baseline, current) == {"typo": 0.2}
+
+
+def test_benchmark_runs_against_sqlite_backend():
+    from app.modules.elasticsearch.benchmark import QUERY_CATEGORIES, run_benchmark
+    from app.modules.elasticsearch.sqlite_backend import SQLiteSearchBackend
+
+    backend = SQLiteSearchBackend(path=":memory:")
+    backend.create_index_if_not_exists()
+
+    report = run_benchmark(backend, "sqlite", datasets=30, seed=1, queries_per_category=3)
+
+    assert report["load"]["documents"] == report["corpus"]["datasets"] + report["corpus"]["hubfiles"]
+    assert set(report["queries"]) == set(QUERY_CATEGORIES)
+    assert report["queries"]["empty"]["queries"] == 3
+    assert report["queries"]["empty"]["latency_ms"]["p50"] is not None
+    # The embedded engine has no server-side timing
+    assert report["queries"]["empty"]["took_ms"]["p50"] is None
+    assert report["queries"]["multi_term"]["relevance"]["mrr"] > 0
+
+
+def test_sqlite_backend_search_modes():
+    backend = make_sqlite_backend()
+
+    results, _ = backend.search(query="doi:10.5281/FITSHUB.1")
+    assert [hit["id"] for hit in results] == [1]
+
+    results, _ = backend.search(query="galaxy_field_01.fits")
+    assert [(hit["type"], hit["id"]) for hit in results] == [("hubfile", 7)]
+
+    # The phrase must appear in order; prefix mode matches each term on its own
+    _, total = backend.search(query="survey galaxy", mode="exact")
+    assert total == 0
+    results, _ = backend.search(query="galaxy surv", mode="exact")
+    assert results == []
+    results, _ = backend.search(query="galaxy survey", mode="exact")
+    assert [hit["id"] for hit in results] == [1]
+    _, total = backend.search(query="surv", mode="prefix")
+    assert total == 1
+
+    with pytest.raises(ValueError):
+        backend.search(query="galaxy", mode="wildcard")
@@ -1,5 +1,8 @@
 import logging
 
+from elasticsearch import ConnectionError as ESConnectionError
+from elasticsearch import ConnectionTimeout
+
 from app.modules.community.models import CommunityDataSetStatus
 
 logger = logging.getLogger(__name__)
@@ -7,9 +10,15 @@ logger = logging.getLogger(__name__)
 
 def init_search_index():
     try:
-        from app.modules.elasticsearch.services import ElasticsearchService
+        from app.modules.elasticsearch import services
+
+        search = services.get_search_backend()
 
-        search = ElasticsearchService()
+        # Waiting for Elasticsearch belongs to startup; requests rely on the circuit breaker instead
+        if isinstance(search, services.ElasticsearchService) and not search.wait_for_elasticsearch(
+            retries=search.retry_attempts, delay=search.retry_delay
+        ):
+            raise ESConnectionError(f"No se pudo conectar a Elasticsearch en el host proporcionado: {search.host}")
 
         search.create_index_if_not_exists()
     except Exception as e:
@@ -20,6 +29,10 @@ def init_search_index():
 def _accepted_community_ids(dataset):
     if not dataset:
         return []
+    # Eager loadable, unlike the dynamic community_associations
+    communities = getattr(dataset, "accepted_communities", None)
+    if communities is not None:
+        return [community.id for community in communities]
     associations = getattr(dataset, "community_associations", None)
     if associations is None:
         return []
@@ -32,16 +45,41 @@ def _accepted_community_ids(dataset):
     ]
 
 
-def index_dataset(dataset):
-    from app.modules.elasticsearch.services import ElasticsearchService
+def _suggest_entries(*groups):
+    """Build completion-suggester inputs from (values, weight) groups, skipping empty values."""
+    entries = []
+    for values, weight in groups:
+        inputs = [value.strip() for value in values if value and value.strip()]
+        if inputs:
+            entries.append({"input": inputs, "weight": weight})
+    return entries
 
-    search = ElasticsearchService()
 
-    if not dataset.ds_meta_data.dataset_doi:
-        print(f"[SKIP] Dataset {dataset.id} has no dataset_doi. Skipping indexing.")
-        return
+def _dataset_tags(dataset):
+    return [t.strip() for t in dataset.ds_meta_data.tags.split(",")] if dataset.ds_meta_data.tags else []
+
 
-    doc = {
+def _dataset_content(dataset):
+    return (
+        f"{dataset.ds_meta_data.title} "
+        f"{dataset.ds_meta_data.description} "
+        f"{dataset.ds_meta_data.publication_doi} "
+        f"{' '.join(a.name for a in dataset.ds_meta_data.authors)}"
+    )
+
+
+def _dataset_suggest(dataset, tags):
+    return _suggest_entries(
+        ([dataset.ds_meta_data.title], 10),
+        (tags, 6),
+        ([a.name for a in dataset.ds_meta_data.authors], 4),
+    )
+
+
+def build_dataset_document(dataset):
+    tags = _dataset_tags(dataset)
+
+    return {
         "type": "dataset",
         "id": dataset.id,
         "community_ids": _accepted_community_ids(dataset),
@@ -58,39 +96,46 @@ def index_dataset(dataset):
             }
             for a in dataset.ds_meta_data.authors
         ],
-        "tags": ([t.strip() for t in dataset.ds_meta_data.tags.split(",")] if dataset.ds_meta_data.tags else []),
+        "tags": tags,
         "publication_type": (
             dataset.ds_meta_data.publication_type.value if dataset.ds_meta_data.publication_type else None
         ),
         "publication_type_label": dataset.get_cleaned_publication_type(),
-        "content": (
-            f"{dataset.ds_meta_data.title} "
-            f"{dataset.ds_meta_data.description} "
-            f"{dataset.ds_meta_data.publication_doi} "
-            f"{' '.join(a.name for a in dataset.ds_meta_data.authors)}"
-        ),
+        "content": _dataset_content(dataset),
         "created_at": dataset.created_at.isoformat(),
         "total_size_in_bytes": dataset.get_file_total_size(),
         "files_count": dataset.get_files_count(),
+        "suggest": _dataset_suggest(dataset, tags),
     }
 
-    search.index_document(doc_id=f"dataset-{dataset.id}", data=doc)
 
-    logger.info(f"[SEARCH] Dataset {dataset.id} indexed with DOI: {dataset.ds_meta_data.dataset_doi}")
-
-
-def index_hubfile(hubfile):
-    from app.modules.elasticsearch.services import ElasticsearchService
-
-    search = ElasticsearchService()
-
-    dataset = hubfile.fits_model.data_set if hubfile.fits_model else None
-
-    if not dataset or not dataset.ds_meta_data.dataset_doi:
-        print(f"[SKIP] Hubfile {hubfile.id} skipped (no dataset or dataset has no DOI).")
-        return
-
-    doc = {
+def build_dataset_partial_document(dataset, fields):
+    """Only the dataset document fields affected by a change to ``fields`` (community_ids, title, tags)."""
+    document = {}
+    if "community_ids" in fields:
+        document["community_ids"] = _accepted_community_ids(dataset)
+    if "title" in fields:
+        document["title"] = dataset.ds_meta_data.title
+        document["content"] = _dataset_content(dataset)
+    if "tags" in fields:
+        document["tags"] = _dataset_tags(dataset)
+    if "title" in fields or "tags" in fields:
+        document["suggest"] = _dataset_suggest(dataset, _dataset_tags(dataset))
+    return document
+
+
+def build_hubfile_partial_document(dataset, fields):
+    """Fields copied from the dataset into each of its hubfile documents; tags are not among them."""
+    document = {}
+    if "community_ids" in fields:
+        document["community_ids"] = _accepted_community_ids(dataset)
+    if "title" in fields:
+        document["dataset_title"] = dataset.ds_meta_data.title
+    return document
+
+
+def build_hubfile_document(hubfile, dataset):
+    return {
         "type": "hubfile",
         "id": hubfile.id,
         "filename": hubfile.name,
@@ -103,9 +148,51 @@ def index_hubfile(hubfile):
         "checksum": hubfile.checksum,
         "size_in_bytes": hubfile.size,
         "size_in_human_format": hubfile.get_formatted_size(),
+        "suggest": _suggest_entries(([hubfile.name], 3)),
     }
 
-    search.index_document(doc_id=f"hubfile-{hubfile.id}", data=doc)
+
+def _queue_for_replay(dataset_id, exc):
+    """Keep the write in the search index outbox so it is replayed once Elasticsearch is back."""
+    from app.modules.elasticsearch.repositories import SearchIndexOutboxRepository
+
+    print(f"[QUEUE] Search backend unavailable ({exc}). Dataset {dataset_id} queued for reindexing.")
+    SearchIndexOutboxRepository().create(dataset_id=dataset_id)
+
+
+def index_dataset(dataset):
+    from app.modules.elasticsearch.services import get_search_backend
+
+    if not dataset.ds_meta_data.dataset_doi:
+        print(f"[SKIP] Dataset {dataset.id} has no dataset_doi. Skipping indexing.")
+        return
+
+    try:
+        search = get_search_backend()
+        search.index_document(doc_id=f"dataset-{dataset.id}", data=build_dataset_document(dataset))
+    except (ESConnectionError, ConnectionTimeout) as exc:
+        _queue_for_replay(dataset.id, exc)
+        return
+
+    logger.info(f"[SEARCH] Dataset {dataset.id} indexed with DOI: {dataset.ds_meta_data.dataset_doi}")
+
+
+def index_hubfile(hubfile):
+    from app.modules.elasticsearch.services import get_search_backend
+
+    dataset = hubfile.fits_model.data_set if hubfile.fits_model else None
+
+    if not dataset or not dataset.ds_meta_data.dataset_doi:
+        print(f"[SKIP] Hubfile {hubfile.id} skipped (no dataset or dataset has no DOI).")
+        return
+
+    try:
+        search = get_search_backend()
+        search.index_document(doc_id=f"hubfile-{hubfile.id}", data=build_hubfile_document(hubfile, dataset))
+    except (ESConnectionError, ConnectionTimeout) as exc:
+        # Reindexing the dataset also rewrites all of its hubfile documents
+        _queue_for_replay(dataset.id, exc)
+        return
 
     logger.info(f"[SEARCH] Hubfile {hubfile.id} indexed in dataset: {dataset.id}")
 
@@ -1,5 +1,6 @@
 document.addEventListener('DOMContentLoaded', () => {
     bindFilters();
+    bindSuggestions();
     setupDateValidation();
     runSearch(); // initial load
 });
@@ -355,6 +356,49 @@ function setupDateValidation() {
     toInput.addEventListener('change', validate);
 }
 
+let suggestDebounceTimer = null;
+let currentSuggestController = null;
+
+function bindSuggestions() {
+    const input = document.getElementById('search-query-filter');
+    const datalist = document.getElementById('search-suggestions');
+    if (!input || !datalist) return;
+
+    input.addEventListener('input', () => {
+        clearTimeout(suggestDebounceTimer);
+        const prefix = input.value.trim();
+        if (prefix.length < 2) {
+            datalist.innerHTML = '';
+            return;
+        }
+
+        suggestDebounceTimer = setTimeout(() => {
+            if (currentSuggestController) {
+                currentSuggestController.abort();
+            }
+            const controller = new AbortController();
+            currentSuggestController = controller;
+
+            const params = new URLSearchParams({ q: prefix, size: 5 });
+            fetch(`/api/v1/suggest?${params.toString()}`, { signal: controller.signal })
+                .then(res => (res.ok ? res.json() : { suggestions: [] }))
+                .then(data => {
+                    datalist.innerHTML = '';
+                    (data.suggestions || []).forEach(suggestion => {
+                        const option = document.createElement('option');
+                        option.value = suggestion.text;
+                        datalist.appendChild(option);
+                    });
+                })
+                .catch(err => {
+                    if (err.name !== 'AbortError') {
+                        console.error('Suggestions failed', err);
+                    }
+                });
+        }, 100);
+    });
+}
+
 function bindFilters() {
     const filters = [
         '#search-query-filter',
@@ -515,6 +559,7 @@ function runSearch(reset = true) {
     if (date_from) params.append('date_from', date_from);
     if (date_to) params.append('date_to', date_to);
     if (community) params.append('community', community);
+    if (shouldReset) params.append('facets', '1');
 
     const controller = new AbortController();
     currentSearchController = controller;
@@ -541,6 +586,10 @@ function runSearch(reset = true) {
             return payload;
         })
         .then(data => {
+            // En modo degradado (sin Elasticsearch) no hay contadores que mostrar
+            if (data.facets && !data.degraded) {
+                renderFacets(data.facets);
+            }
             renderResults(data.results || [], !shouldReset);
             if (Array.isArray(data.results) && data.results.length > 0) {
                 currentPage++;
@@ -569,6 +618,40 @@ window.addEventListener('scroll', () => {
 });
 
 
+function facetCountMap(buckets) {
+    const counts = {};
+    (buckets || []).forEach(bucket => {
+        counts[String(bucket.key)] = bucket.count;
+    });
+    return counts;
+}
+
+function renderFacets(facets) {
+    // Publication type: añadir el contador a cada opción del select
+    const typeCounts = facetCountMap(facets.publication_type);
+    document.querySelectorAll('#filter-publication-type option').forEach(option => {
+        if (!option.value) return;
+        if (!option.dataset.label) {
+            option.dataset.label = option.textContent;
+        }
+        const count = typeCounts[option.value] || 0;
+        option.textContent = `${option.dataset.label} (${count})`;
+    });
+
+    // Community: contador junto al nombre de cada comunidad
+    const communityCounts = facetCountMap(facets.community_ids);
+    document.querySelectorAll('#community-options .custom-option').forEach(option => {
+        if (!option.dataset.value) return;
+        let badge = option.querySelector('.facet-count');
+        if (!badge) {
+            badge = document.createElement('span');
+            badge.className = 'facet-count badge bg-light text-muted ms-auto';
+            option.appendChild(badge);
+        }
+        badge.textContent = communityCounts[option.dataset.value] || 0;
+    });
+}
+
 function renderResults(results, append = false) {
     const container = document.getElementById('results-container');
     const notFound = document.getElementById('no-results');
@@ -1,45 +1,89 @@
 import re
 
 import unidecode
-from sqlalchemy import any_, or_
+from sqlalchemy import and_, exists, func, or_, select, union
+from sqlalchemy.dialects.mysql import match
 
+from app.modules.community.models import CommunityDataSet, CommunityDataSetStatus
 from app.modules.dataset.models import Author, DataSet, DSMetaData, PublicationType
+from app.modules.dataset.repositories import dataset_load_options
 from app.modules.fitsmodel.models import FitsModel, FMMetaData
 from core.repositories.BaseRepository import BaseRepository
+from core.repositories.routing import read_only
+
+# Column groups covered by the FULLTEXT indexes; MATCH() must list exactly the indexed columns
+DS_META_DATA_TEXT_COLUMNS = (DSMetaData.title, DSMetaData.description, DSMetaData.tags)
+AUTHOR_TEXT_COLUMNS = (Author.name, Author.affiliation, Author.orcid)
+FM_META_DATA_TEXT_COLUMNS = (
+    FMMetaData.fits_filename,
+    FMMetaData.title,
+    FMMetaData.description,
+    FMMetaData.publication_doi,
+    FMMetaData.tags,
+)
+
+# InnoDB ignores words shorter than innodb_ft_min_token_size and those in its default stopword list,
+# so MATCH would never find them; they are matched with LIKE instead
+FULLTEXT_MIN_TOKEN_SIZE = 3
+FULLTEXT_STOPWORDS = frozenset(
+    (
+        "a about an are as at be by com de en for from how i in is it la of on or that the this to was what "
+        "when where who will with und www"
+    ).split()
+)
 
 
 class ExploreRepository(BaseRepository):
     def __init__(self):
         super().__init__(DataSet)
 
-    def filter(self, query="", sorting="newest", publication_type="any", tags=[], **kwargs):
-        # Normalize and remove unwanted characters
-        normalized_query = unidecode.unidecode(query).lower()
-        cleaned_query = re.sub(r'[,.":\'()\[\]^;!¡¿?]', "", normalized_query)
-
-        filters = []
-        for word in cleaned_query.split():
-            filters.append(DSMetaData.title.ilike(f"%{word}%"))
-            filters.append(DSMetaData.description.ilike(f"%{word}%"))
-            filters.append(Author.name.ilike(f"%{word}%"))
-            filters.append(Author.affiliation.ilike(f"%{word}%"))
-            filters.append(Author.orcid.ilike(f"%{word}%"))
-            filters.append(FMMetaData.fits_filename.ilike(f"%{word}%"))
-            filters.append(FMMetaData.title.ilike(f"%{word}%"))
-            filters.append(FMMetaData.description.ilike(f"%{word}%"))
-            filters.append(FMMetaData.publication_doi.ilike(f"%{word}%"))
-            filters.append(FMMetaData.tags.ilike(f"%{word}%"))
-            filters.append(DSMetaData.tags.ilike(f"%{word}%"))
-
-        datasets = (
-            self.model.query.join(DataSet.ds_meta_data)
-            .join(DSMetaData.authors)
-            .join(DataSet.fits_models)
-            .join(FitsModel.fm_meta_data)
-            .filter(or_(*filters))
-            .filter(DSMetaData.dataset_doi.isnot(None))  # Exclude datasets with empty dataset_doi
+    @read_only
+    def filter(
+        self, query="", sorting="newest", publication_type="any", tags=[], page=1, size=None, profile="card", **kwargs
+    ):
+        statement = self._filtered_ids(query, publication_type, tags, **kwargs)
+
+        # Order by created_at (or the denormalized size), with the id as tie-breaker so pages are stable
+        if sorting == "largest":
+            statement = statement.order_by(DataSet.total_size_in_bytes.desc(), DataSet.id.desc())
+        elif sorting == "oldest":
+            statement = statement.order_by(DataSet.created_at.asc(), DataSet.id.asc())
+        else:
+            statement = statement.order_by(DataSet.created_at.desc(), DataSet.id.desc())
+
+        if size is not None:
+            statement = statement.limit(size).offset(max(page - 1, 0) * size)
+
+        # Only the page of ids is resolved by the filter; the datasets are loaded afterwards by primary key,
+        # with the relationships of ``profile`` (see dataset_load_options)
+        dataset_ids = self.session.execute(statement).scalars().all()
+        if not dataset_ids:
+            return []
+
+        datasets = {
+            dataset.id: dataset
+            for dataset in self.model.query.options(*dataset_load_options(profile))
+            .filter(DataSet.id.in_(dataset_ids))
+            .all()
+        }
+        return [datasets[dataset_id] for dataset_id in dataset_ids if dataset_id in datasets]
+
+    @read_only
+    def count_filtered(self, query="", publication_type="any", tags=[], **kwargs) -> int:
+        statement = self._filtered_ids(query, publication_type, tags, **kwargs)
+        return self.session.execute(select(func.count()).select_from(statement.subquery())).scalar_one()
+
+    def _filtered_ids(self, query, publication_type, tags, date_from=None, date_to=None, community_ids=None):
+        statement = (
+            select(DataSet.id)
+            .join(DataSet.ds_meta_data)
+            .where(DSMetaData.dataset_doi.isnot(None))  # Exclude datasets with empty dataset_doi
         )
 
+        words = self._search_words(query)
+        if words:
+            statement = statement.where(self._text_match(words))
+
         if publication_type != "any":
             matching_type = None
             for member in PublicationType:
@@ -48,15 +92,88 @@ class ExploreRepository(BaseRepository):
                     break
 
             if matching_type is not None:
-                datasets = datasets.filter(DSMetaData.publication_type == matching_type.name)
+                statement = statement.where(DSMetaData.publication_type == matching_type.name)
 
         if tags:
-            datasets = datasets.filter(DSMetaData.tags.ilike(any_(f"%{tag}%" for tag in tags)))
+            statement = statement.where(or_(*[DSMetaData.tags.ilike(f"%{tag}%") for tag in tags]))
 
-        # Order by created_at
-        if sorting == "oldest":
-            datasets = datasets.order_by(self.model.created_at.asc())
-        else:
-            datasets = datasets.order_by(self.model.created_at.desc())
+        if date_from:
+            statement = statement.where(DataSet.created_at >= date_from)
+        if date_to:
+            statement = statement.where(DataSet.created_at <= date_to)
+
+        if community_ids:
+            statement = statement.where(
+                exists().where(
+                    and_(
+                        CommunityDataSet.dataset_id == DataSet.id,
+                        CommunityDataSet.community_id.in_(community_ids),
+                        CommunityDataSet.status == CommunityDataSetStatus.ACCEPTED,
+                    )
+                )
+            )
+
+        return statement
+
+    def _search_words(self, query):
+        # Normalize and keep only word characters, so no full-text operator reaches MATCH ... AGAINST
+        normalized_query = unidecode.unidecode(query or "").lower()
+        return re.findall(r"\w+", normalized_query)
+
+    def _text_match(self, words):
+        """
+        A dataset matches when any word appears in its metadata, in one of its authors or in one of its
+        FITS models. Words the FULLTEXT indexes can answer select the matching dataset ids with one
+        MATCH-driven subquery per index; the rest fall back to LIKE.
+        """
+        fulltext_words = []
+        if self._supports_fulltext():
+            fulltext_words = [
+                word for word in words if len(word) >= FULLTEXT_MIN_TOKEN_SIZE and word not in FULLTEXT_STOPWORDS
+            ]
+        like_words = [word for word in words if word not in fulltext_words]
+
+        conditions = []
+        if fulltext_words:
+            conditions.append(DataSet.id.in_(self._fulltext_dataset_ids(fulltext_words)))
+        if like_words:
+            conditions.append(self._like_match(like_words))
+        return or_(*conditions)
+
+    def _fulltext_dataset_ids(self, words):
+        # Boolean mode without operators ORs the words; the trailing * keeps prefix matching
+        against = " ".join(f"{word}*" for word in words)
+
+        def text_matches(columns):
+            return match(*columns, against=against).in_boolean_mode()
+
+        # Each branch is driven by its own FULLTEXT index, which an OR across tables would rule out
+        return union(
+            select(DataSet.id).join(DataSet.ds_meta_data).where(text_matches(DS_META_DATA_TEXT_COLUMNS)),
+            select(DataSet.id)
+            .join(Author, Author.ds_meta_data_id == DataSet.ds_meta_data_id)
+            .where(text_matches(AUTHOR_TEXT_COLUMNS)),
+            select(FitsModel.data_set_id)
+            .join(FMMetaData, FMMetaData.id == FitsModel.fm_meta_data_id)
+            .where(text_matches(FM_META_DATA_TEXT_COLUMNS)),
+        )
+
+    def _like_match(self, words):
+        """Authors and models are checked with EXISTS so no join multiplies the dataset rows."""
+
+        def text_matches(columns):
+            return or_(*[column.ilike(f"%{word}%") for column in columns for word in words])
+
+        author_match = exists().where(and_(Author.ds_meta_data_id == DSMetaData.id, text_matches(AUTHOR_TEXT_COLUMNS)))
+        fits_model_match = exists().where(
+            and_(
+                FitsModel.data_set_id == DataSet.id,
+                FMMetaData.id == FitsModel.fm_meta_data_id,
+                text_matches(FM_META_DATA_TEXT_COLUMNS),
+            )
+        )
+
+        return or_(text_matches(DS_META_DATA_TEXT_COLUMNS), author_match, fits_model_match)
 
-        return datasets.all()
+    def _supports_fulltext(self):
+        return self.session.get_bind().dialect.name in ("mysql", "mariadb")
@@ -22,11 +22,11 @@ def index():
 @explore_bp.route("/search")
 def search():
     """Legacy endpoint (mantener si hay dependencias en front viejo)."""
-    from app.modules.elasticsearch.services import ElasticsearchService
+    from app.modules.elasticsearch.services import get_search_backend
 
     query = request.args.get("q", "")
     try:
-        search_service = ElasticsearchService()
+        search_service = get_search_backend()
         results = search_service.search(query=query, size=10)
         return jsonify({"results": results})
     except ESConnectionError as exc:
@@ -45,7 +45,7 @@ def search():
 
 @explore_bp.route("/api/v1/search")
 def api_search():
-    from app.modules.elasticsearch.services import ElasticsearchService
+    from app.modules.elasticsearch.services import DatabaseSearchFallback, get_search_backend
 
     query = request.args.get("q", "")
     publication_type = request.args.get("publication_type")
@@ -54,25 +54,22 @@ def api_search():
     date_from = request.args.get("date_from")
     date_to = request.args.get("date_to")
     community = request.args.get("community")
+    mode = request.args.get("mode")
+    include_facets = request.args.get("facets", "").strip().lower() in ("1", "true", "yes")
 
     page = int(request.args.get("page", 1))
     size = int(request.args.get("size", 10))
 
     tags_list = [t.strip() for t in tags.split(",") if t.strip()] if tags else []
 
+    degraded = False
     try:
-        search_service = ElasticsearchService()
+        search_service = get_search_backend()
     except ESConnectionError as exc:
-        current_app.logger.warning("Elasticsearch unavailable", exc_info=exc)
-        return (
-            jsonify(
-                {
-                    "error": "Search service unavailable",
-                    "details": str(exc),
-                }
-            ),
-            503,
-        )
+        current_app.logger.warning("Elasticsearch unavailable, falling back to database search", exc_info=exc)
+        # Con el circuito abierto esto no espera a Elasticsearch: se responde desde la base de datos
+        search_service = DatabaseSearchFallback()
+        degraded = True
     except Exception as exc:  # pragma: no cover - unexpected path
         current_app.logger.exception(
             "Unexpected error instantiating search service",
@@ -80,32 +77,35 @@ def api_search():
         )
         return jsonify({"error": "Unexpected search error"}), 500
 
+    search_kwargs = {
+        "query": query,
+        "publication_type": publication_type,
+        "sorting": sorting,
+        "tags": tags_list,
+        "date_from": date_from,
+        "date_to": date_to,
+        "page": page,
+        "size": size,
+        "community": community,
+        "mode": mode,
+    }
+
     try:
-        results, total = search_service.search(
-            query=query,
-            publication_type=publication_type,
-            sorting=sorting,
-            tags=tags_list,
-            date_from=date_from,
-            date_to=date_to,
-            page=page,
-            size=size,
-            community=community,
-        )
+        results, total, facets = _run_search(search_service, search_kwargs, include_facets)
     except ESConnectionError as exc:
         current_app.logger.warning(
             "Elasticsearch search failure",
             exc_info=exc,
         )
-        return (
-            jsonify(
-                {
-                    "error": "Search service unavailable",
-                    "details": str(exc),
-                }
-            ),
-            503,
-        )
+        if degraded:
+            return _search_unavailable(exc)
+        try:
+            # Búsqueda degradada sobre la base de datos mientras Elasticsearch no responde
+            results, total, facets = _run_search(DatabaseSearchFallback(), search_kwargs, include_facets)
+            degraded = True
+        except Exception:
+            current_app.logger.exception("Database search fallback failed")
+            return _search_unavailable(exc)
     except ValueError as exc:
         current_app.logger.info("Invalid search parameters", exc_info=exc)
         return jsonify({"error": str(exc)}), 400
@@ -116,11 +116,57 @@ def api_search():
         )
         return jsonify({"error": "Unexpected search error"}), 500
 
-    return jsonify(
-        {
-            "results": results,
-            "total": total,
-            "page": page,
-            "size": size,
-        }
+    payload = {
+        "results": results,
+        "total": total,
+        "page": page,
+        "size": size,
+    }
+    if include_facets:
+        payload["facets"] = facets
+    if degraded:
+        payload["degraded"] = True
+
+    return jsonify(payload)
+
+
+def _search_unavailable(exc):
+    return (
+        jsonify(
+            {
+                "error": "Search service unavailable",
+                "details": str(exc),
+            }
+        ),
+        503,
     )
+
+
+def _run_search(search_service, search_kwargs, include_facets):
+    if include_facets:
+        return search_service.search_with_facets(**search_kwargs)
+    results, total = search_service.search(**search_kwargs)
+    return results, total, None
+
+
+@explore_bp.route("/api/v1/suggest")
+def api_suggest():
+    from app.modules.elasticsearch.services import get_search_backend
+
+    prefix = request.args.get("q", "")
+    size = request.args.get("size", 5, type=int)
+
+    try:
+        search_service = get_search_backend()
+        suggestions = search_service.suggest(prefix=prefix, size=size)
+    except ESConnectionError as exc:
+        current_app.logger.warning("Elasticsearch unavailable for suggestions", exc_info=exc)
+        return jsonify({"error": "Search service unavailable"}), 503
+    except Exception as exc:  # pragma: no cover - unexpected path
+        current_app.logger.exception(
+            "Unexpected error executing suggestions",
+            exc_info=exc,
+        )
+        return jsonify({"error": "Unexpected search error"}), 500
+
+    return jsonify({"suggestions": suggestions})
@@ -5,3 +5,11 @@ from core.services.BaseService import BaseService
 class ExploreService(BaseService):
     def __init__(self):
         super().__init__(ExploreRepository())
+
+    def filter(self, query="", sorting="newest", publication_type="any", tags=[], page=1, size=None, **kwargs):
+        return self.repository.filter(
+            query=query, sorting=sorting, publication_type=publication_type, tags=tags, page=page, size=size, **kwargs
+        )
+
+    def count_filtered(self, query="", publication_type="any", tags=[], **kwargs) -> int:
+        return self.repository.count_filtered(query=query, publication_type=publication_type, tags=tags, **kwargs)
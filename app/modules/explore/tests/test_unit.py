@@ -68,6 +68,7 @@ def test_api_search_success_with_filters(monkeypatch, test_client):
             "date_to": "2024-01-31",
             "page": 3,
             "size": 5,
+            "mode": "prefix",
         },
     )
 
@@ -90,6 +91,7 @@ def test_api_search_success_with_filters(monkeypatch, test_client):
         "page": 3,
         "size": 5,
         "community": None,
+        "mode": "prefix",
     }
 
 
@@ -126,22 +128,32 @@ def test_api_search_defaults_without_parameters(monkeypatch, test_client):
         "page": 1,
         "size": 10,
         "community": None,
+        "mode": None,
     }
 
 
-def test_api_search_handles_init_connection_error(monkeypatch, test_client):
+def test_api_search_falls_back_to_database_when_unavailable(monkeypatch, test_client):
     class BrokenService:
         def __init__(self, *args, **kwargs):
             raise ESConnectionError("cannot connect")
 
+    recorded = {}
+
+    class DummyFallback:
+        def search(self, **kwargs):
+            recorded.update(kwargs)
+            return [{"id": 1, "title": "From database"}], 1
+
     monkeypatch.setattr(ES_SERVICE_PATH, BrokenService)
+    monkeypatch.setattr("app.modules.elasticsearch.services.DatabaseSearchFallback", DummyFallback)
 
-    response = test_client.get(API_SEARCH_URL)
+    response = test_client.get(API_SEARCH_URL, query_string={"q": "galaxy"})
 
-    assert response.status_code == 503
+    assert response.status_code == 200
     data = response.get_json()
-    assert data["error"] == "Search service unavailable"
-    assert "details" in data
+    assert data["degraded"] is True
+    assert data["results"] == [{"id": 1, "title": "From database"}]
+    assert recorded["query"] == "galaxy"
 
 
 def test_api_search_handles_connection_error_on_search(
@@ -155,7 +167,12 @@ def test_api_search_handles_connection_error_on_search(
         def search(self, **kwargs):
             raise ESConnectionError("timeout")
 
+    class BrokenFallback:
+        def search(self, **kwargs):
+            raise RuntimeError("database down")
+
     monkeypatch.setattr(ES_SERVICE_PATH, DummyService)
+    monkeypatch.setattr("app.modules.elasticsearch.services.DatabaseSearchFallback", BrokenFallback)
 
     response = test_client.get(API_SEARCH_URL)
 
@@ -281,3 +298,180 @@ def test_api_search_community_no_matching_datasets(monkeypatch, test_client):
 
     assert payload["results"] == []
     assert payload["total"] == 0
+
+
+def test_api_search_returns_facets_when_requested(monkeypatch, test_client):
+    captured_kwargs = {}
+
+    class DummyService:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def search_with_facets(self, **kwargs):
+            captured_kwargs.update(kwargs)
+            return ([{"id": 1}], 1, {"publication_type": [{"key": "article", "count": 1}]})
+
+    monkeypatch.setattr(ES_SERVICE_PATH, DummyService)
+
+    response = test_client.get(API_SEARCH_URL, query_string={"q": "test", "facets": "1"})
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert payload["facets"] == {"publication_type": [{"key": "article", "count": 1}]}
+    assert payload["total"] == 1
+    assert captured_kwargs["query"] == "test"
+
+
+def test_api_suggest_returns_suggestions(monkeypatch, test_client):
+    captured_kwargs = {}
+
+    class DummyService:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def suggest(self, **kwargs):
+            captured_kwargs.update(kwargs)
+            return [{"text": "Galaxy", "type": "dataset", "id": 1, "url": "http://x"}]
+
+    monkeypatch.setattr(ES_SERVICE_PATH, DummyService)
+
+    response = test_client.get("/api/v1/suggest", query_string={"q": "gal", "size": 3})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"suggestions": [{"text": "Galaxy", "type": "dataset", "id": 1, "url": "http://x"}]}
+    assert captured_kwargs == {"prefix": "gal", "size": 3}
+
+
+def test_api_suggest_handles_connection_error(monkeypatch, test_client):
+    class BrokenService:
+        def __init__(self, *args, **kwargs):
+            raise ESConnectionError("cannot connect")
+
+    monkeypatch.setattr(ES_SERVICE_PATH, BrokenService)
+
+    response = test_client.get("/api/v1/suggest", query_string={"q": "gal"})
+
+    assert response.status_code == 503
+    assert response.get_json() == {"error": "Search service unavailable"}
+
+
+def _create_explore_dataset(title, created_at, doi, authors=(), fits_filenames=()):
+    from datetime import datetime
+
+    from app import db
+    from app.modules.auth.models import User
+    from app.modules.dataset.models import Author, DataSet, DSMetaData
+    from app.modules.fitsmodel.models import FitsModel, FMMetaData
+
+    user = User.query.filter_by(email="test@example.com").first()
+    metadata = DSMetaData(
+        title=title,
+        description=f"{title} description",
+        publication_type=PublicationType.JOURNAL_ARTICLE,
+        dataset_doi=doi,
+        tags="astronomy",
+        authors=[Author(name=name, affiliation="Observatory") for name in authors],
+    )
+    dataset = DataSet(user_id=user.id, ds_meta_data=metadata, created_at=datetime.fromisoformat(created_at))
+    for filename in fits_filenames:
+        fm_metadata = FMMetaData(
+            fits_filename=filename,
+            title=filename,
+            description="FITS file",
+            publication_type=PublicationType.JOURNAL_ARTICLE,
+        )
+        dataset.fits_models.append(FitsModel(fm_meta_data=fm_metadata))
+    db.session.add(dataset)
+    db.session.commit()
+    return dataset
+
+
+def test_explore_filter_returns_distinct_paginated_datasets(test_client):
+    from app.modules.explore.services import ExploreService
+
+    nebula = _create_explore_dataset(
+        "Nebula catalogue",
+        "2024-01-01T10:00:00",
+        "10.1234/explore-1",
+        authors=("Vera Rubin", "Henrietta Leavitt"),
+        fits_filenames=("nebula_1.fits", "nebula_2.fits"),
+    )
+    by_author = _create_explore_dataset(
+        "Pulsar timing", "2024-02-01T10:00:00", "10.1234/explore-2", authors=("Nebula Group",)
+    )
+    _create_explore_dataset("Nebula draft", "2024-03-01T10:00:00", None)
+    _create_explore_dataset("Quasar survey", "2024-04-01T10:00:00", "10.1234/explore-3")
+
+    service = ExploreService()
+
+    # Several authors and models must not duplicate the dataset, and drafts without DOI are excluded
+    assert service.filter(query="nebula") == [by_author, nebula]
+    assert service.count_filtered(query="nebula") == 2
+    assert service.filter(query="nebula", sorting="oldest", page=1, size=1) == [nebula]
+    assert service.filter(query="nebula", sorting="oldest", page=2, size=1) == [by_author]
+    assert service.filter(query="nebula", page=3, size=1) == []
+    assert service.filter(query="rubin") == [nebula]
+    assert service.filter(query="nebula_2") == [nebula]
+    assert service.filter(query="nebula", publication_type="report") == []
+
+
+def test_database_search_fallback_formats_explore_results(test_client):
+    from app.modules.elasticsearch.services import DatabaseSearchFallback
+
+    results, total = DatabaseSearchFallback().search(query="nebula", sorting="oldest", page=1, size=1)
+
+    assert total == 2
+    assert results[0]["title"] == "Nebula catalogue"
+    assert results[0]["created_at"] == "01 Jan 2024, 10:00"
+
+    results, total = DatabaseSearchFallback().search(query="nebula", date_from="2024-01-15", date_to="2024-02-01")
+    assert total == 1
+    assert results[0]["title"] == "Pulsar timing"
+
+
+def test_explore_filter_matches_words_the_fulltext_index_skips(test_client):
+    from sqlalchemy.dialects import mysql
+
+    from app.modules.explore.repositories import ExploreRepository
+    from app.modules.explore.services import ExploreService
+
+    ai = _create_explore_dataset("AI galaxy classifier", "2024-05-01T10:00:00", "10.1234/explore-4")
+
+    assert ai in ExploreService().filter(query="ai")
+
+    repository = ExploreRepository()
+    repository._supports_fulltext = lambda: True
+    sql = str(
+        repository._text_match(["ai", "the", "galaxy"]).compile(
+            dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+    # Only the indexable word goes to MATCH, through a UNION of per-index subqueries; the others use LIKE
+    assert "'galaxy*'" in sql and "UNION" in sql
+    assert "'ai*'" not in sql and "'%%ai%%'" in sql and "'%%the%%'" in sql
+
+
+def test_database_search_fallback_loads_a_page_in_fixed_queries(test_client):
+    from app.modules.elasticsearch.services import DatabaseSearchFallback
+    from core.managers.query_instrumentation_manager import record_queries
+
+    _create_explore_dataset("Magnetar single", "2024-06-01T10:00:00", "10.1234/explore-5", authors=("Ann",))
+    with record_queries() as one:
+        results, total = DatabaseSearchFallback().search(query="magnetar")
+    assert total == 1
+
+    for index in range(3):
+        _create_explore_dataset(
+            f"Magnetar batch {index}",
+            f"2024-06-0{index + 2}T10:00:00",
+            f"10.1234/explore-{index + 6}",
+            authors=("Bea", "Carl"),
+        )
+    with record_queries() as many:
+        results, total = DatabaseSearchFallback().search(query="magnetar")
+
+    # Metadata, authors and communities come in with the page, not dataset by dataset
+    assert total == 4 and len(results) == 4
+    assert results[0]["authors"][0]["name"] == "Bea"
+    assert many.count == one.count
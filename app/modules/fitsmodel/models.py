@@ -16,6 +16,18 @@ class FitsModel(db.Model):
 
 
 class FMMetaData(db.Model):
+    __table_args__ = (
+        db.Index(
+            "ix_fm_meta_data_fulltext",
+            "fits_filename",
+            "title",
+            "description",
+            "publication_doi",
+            "tags",
+            mysql_prefix="FULLTEXT",
+        ),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     fits_filename = db.Column(db.String(120), nullable=False)
     title = db.Column(db.String(120), nullable=False)
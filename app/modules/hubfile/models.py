@@ -51,6 +51,7 @@ class Hubfile(db.Model):
 
 class HubfileViewRecord(db.Model):
     __tablename__ = "file_view_record"
+    __table_args__ = (db.Index("ix_file_view_record_file_id_view_cookie", "file_id", "view_cookie", unique=True),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     file_id = db.Column(db.Integer, db.ForeignKey("file.id"), nullable=False)
@@ -63,6 +64,9 @@ class HubfileViewRecord(db.Model):
 
 class HubfileDownloadRecord(db.Model):
     __tablename__ = "file_download_record"
+    __table_args__ = (
+        db.Index("ix_file_download_record_file_id_download_cookie", "file_id", "download_cookie", unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
     file_id = db.Column(db.Integer, db.ForeignKey("file.id"))
@@ -76,3 +80,19 @@ class HubfileDownloadRecord(db.Model):
             f"date={self.download_date} "
             f"cookie={self.download_cookie}>"
         )
+
+
+class HubfileDailyStats(db.Model):
+    """Downloads and views of a file aggregated per day, see ``DSDailyStats``."""
+
+    __tablename__ = "file_daily_stats"
+    __table_args__ = (db.UniqueConstraint("file_id", "day", name="uq_file_daily_stats_file_id_day"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    file_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False, index=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"HubfileDailyStats<{self.file_id}> {self.day}"
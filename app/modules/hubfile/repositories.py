@@ -1,10 +1,9 @@
-from sqlalchemy import func
-
 from app import db
 from app.modules.auth.models import User
 from app.modules.dataset.models import DataSet
+from app.modules.dataset.repositories import DailyStatsRepository, TrackingRecordRepository
 from app.modules.fitsmodel.models import FitsModel
-from app.modules.hubfile.models import Hubfile, HubfileDownloadRecord, HubfileViewRecord
+from app.modules.hubfile.models import Hubfile, HubfileDailyStats, HubfileDownloadRecord, HubfileViewRecord
 from core.repositories.BaseRepository import BaseRepository
 
 
@@ -21,19 +20,29 @@ class HubfileRepository(BaseRepository):
         return db.session.query(DataSet).join(FitsModel).join(Hubfile).filter(Hubfile.id == hubfile.id).first()
 
 
-class HubfileViewRecordRepository(BaseRepository):
+class HubfileViewRecordRepository(TrackingRecordRepository):
     def __init__(self):
-        super().__init__(HubfileViewRecord)
+        super().__init__(HubfileViewRecord, "file_id", "view_cookie")
 
     def total_hubfile_views(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return HubfileDailyStatsRepository().totals()["views"]
 
 
-class HubfileDownloadRecordRepository(BaseRepository):
+class HubfileDownloadRecordRepository(TrackingRecordRepository):
     def __init__(self):
-        super().__init__(HubfileDownloadRecord)
+        super().__init__(HubfileDownloadRecord, "file_id", "download_cookie")
 
     def total_hubfile_downloads(self) -> int:
-        max_id = self.model.query.with_entities(func.max(self.model.id)).scalar()
-        return max_id if max_id is not None else 0
+        return HubfileDailyStatsRepository().totals()["downloads"]
+
+
+class HubfileDailyStatsRepository(DailyStatsRepository):
+    def __init__(self):
+        super().__init__(
+            HubfileDailyStats,
+            "file_id",
+            {
+                "downloads": (HubfileDownloadRecord, "download_date", "download_cookie"),
+                "views": (HubfileViewRecord, "view_date", "view_cookie"),
+            },
+        )
@@ -9,10 +9,8 @@ from astropy.io import fits
 from flask import current_app, jsonify, make_response, request, send_from_directory
 from flask_login import current_user
 
-from app import db
 from app.modules.hubfile import hubfile_bp
-from app.modules.hubfile.models import HubfileDownloadRecord, HubfileViewRecord
-from app.modules.hubfile.services import HubfileDownloadRecordService, HubfileService
+from app.modules.hubfile.services import HubfileDownloadRecordService, HubfileService, HubfileViewRecordService
 
 
 @hubfile_bp.route("/file/download/<int:file_id>", methods=["GET"])
@@ -29,19 +27,13 @@ def download_file(file_id):
     if not user_cookie:
         user_cookie = str(uuid.uuid4())
 
-    # Check if the download record already exists for this cookie
-    existing_record = HubfileDownloadRecord.query.filter_by(
-        user_id=current_user.id if current_user.is_authenticated else None, file_id=file_id, download_cookie=user_cookie
-    ).first()
-
-    if not existing_record:
-        # Record the download in your database
-        HubfileDownloadRecordService().create(
-            user_id=current_user.id if current_user.is_authenticated else None,
-            file_id=file_id,
-            download_date=datetime.now(timezone.utc),
-            download_cookie=user_cookie,
-        )
+    # Record the download unless this cookie already downloaded the file
+    HubfileDownloadRecordService().create_if_absent(
+        user_id=current_user.id if current_user.is_authenticated else None,
+        file_id=file_id,
+        download_date=datetime.now(timezone.utc),
+        download_cookie=user_cookie,
+    )
 
     # Save the cookie to the user's browser
     resp = make_response(send_from_directory(directory=file_path, path=filename, as_attachment=True))
@@ -100,23 +92,13 @@ def view_file(file_id):
             if not user_cookie:
                 user_cookie = str(uuid.uuid4())
 
-            # Check if the view record already exists for this cookie
-            existing_record = HubfileViewRecord.query.filter_by(
+            # Register the file view unless this cookie already viewed it
+            HubfileViewRecordService().create_if_absent(
                 user_id=current_user.id if current_user.is_authenticated else None,
                 file_id=file_id,
+                view_date=datetime.now(),
                 view_cookie=user_cookie,
-            ).first()
-
-            if not existing_record:
-                # Register file view
-                new_view_record = HubfileViewRecord(
-                    user_id=current_user.id if current_user.is_authenticated else None,
-                    file_id=file_id,
-                    view_date=datetime.now(),
-                    view_cookie=user_cookie,
-                )
-                db.session.add(new_view_record)
-                db.session.commit()
+            )
 
             # Prepare response with image
             response = jsonify({"success": True, "content": content, "image": f"data:image/png;base64,{image_base64}"})
@@ -4,6 +4,7 @@ from app.modules.auth.models import User
 from app.modules.dataset.models import DataSet
 from app.modules.hubfile.models import Hubfile
 from app.modules.hubfile.repositories import (
+    HubfileDailyStatsRepository,
     HubfileDownloadRecordRepository,
     HubfileRepository,
     HubfileViewRecordRepository,
@@ -16,6 +17,7 @@ class HubfileService(BaseService):
         super().__init__(HubfileRepository())
         self.hubfile_view_record_repository = HubfileViewRecordRepository()
         self.hubfile_download_record_repository = HubfileDownloadRecordRepository()
+        self.hubfile_daily_stats_repository = HubfileDailyStatsRepository()
 
     def get_owner_user_by_hubfile(self, hubfile: Hubfile) -> User:
         return self.repository.get_owner_user_by_hubfile(hubfile)
@@ -41,7 +43,26 @@ class HubfileService(BaseService):
         hubfile_download_record_repository = HubfileDownloadRecordRepository()
         return hubfile_download_record_repository.total_hubfile_downloads()
 
+    def get_hubfile_stats(self, file_id: int) -> dict:
+        return self.hubfile_daily_stats_repository.totals(file_id)
+
 
 class HubfileDownloadRecordService(BaseService):
     def __init__(self):
         super().__init__(HubfileDownloadRecordRepository())
+
+
+class HubfileViewRecordService(BaseService):
+    def __init__(self):
+        super().__init__(HubfileViewRecordRepository())
+
+
+class HubfileDailyStatsService(BaseService):
+    def __init__(self):
+        super().__init__(HubfileDailyStatsRepository())
+
+    def roll_up(self, until=None) -> int:
+        return self.repository.roll_up(until)
+
+    def archive_records(self, before) -> int:
+        return self.repository.archive_records(before)
@@ -15,7 +15,7 @@ from app.modules.hubfile.routes import (
     get_image_from_fits_headers,
     parse_fits_headers,
 )
-from app.modules.hubfile.services import HubfileService
+from app.modules.hubfile.services import HubfileService, HubfileViewRecordService
 
 
 @pytest.fixture(scope="module")
@@ -199,3 +199,13 @@ def test_service_get_path_by_hubfile(test_client, sample_hubfile, monkeypatch):
     filename = sample_hubfile.name
     expected_path = f"/tmp/fitshub/uploads/user_{user_id}/dataset_{dataset_id}/{filename}"
     assert path == expected_path
+
+
+def test_tracking_records_are_inserted_once_per_cookie(test_client, sample_hubfile):
+    service = HubfileViewRecordService()
+    record = {"file_id": sample_hubfile.id, "view_cookie": "0b5c4d1e-tracking-once"}
+
+    assert service.create_if_absent(**record) is True
+    # A second client request (or a concurrent one) with the same cookie is ignored by the unique key
+    assert service.create_if_absent(user_id=None, **record) is False
+    assert HubfileViewRecord.query.filter_by(**record).count() == 1
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app
+
+from app.modules.community.repositories import CommunityDataSetRepository
+from app.modules.dataset.repositories import DataSetRepository, DSDailyStatsRepository
+from app.modules.dataset.services import SizeService
+from app.modules.hubfile.repositories import HubfileDailyStatsRepository
+from core.services.BaseService import BaseService
+
+logger = logging.getLogger(__name__)
+
+HOMEPAGE_TRENDING_LIMIT = 5
+HOMEPAGE_TRENDING_PERIOD_DAYS = 7
+HOMEPAGE_LATEST_LIMIT = 5
+
+# (monotonic time it was built, snapshot), shared by every request of the process
+_snapshot = None
+_snapshot_lock = threading.Lock()
+# Held while a snapshot is built, so concurrent requests wait for that build instead of starting their own
+_rebuild_lock = threading.Lock()
+_refreshing = False
+
+
+def clear_homepage_snapshot():
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
+
+
+class HomepageStatsService(BaseService):
+    """
+    Everything the homepage shows, built into a snapshot of plain values so it can be shared between
+    requests. Within ``HOMEPAGE_STATS_TTL_SECONDS`` the snapshot is served as is; after that it is
+    still served while a background thread rebuilds it, up to ``HOMEPAGE_STATS_MAX_STALE_SECONDS``.
+    """
+
+    def __init__(self):
+        super().__init__(DataSetRepository())
+        self.community_dataset_repository = CommunityDataSetRepository()
+        self.dataset_stats_repository = DSDailyStatsRepository()
+        self.hubfile_stats_repository = HubfileDailyStatsRepository()
+
+    def get_snapshot(self) -> dict:
+        config = current_app.config
+        ttl = config.get("HOMEPAGE_STATS_TTL_SECONDS", 30)
+        max_stale = config.get("HOMEPAGE_STATS_MAX_STALE_SECONDS", 300)
+        if ttl <= 0:
+            return self.build_snapshot()
+
+        cached = _snapshot
+        age = time.monotonic() - cached[0] if cached else None
+        if cached is None or age > max(ttl, max_stale):
+            return self.refresh(max_age=max(ttl, max_stale))
+        if age > ttl:
+            self._refresh_in_background()
+        return cached[1]
+
+    def refresh(self, max_age=None) -> dict:
+        """
+        Rebuild the snapshot, one build at a time. With ``max_age``, a snapshot built meanwhile by another
+        thread and younger than that is returned instead of building it again.
+        """
+        global _snapshot
+        with _rebuild_lock:
+            cached = _snapshot
+            if max_age is not None and cached and time.monotonic() - cached[0] <= max_age:
+                return cached[1]
+            snapshot = self.build_snapshot()
+            with _snapshot_lock:
+                _snapshot = (time.monotonic(), snapshot)
+        return snapshot
+
+    def _refresh_in_background(self):
+        global _refreshing
+        with _snapshot_lock:
+            # Only one rebuild at a time; everyone else keeps serving the stale snapshot
+            if _refreshing:
+                return
+            _refreshing = True
+
+        app = current_app._get_current_object()
+
+        def run():
+            global _refreshing
+            from app import db
+
+            ttl = app.config.get("HOMEPAGE_STATS_TTL_SECONDS", 30)
+            with app.app_context():
+                try:
+                    HomepageStatsService().refresh(max_age=ttl)
+                except Exception as exc:
+                    logger.warning("Homepage stats refresh failed, serving the previous snapshot: %s", exc)
+                finally:
+                    db.session.remove()
+                    with _snapshot_lock:
+                        _refreshing = False
+
+        threading.Thread(target=run, name="homepage-stats-refresh", daemon=True).start()
+
+    def build_snapshot(self) -> dict:
+        datasets_counter, fits_models_counter = self.repository.count_synchronized_datasets_and_fits_models()
+        dataset_totals = self.dataset_stats_repository.totals()
+        fits_model_totals = self.hubfile_stats_repository.totals()
+
+        trending = self.repository.trending_datasets(
+            limit=HOMEPAGE_TRENDING_LIMIT, period_days=HOMEPAGE_TRENDING_PERIOD_DAYS
+        )
+        latest_ids = self.repository.latest_synchronized_ids(limit=HOMEPAGE_LATEST_LIMIT)
+        cards = self._dataset_cards([dataset.id for dataset, _ in trending] + latest_ids)
+
+        return {
+            "datasets_counter": datasets_counter,
+            "fits_models_counter": fits_models_counter,
+            "total_dataset_downloads": dataset_totals["downloads"],
+            "total_dataset_views": dataset_totals["views"],
+            "total_fits_model_downloads": fits_model_totals["downloads"],
+            "total_fits_model_views": fits_model_totals["views"],
+            # A dataset deleted between the queries has no card and is left out
+            "trending_datasets": [
+                (cards[dataset.id], download_count) for dataset, download_count in trending if dataset.id in cards
+            ],
+            "datasets": [cards[dataset_id] for dataset_id in latest_ids if dataset_id in cards],
+            "generated_at": datetime.now(timezone.utc),
+        }
+
+    def _dataset_cards(self, dataset_ids):
+        """Card data of each dataset, loaded with a fixed number of queries however many cards there are."""
+        dataset_ids = list(dict.fromkeys(dataset_ids))
+        datasets = self.repository.get_with_details(dataset_ids)
+        communities = self.community_dataset_repository.get_communities_by_dataset(dataset_ids)
+        size_service = SizeService()
+
+        cards = {}
+        for dataset_id, dataset in datasets.items():
+            ds_meta_data = dataset.ds_meta_data
+            cards[dataset_id] = {
+                "id": dataset.id,
+                "url": dataset.get_fitshub_doi(),
+                "title": ds_meta_data.title,
+                "description": ds_meta_data.description,
+                "publication_type": dataset.get_cleaned_publication_type(),
+                "created_at": dataset.created_at,
+                "download_counter": dataset.download_counter,
+                "authors": [author.to_dict() for author in ds_meta_data.authors],
+                "tags": [tag.strip() for tag in ds_meta_data.tags.split(",")] if ds_meta_data.tags else [],
+                "communities": [{"id": c.id, "name": c.name} for c in communities.get(dataset_id, [])],
+                "total_size_in_human_format": size_service.get_human_readable_size(dataset.get_file_total_size()),
+            }
+        return cards
@@ -0,0 +1,184 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app import db
+from app.modules.auth.models import User
+from app.modules.community.models import Community, CommunityDataSet, CommunityDataSetStatus
+from app.modules.dataset.models import Author, DataSet, DSMetaData, PublicationType
+from app.modules.dataset.repositories import DataSetRepository
+from app.modules.public import services
+from app.modules.public.services import HomepageStatsService, clear_homepage_snapshot
+
+
+@pytest.fixture(scope="module")
+def test_client(test_client):
+    """
+    Extends the test_client fixture with a synchronized dataset, published in a community.
+    """
+    with test_client.application.app_context():
+        user = User.query.filter_by(email="test@example.com").first()
+
+        ds_meta_data = DSMetaData(
+            title="Homepage Dataset",
+            description="A dataset shown on the homepage.",
+            publication_type=PublicationType.NONE,
+            dataset_doi="10.1234/homepage.dataset",
+            tags="stars, galaxies",
+        )
+        ds_meta_data.authors.append(Author(name="Homepage Author", orcid="0000-0001"))
+        db.session.add(ds_meta_data)
+        db.session.commit()
+
+        dataset = DataSet(user_id=user.id, ds_meta_data_id=ds_meta_data.id)
+        community = Community(name="Homepage Community", description="Shown on the dataset card.")
+        db.session.add_all([dataset, community])
+        db.session.commit()
+
+        db.session.add(
+            CommunityDataSet(community_id=community.id, dataset_id=dataset.id, status=CommunityDataSetStatus.ACCEPTED)
+        )
+        db.session.commit()
+
+    yield test_client
+
+
+@pytest.fixture
+def snapshot_ttl(test_client):
+    config = test_client.application.config
+    config["HOMEPAGE_STATS_TTL_SECONDS"] = 30
+    config["HOMEPAGE_STATS_MAX_STALE_SECONDS"] = 300
+    clear_homepage_snapshot()
+    yield
+    config["HOMEPAGE_STATS_TTL_SECONDS"] = 0
+    clear_homepage_snapshot()
+
+
+def test_homepage_snapshot_holds_plain_card_data(test_client):
+    with test_client.application.app_context():
+        snapshot = HomepageStatsService().build_snapshot()
+
+    assert snapshot["datasets_counter"] == 1
+    assert snapshot["fits_models_counter"] == 0
+    assert snapshot["total_dataset_downloads"] == 0
+    assert snapshot["trending_datasets"] == []
+
+    card = snapshot["datasets"][0]
+    assert card["title"] == "Homepage Dataset"
+    assert card["url"].endswith("/doi/10.1234/homepage.dataset")
+    assert card["tags"] == ["stars", "galaxies"]
+    assert card["authors"][0]["name"] == "Homepage Author"
+    assert [community["name"] for community in card["communities"]] == ["Homepage Community"]
+    assert card["total_size_in_human_format"] == "0 bytes"
+
+
+def test_homepage_renders_from_snapshot(test_client):
+    response = test_client.get("/")
+
+    assert response.status_code == 200
+    assert b"Homepage Dataset" in response.data
+    assert b"galaxies" in response.data
+
+
+def test_homepage_snapshot_is_reused_within_ttl(test_client, snapshot_ttl, monkeypatch):
+    with test_client.application.test_request_context():
+        first = HomepageStatsService().get_snapshot()
+
+        monkeypatch.setattr(
+            HomepageStatsService, "build_snapshot", lambda self: pytest.fail("the snapshot was rebuilt")
+        )
+        assert HomepageStatsService().get_snapshot() is first
+
+
+def test_homepage_stale_snapshot_is_served_while_refreshing(test_client, snapshot_ttl, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(HomepageStatsService, "_refresh_in_background", lambda self: refreshes.append(True))
+
+    with test_client.application.test_request_context():
+        first = HomepageStatsService().get_snapshot()
+
+        # Past the TTL but within the max staleness: served as is, rebuilt in the background
+        services._snapshot = (time.monotonic() - 60, first)
+        assert HomepageStatsService().get_snapshot() is first
+        assert refreshes == [True]
+
+        # Too old to be served: rebuilt before answering
+        services._snapshot = (time.monotonic() - 600, first)
+        assert HomepageStatsService().get_snapshot() is not first
+        assert refreshes == [True]
+
+
+def test_homepage_snapshot_is_built_once_by_concurrent_requests(test_client, snapshot_ttl, monkeypatch):
+    app = test_client.application
+    build_snapshot = HomepageStatsService.build_snapshot
+    builds = []
+
+    def slow_build(self):
+        builds.append(True)
+        time.sleep(0.1)
+        return build_snapshot(self)
+
+    monkeypatch.setattr(HomepageStatsService, "build_snapshot", slow_build)
+    snapshots = []
+
+    def request():
+        with app.test_request_context():
+            snapshots.append(HomepageStatsService().get_snapshot())
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert builds == [True]
+    assert len(snapshots) == 4 and all(snapshot is snapshots[0] for snapshot in snapshots)
+
+
+def test_homepage_snapshot_skips_datasets_without_card(test_client, monkeypatch):
+    with test_client.application.app_context():
+        dataset = DataSet.query.first()
+        monkeypatch.setattr(DataSetRepository, "get_with_details", lambda self, dataset_ids: {})
+        monkeypatch.setattr(DataSetRepository, "trending_datasets", lambda self, **kwargs: [(dataset, 3)])
+
+        snapshot = HomepageStatsService().build_snapshot()
+
+    assert snapshot["trending_datasets"] == []
+    assert snapshot["datasets"] == []
+
+
+def test_homepage_stays_within_its_query_budget(test_client, query_budget):
+    with query_budget(20) as stats:
+        assert test_client.get("/").status_code == 200
+    assert stats.count > 0
+
+
+def test_request_queries_are_reported_in_headers_and_logs(test_client, monkeypatch, caplog):
+    config = test_client.application.config
+    monkeypatch.setitem(config, "SQL_SERVER_TIMING", True)
+    # Every statement counts as repeated, so the request is reported as an N+1 suspect
+    monkeypatch.setitem(config, "SQL_N_PLUS_ONE_THRESHOLD", 1)
+
+    with caplog.at_level("WARNING"):
+        response = test_client.get("/")
+
+    timings = response.headers.getlist("Server-Timing")
+    assert timings[0].startswith("sql;dur=") and "queries" in timings[0]
+    assert "N+1 suspects" in timings[1]
+
+    record = next(json.loads(r.getMessage()) for r in caplog.records if r.getMessage().startswith('{"event": "sql"'))
+    assert record["path"] == "/" and record["status"] == 200
+    assert record["queries"] >= len(record["n_plus_one"]) > 0
+
+
+def test_statement_fingerprints_ignore_values():
+    from core.managers.query_instrumentation_manager import fingerprint
+
+    assert (
+        fingerprint("SELECT *\n  FROM file WHERE id IN (?, ?, ?) AND name = 'it''s' LIMIT 10")
+        == "SELECT * FROM file WHERE id IN (...) AND name = ? LIMIT ?"
+    )
+    assert fingerprint("SELECT a FROM t WHERE x IN (%s, %s)") == fingerprint("SELECT a FROM t WHERE x IN (%s)")
+    assert fingerprint("SELECT anon_1.id FROM data_set_1") == "SELECT anon_1.id FROM data_set_1"
@@ -1,6 +1,8 @@
 import os
 import secrets
 
+from core.repositories.routing import REPLICA_BIND_PREFIX
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 
 
@@ -21,6 +23,29 @@ class ConfigManager:
         else:
             self.app.config.from_object(DevelopmentConfig)
 
+        # Engine options and replica binds depend on the final database URIs
+        config = self.app.config
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            **engine_options(config["SQLALCHEMY_DATABASE_URI"], config),
+            **config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+        }
+        binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+        for index, uri in enumerate(config["SQLALCHEMY_REPLICA_URIS"]):
+            binds.setdefault(f"{REPLICA_BIND_PREFIX}_{index}", {"url": uri, **engine_options(uri, config)})
+        config["SQLALCHEMY_BINDS"] = binds
+
+
+def engine_options(uri, config):
+    """Pool settings of ``config`` for an engine on ``uri``; SQLite engines get no pool sizing."""
+    options = {"pool_pre_ping": config["DB_POOL_PRE_PING"], "pool_recycle": config["DB_POOL_RECYCLE"]}
+    if not uri.startswith("sqlite"):
+        options.update(
+            pool_size=config["DB_POOL_SIZE"],
+            max_overflow=config["DB_MAX_OVERFLOW"],
+            pool_timeout=config["DB_POOL_TIMEOUT"],
+        )
+    return options
+
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", secrets.token_bytes())
@@ -32,6 +57,19 @@ class Config:
         f"{os.getenv('MARIADB_DATABASE', 'default_db')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool of every engine; connections idle longer than the recycle time are replaced
+    # before MariaDB's wait_timeout drops them, and pre-ping discards the ones dropped anyway
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "280"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True") in ("True", "true", "1")
+    # Comma separated URIs of read replicas, bound as replica_0, replica_1... The read-only repository
+    # methods query them; a client that wrote reads from the primary for the lag seconds after
+    SQLALCHEMY_REPLICA_URIS = [
+        uri.strip() for uri in os.getenv("SQLALCHEMY_REPLICA_URIS", "").split(",") if uri.strip()
+    ]
+    SQLALCHEMY_REPLICA_LAG_SECONDS = float(os.getenv("SQLALCHEMY_REPLICA_LAG_SECONDS", "5"))
     TIMEZONE = "Europe/Madrid"
     TEMPLATES_AUTO_RELOAD = True
     PHOTO_UPLOAD_FOLDER = os.path.join(BASE_DIR, "app", "static", "img", "photos")
@@ -53,10 +91,36 @@ class Config:
     ELASTICSEARCH_INDEX = os.getenv("ELASTICSEARCH_INDEX", "search_index")
     ELASTICSEARCH_RETRY_ATTEMPTS = int(os.getenv("ELASTICSEARCH_RETRY_ATTEMPTS", "5"))
     ELASTICSEARCH_RETRY_DELAY = int(os.getenv("ELASTICSEARCH_RETRY_DELAY", "2"))
+    ELASTICSEARCH_BREAKER_FAILURE_THRESHOLD = int(os.getenv("ELASTICSEARCH_BREAKER_FAILURE_THRESHOLD", "3"))
+    ELASTICSEARCH_BREAKER_RESET_SECONDS = float(os.getenv("ELASTICSEARCH_BREAKER_RESET_SECONDS", "30"))
+    # Search backend: "elasticsearch" or the embedded "sqlite" (FTS5) engine
+    SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "elasticsearch")
+    SEARCH_SQLITE_PATH = os.getenv("SEARCH_SQLITE_PATH", os.path.join(BASE_DIR, "instance", "search_index.sqlite3"))
+    # Search index outbox settings
+    SEARCH_OUTBOX_WORKER_ENABLED = os.getenv("SEARCH_OUTBOX_WORKER_ENABLED", "True") in ("True", "true", "1")
+    SEARCH_OUTBOX_DEBOUNCE_SECONDS = float(os.getenv("SEARCH_OUTBOX_DEBOUNCE_SECONDS", "2"))
+    SEARCH_OUTBOX_BATCH_SIZE = int(os.getenv("SEARCH_OUTBOX_BATCH_SIZE", "100"))
+    SEARCH_OUTBOX_POLL_SECONDS = float(os.getenv("SEARCH_OUTBOX_POLL_SECONDS", "30"))
+    # Seconds a dataset's recommendations are reused before being scored again (0 disables the cache)
+    RECOMMENDATION_CACHE_SECONDS = float(os.getenv("RECOMMENDATION_CACHE_SECONDS", "300"))
+    # Homepage statistics snapshot: served fresh for the TTL, then served stale while it is rebuilt
+    # in the background, until it is older than the max staleness (a TTL of 0 disables the snapshot)
+    HOMEPAGE_STATS_TTL_SECONDS = float(os.getenv("HOMEPAGE_STATS_TTL_SECONDS", "30"))
+    HOMEPAGE_STATS_MAX_STALE_SECONDS = float(os.getenv("HOMEPAGE_STATS_MAX_STALE_SECONDS", "300"))
+    # Seconds the identity of a logged-in user (role, profile summary, curated communities) is reused
+    # between requests; it is dropped as soon as one of them changes (0 reads it on every request)
+    IDENTITY_CACHE_SECONDS = float(os.getenv("IDENTITY_CACHE_SECONDS", "60"))
+    # Per-request SQL instrumentation: number and time of the queries, as a Server-Timing header and/or a
+    # JSON log line; a statement run this many times in one request is reported as an N+1 suspect
+    SQL_INSTRUMENTATION_ENABLED = os.getenv("SQL_INSTRUMENTATION_ENABLED", "True") in ("True", "true", "1")
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+    SQL_SERVER_TIMING = os.getenv("SQL_SERVER_TIMING", "False") in ("True", "true", "1")
+    SQL_REQUEST_LOG = os.getenv("SQL_REQUEST_LOG", "False") in ("True", "true", "1")
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    SQL_SERVER_TIMING = True
 
 
 class TestingConfig(Config):
@@ -68,9 +132,14 @@ class TestingConfig(Config):
         f"{os.getenv('MARIADB_PORT', '3306')}/"
         f"{os.getenv('MARIADB_TEST_DATABASE', 'default_db')}"
     )
+    SQLALCHEMY_REPLICA_URIS = []
     WTF_CSRF_ENABLED = False
+    SEARCH_OUTBOX_WORKER_ENABLED = False
+    HOMEPAGE_STATS_TTL_SECONDS = 0
+    IDENTITY_CACHE_SECONDS = 0
     MAIL_SUPPRESS_SEND = os.getenv("WORKING_DIR", "") != "/app/"
 
 
 class ProductionConfig(Config):
     DEBUG = False
+    SQL_REQUEST_LOG = True
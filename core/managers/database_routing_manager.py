@@ -0,0 +1,46 @@
+import time
+
+from flask import g, session
+
+from core.repositories.routing import WROTE_KEY, primary_only, replica_bind_keys
+
+# Flask session key holding until when the client reads from the primary after writing
+PRIMARY_UNTIL_KEY = "_db_primary_until"
+
+
+class DatabaseRoutingManager:
+    def __init__(self, app, db):
+        self.app = app
+        self.db = db
+
+    def register_routing(self):
+        """
+        Keep a client on the primary for ``SQLALCHEMY_REPLICA_LAG_SECONDS`` after a request of it wrote,
+        so the pages it is redirected to show its own changes even if the replicas lag behind.
+        """
+        if not replica_bind_keys(self.app.config.get("SQLALCHEMY_BINDS") or {}):
+            return
+
+        lag_seconds = self.app.config.get("SQLALCHEMY_REPLICA_LAG_SECONDS", 5)
+
+        @self.app.before_request
+        def read_own_writes():
+            if session.get(PRIMARY_UNTIL_KEY, 0) > time.time():
+                g.db_primary_only = primary_only()
+                g.db_primary_only.__enter__()
+
+        @self.app.after_request
+        def remember_writes(response):
+            if self.db.session.info.get(WROTE_KEY):
+                session[PRIMARY_UNTIL_KEY] = time.time() + lag_seconds
+            return response
+
+        @self.app.teardown_request
+        def release_primary(exc):
+            context = g.pop("db_primary_only", None)
+            if context is not None:
+                try:
+                    context.__exit__(None, None, None)
+                except ValueError:
+                    # Torn down from another context (a streamed response), where it was never set
+                    pass
@@ -0,0 +1,138 @@
+import json
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Recorders of the current request (or test), innermost last; every one of them sees each statement
+_recorders = ContextVar("sql_recorders", default=())
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|:\w+)(?:\s*,\s*(?:\?|%s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with its literals and IN lists collapsed, so executions differing only in values match."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _NUMBER_LITERAL.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def add(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """``[(fingerprint, executions)]`` of the statements run at least ``threshold`` times, most first."""
+        return [(statement, count) for statement, count in self.fingerprints.most_common() if count >= threshold]
+
+    def report(self, threshold=2):
+        lines = [f"{self.count} queries in {self.duration * 1000:.1f} ms"]
+        lines += [f"  {count}x {statement}" for statement, count in self.repeated(threshold)]
+        return "\n".join(lines)
+
+
+def start_recording():
+    """Start collecting the statements executed, in any engine, into a new ``QueryStats``."""
+    stats = QueryStats()
+    return stats, _recorders.set(_recorders.get() + (stats,))
+
+
+def stop_recording(token):
+    try:
+        _recorders.reset(token)
+    except ValueError:
+        # Stopped from another context (a streamed response): drop the whole stack of this one
+        _recorders.set(())
+
+
+@contextmanager
+def record_queries():
+    """Collect the statements executed inside the block into a ``QueryStats``."""
+    stats, token = start_recording()
+    try:
+        yield stats
+    finally:
+        stop_recording(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _recorders.get():
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    recorders = _recorders.get()
+    if not recorders or not conn.info.get("query_start_time"):
+        return
+    duration = time.perf_counter() - conn.info["query_start_time"].pop()
+    for stats in recorders:
+        stats.add(statement, duration)
+
+
+class QueryInstrumentationManager:
+    def __init__(self, app):
+        self.app = app
+
+    def register_instrumentation(self):
+        if not self.app.config.get("SQL_INSTRUMENTATION_ENABLED", True):
+            return
+
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+        @self.app.before_request
+        def start_recording_queries():
+            g.sql_stats, g.sql_recording_token = start_recording()
+
+        @self.app.after_request
+        def report_queries(response):
+            stats = g.get("sql_stats")
+            if stats is not None:
+                self._report(stats, response)
+            return response
+
+        @self.app.teardown_request
+        def stop_recording_queries(exc):
+            token = g.pop("sql_recording_token", None)
+            if token is not None:
+                stop_recording(token)
+
+    def _report(self, stats, response):
+        threshold = self.app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 10)
+        repeated = stats.repeated(threshold)
+
+        if self.app.config.get("SQL_SERVER_TIMING"):
+            response.headers.add("Server-Timing", f'sql;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"')
+            if repeated:
+                response.headers.add("Server-Timing", f'sql-repeated;desc="{len(repeated)} N+1 suspects"')
+
+        if repeated or self.app.config.get("SQL_REQUEST_LOG"):
+            record = {
+                "event": "sql",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "queries": stats.count,
+                "sql_ms": round(stats.duration * 1000, 1),
+                "n_plus_one": [{"statement": statement, "count": count} for statement, count in repeated],
+            }
+            log = self.app.logger.warning if repeated else self.app.logger.info
+            log(json.dumps(record))
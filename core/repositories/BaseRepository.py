@@ -1,6 +1,9 @@
-from typing import Generic, List, NoReturn, Optional, TypeVar, Union
+from typing import Any, Dict, Generic, Iterable, Iterator, List, NoReturn, Optional, TypeVar, Union
+
+from sqlalchemy import Select, insert, literal, select
 
 import app
+from core.repositories.pagination import DEFAULT_PAGE_SIZE, KeysetPage, keyset_paginate
 
 T = TypeVar("T")
 
@@ -19,6 +22,60 @@ class BaseRepository(Generic[T]):
             self.session.flush()
         return instance
 
+    def create_if_absent(self, commit: bool = True, unless=None, **kwargs) -> bool:
+        """
+        Insert a row unless it would duplicate a unique key of the table, as a single ``INSERT IGNORE``
+        (``INSERT OR IGNORE`` on SQLite), so concurrent requests cannot both insert it. No instance is
+        built or added to the session. ``unless`` is an optional condition (an ``EXISTS`` on another
+        table, say) that also skips the row, checked by the same statement. Returns whether the row
+        was inserted.
+        """
+        statement = insert(self.model)
+        if unless is None:
+            statement = statement.values(**kwargs)
+        else:
+            columns = self.model.__table__.c
+            row = select(*[literal(value, columns[key].type) for key, value in kwargs.items()]).where(~unless)
+            statement = statement.from_select(list(kwargs), row)
+        statement = statement.prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+        inserted = self.session.execute(statement).rowcount == 1
+        if commit:
+            self.session.commit()
+        return inserted
+
+    def bulk_create(self, rows: Iterable[Union[Dict[str, Any], T]], commit: bool = True) -> List[T]:
+        """
+        Create many instances in a single flush and return them with their ids assigned. ``rows`` are
+        instances or dicts of column values. The flush batches the INSERTs (one multi-row statement where
+        the database can return the new ids) and still runs the session listeners.
+        """
+        instances: List[T] = [row if isinstance(row, self.model) else self.model(**row) for row in rows]
+        if not instances:
+            return instances
+        self.session.add_all(instances)
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return instances
+
+    def bulk_update(self, rows: Iterable[Dict[str, Any]], commit: bool = True) -> int:
+        """
+        Apply ``{"id": ..., column: value}`` changes to many instances: one IN query loads them and a single
+        flush writes them, with the UPDATEs of the same columns grouped into one executemany. Returns the
+        number of instances found.
+        """
+        changes = {row["id"]: {key: value for key, value in row.items() if key != "id"} for row in rows}
+        instances: List[T] = self.get_many(changes)
+        for instance in instances:
+            for key, value in changes[instance.id].items():
+                setattr(instance, key, value)
+        if commit:
+            self.session.commit()
+        else:
+            self.session.flush()
+        return len(instances)
+
     def get_by_id(self, id: int) -> Optional[T]:
         instance: Optional[T] = self.model.query.get(id)
         return instance
@@ -27,6 +84,36 @@ class BaseRepository(Generic[T]):
         instances: List[T] = self.session.query(self.model).filter(getattr(self.model, column_name) == value).all()
         return instances
 
+    def get_many(self, ids: Iterable[int]) -> List[T]:
+        """Instances of ``ids`` in a single IN query, in the order of ``ids``; missing ids are skipped."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        instances = {instance.id: instance for instance in self.model.query.filter(self.model.id.in_(ids))}
+        return [instances[id] for id in ids if id in instances]
+
+    def stream(self, query: Optional[Union[Select, Any]] = None, batch_size: int = 1000) -> Iterator[T]:
+        """
+        Iterate over the instances of ``query`` (a ``select()`` or a legacy ``Query``, all the rows of the
+        model by default) fetching and building ``batch_size`` of them at a time. The session must not be
+        committed while the generator is consumed.
+        """
+        if query is None:
+            query = select(self.model).order_by(self.model.id)
+        if isinstance(query, Select):
+            yield from self.session.execute(query.execution_options(yield_per=batch_size)).scalars()
+        else:
+            yield from query.yield_per(batch_size)
+
+    def paginate(self, query=None, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE) -> KeysetPage:
+        """Newest-first keyset page of ``query`` (all the rows of the model by default) after ``cursor``."""
+        return keyset_paginate(query if query is not None else self.model.query, self.model, cursor, limit)
+
+    def exists(self, *criteria, **filters) -> bool:
+        """Whether any row matches, as a ``SELECT EXISTS`` that stops at the first match."""
+        query = self.session.query(self.model).filter(*criteria).filter_by(**filters)
+        return self.session.query(query.exists()).scalar()
+
     def get_or_404(self, id: int) -> Union[T, NoReturn]:
         return self.model.query.get_or_404(id)
 
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Generic, List, NamedTuple, Optional, TypeVar
+
+from sqlalchemy import and_, or_
+
+T = TypeVar("T")
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class KeysetPage(NamedTuple, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str]
+
+
+def clamp_page_size(limit, default: int = DEFAULT_PAGE_SIZE) -> int:
+    """Requested page size as an int between 1 and ``MAX_PAGE_SIZE``; ``default`` when missing or invalid."""
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Columns are stored without timezone; aware values still in memory are compared as UTC
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """Opaque cursor pointing just after the row ``(created_at, id)``."""
+    payload = json.dumps([_naive_utc(created_at).isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """``(created_at, id)`` of ``encode_cursor``; raises ``ValueError`` on anything else."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(payload)
+        return _naive_utc(datetime.fromisoformat(created_at)), int(id)
+    except (TypeError, ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+def keyset_paginate(query, model, cursor: Optional[str] = None, limit=DEFAULT_PAGE_SIZE) -> KeysetPage:
+    """
+    Newest-first page of ``query`` (a legacy ``Query`` over ``model``) after ``cursor``. Rows are ordered
+    by ``(created_at, id)`` and the page seeks past the cursor with a WHERE on those columns, so every
+    page costs the same however deep it is, and rows inserted meanwhile do not shift the next pages.
+    """
+    limit = clamp_page_size(limit)
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.filter(or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < id)))
+
+    # One extra row tells whether there is a next page
+    items = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(items) <= limit:
+        return KeysetPage(items, None)
+
+    items = items[:limit]
+    return KeysetPage(items, encode_cursor(items[-1].created_at, items[-1].id))
@@ -0,0 +1,80 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+# Bind keys of SQLALCHEMY_BINDS starting with this are read replicas of the primary database
+REPLICA_BIND_PREFIX = "replica"
+# session.info key set once the session has written, so its later reads see its own writes
+WROTE_KEY = "wrote_to_primary"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_primary_only = ContextVar("primary_only", default=False)
+
+
+def read_only(method):
+    """
+    Run the queries of a repository method on a read replica, if one is configured. Reads still go
+    to the primary once the session has written (read-after-write) and inside ``primary_only``.
+    """
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    return wrapper
+
+
+@contextmanager
+def primary_only():
+    """Send every query of the block to the primary, including those of ``read_only`` methods."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+def replica_bind_keys(engines):
+    return [key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+
+
+class RoutingSession(Session):
+    """
+    ``db.session`` class sending the reads of ``read_only`` repository methods to a random read
+    replica. Flushes, DML statements and every read of a session that has already written go to
+    the primary, as does everything when no replica is configured.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and _replica_reads.get() and not _primary_only.get():
+            replica = self._replica_engine(clause)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _replica_engine(self, clause):
+        if self._flushing or isinstance(clause, UpdateBase) or self.info.get(WROTE_KEY):
+            return None
+        engines = self._db.engines
+        keys = replica_bind_keys(engines)
+        return engines[random.choice(keys)] if keys else None
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[WROTE_KEY] = True
@@ -1,9 +1,10 @@
 from datetime import datetime
 
-from flask import request
+from flask import request, url_for
 from flask_restful import Resource
 
 from app import db
+from core.repositories.pagination import clamp_page_size, keyset_paginate
 
 
 def convert_value(value):
@@ -13,20 +14,48 @@ def convert_value(value):
 
 
 class GenericResource(Resource):
-    def __init__(self, model, serializer):
+    def __init__(self, model, serializer, load_options=None):
         self.model = model
         self.model_name = model.__name__
         self.serializer = serializer
+        # Callable returning loader options for the relationships the serializer walks, so reads
+        # do not lazy load them item by item
+        self.load_options = load_options
 
     def get(self, id=None):
+        # ?fields=a,b serializes only those keys and prefetches only what they read
+        try:
+            fields = self.serializer.select_fields(request.args.get("fields"))
+        except ValueError as exc:
+            return {"message": str(exc)}, 400
+
+        options = [*(self.load_options() if self.load_options else ()), *self.serializer.load_options(fields)]
+        query = self.model.query.options(*options)
         if id:
-            item = self.model.query.get(id)
+            item = query.get(id)
             if not item:
                 return {"message": f"{self.model_name} not found"}, 404
-            return self.serializer.serialize(item), 200
+            return self.serializer.serialize(item, fields), 200
         else:
-            items = self.model.query.all()
-            return {"items": [self.serializer.serialize(i) for i in items]}, 200
+            # Newest first, one page at a time: ?limit= (capped) and the ?cursor= of the "next" link
+            limit = clamp_page_size(request.args.get("limit"))
+            try:
+                page = keyset_paginate(query, self.model, request.args.get("cursor"), limit)
+            except ValueError as exc:
+                return {"message": str(exc)}, 400
+            next_url = (
+                url_for(
+                    request.endpoint,
+                    cursor=page.next_cursor,
+                    limit=limit,
+                    fields=request.args.get("fields"),
+                    _external=True,
+                )
+                if page.next_cursor
+                else None
+            )
+            items = self.serializer.serialize_many(page.items, fields, prefetch=False)
+            return {"items": items, "next": next_url}, 200
 
     def post(self):
         data = request.get_json()
@@ -63,9 +92,9 @@ class GenericResource(Resource):
         return {"message": f"{self.model_name} deleted successfully"}, 204
 
 
-def create_resource(model, serialization_fields=None):
+def create_resource(model, serialization_fields=None, load_options=None):
     class Resource(GenericResource):
         def __init__(self):
-            super().__init__(model, serialization_fields)
+            super().__init__(model, serialization_fields, load_options)
 
     return Resource
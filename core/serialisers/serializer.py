@@ -1,4 +1,13 @@
+import inspect
 from datetime import datetime
+from functools import partial
+
+from sqlalchemy import select
+from sqlalchemy.orm import object_session
+
+
+def _getattr_or_none(instance, name):
+    return getattr(instance, name, None)
 
 
 def convert_value(value):
@@ -8,24 +17,96 @@ def convert_value(value):
 
 
 class Serializer:
-    def __init__(self, serialization_fields, related_serializers=None):
+    """
+    Serializes instances into dicts of ``{key: attribute or method name}``. The fields are compiled
+    once per model class into getter tuples, so serializing an instance does no name lookups or
+    ``callable`` checks.
+
+    ``prefetch`` maps a key to a callable returning the loader options that field needs (for the
+    relationships a method walks, for instance), so ``serialize_many`` can load them for the whole
+    batch in one go. Callers may ask for a subset of the keys (a sparse fieldset), and then neither
+    the other fields nor their prefetches are computed.
+    """
+
+    def __init__(self, serialization_fields, related_serializers=None, prefetch=None):
         self.serialization_fields = serialization_fields
         self.related_serializers = related_serializers or {}
+        self.prefetch = prefetch or {}
+        self._compiled = {}
+
+    def select_fields(self, fields=None):
+        """Keys to serialize for a comma separated string or list of keys; all of them by default."""
+        if not fields:
+            return tuple(self.serialization_fields)
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        selected = tuple(dict.fromkeys(field.strip() for field in fields if field.strip()))
+        unknown = [field for field in selected if field not in self.serialization_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return selected
+
+    def load_options(self, fields=None):
+        """Loader options prefetching the relationships of ``fields``, to apply to the query of the batch."""
+        options = []
+        for key in self.select_fields(fields):
+            if key in self.prefetch:
+                options.extend(self.prefetch[key]())
+        return options
+
+    def _compile(self, model, fields):
+        compiled = self._compiled.get((model, fields))
+        if compiled is not None:
+            return compiled
 
-    def serialize(self, instance):
+        compiled = []
+        for key in fields:
+            attr_name = self.serialization_fields[key]
+            # Methods are called unbound; columns, properties and relationships are read
+            method = inspect.getattr_static(model, attr_name, None)
+            if inspect.isfunction(method):
+                getter = getattr(model, attr_name)
+            else:
+                getter = partial(_getattr_or_none, name=attr_name)
+            compiled.append((key, getter, self.related_serializers.get(key)))
+
+        compiled = self._compiled[(model, fields)] = tuple(compiled)
+        return compiled
+
+    def serialize(self, instance, fields=None):
+        return self._serialize(instance, self.select_fields(fields))
+
+    def _serialize(self, instance, fields):
         serialized_data = {}
-        for key, attr_name in self.serialization_fields.items():
-            if key in self.related_serializers:
-                related_data = getattr(instance, attr_name)()
-                if isinstance(related_data, list):
-                    serialized_data[key] = [
-                        self.related_serializers[key].serialize(sub_instance) for sub_instance in related_data
-                    ]
-                else:
-                    serialized_data[key] = self.related_serializers[key].serialize(related_data)
+        for key, getter, related_serializer in self._compile(type(instance), fields):
+            value = getter(instance)
+            if related_serializer is None:
+                serialized_data[key] = convert_value(value)
+            elif isinstance(value, list):
+                serialized_data[key] = related_serializer.serialize_many(value, prefetch=False)
             else:
-                attr = getattr(instance, attr_name, None)
-                if callable(attr):
-                    attr = attr()
-                serialized_data[key] = convert_value(attr)
+                serialized_data[key] = related_serializer.serialize(value)
         return serialized_data
+
+    def serialize_many(self, instances, fields=None, prefetch=True):
+        """
+        Serialize a batch. With ``prefetch`` the relationships of the selected fields are first loaded
+        for every instance with one query per relationship; pass ``False`` when the query that loaded
+        ``instances`` already applied ``load_options``.
+        """
+        fields = self.select_fields(fields)
+        instances = list(instances)
+        if prefetch and instances:
+            self._prefetch(instances, fields)
+        return [self._serialize(instance, fields) for instance in instances]
+
+    def _prefetch(self, instances, fields):
+        options = self.load_options(fields)
+        session = object_session(instances[0])
+        if not options or session is None:
+            return
+
+        # Eager loaders fill the relationships of the instances already in the session
+        model = type(instances[0])
+        ids = [instance.id for instance in instances]
+        session.execute(select(model).where(model.id.in_(ids)).options(*options)).scalars().all()
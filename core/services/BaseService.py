@@ -8,12 +8,33 @@ class BaseService:
     def create(self, **kwargs):
         return self.repository.create(**kwargs)
 
+    def create_if_absent(self, **kwargs) -> bool:
+        return self.repository.create_if_absent(**kwargs)
+
+    def bulk_create(self, rows, **kwargs):
+        return self.repository.bulk_create(rows, **kwargs)
+
+    def bulk_update(self, rows, **kwargs):
+        return self.repository.bulk_update(rows, **kwargs)
+
     def count(self) -> int:
         return self.repository.count()
 
+    def exists(self, *criteria, **filters) -> bool:
+        return self.repository.exists(*criteria, **filters)
+
     def get_by_id(self, id):
         return self.repository.get_by_id(id)
 
+    def get_many(self, ids):
+        return self.repository.get_many(ids)
+
+    def paginate(self, cursor=None, limit=None):
+        return self.repository.paginate(cursor=cursor, limit=limit)
+
+    def stream(self, query=None, batch_size=1000):
+        return self.repository.stream(query, batch_size)
+
     def get_or_404(self, id):
         return self.repository.get_or_404(id)
 
@@ -0,0 +1,39 @@
+"""Add FULLTEXT indexes for explore
+
+Revision ID: 720bf0b2a298
+Revises: 48970602e0f8
+Create Date: 2026-10-19 11:02:47.530916
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '720bf0b2a298'
+down_revision = '48970602e0f8'
+branch_labels = None
+depends_on = None
+
+
+FULLTEXT_INDEXES = [
+    ('ix_ds_meta_data_fulltext', 'ds_meta_data', ['title', 'description', 'tags']),
+    ('ix_author_fulltext', 'author', ['name', 'affiliation', 'orcid']),
+    ('ix_fm_meta_data_fulltext', 'fm_meta_data', ['fits_filename', 'title', 'description', 'publication_doi', 'tags']),
+]
+
+
+def upgrade():
+    # FULLTEXT indexes only exist in MariaDB/MySQL; other databases fall back to LIKE matching
+    if op.get_bind().dialect.name not in ('mysql', 'mariadb'):
+        return
+
+    for index_name, table_name, columns in FULLTEXT_INDEXES:
+        op.create_index(index_name, table_name, columns, unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name not in ('mysql', 'mariadb'):
+        return
+
+    for index_name, table_name, _ in FULLTEXT_INDEXES:
+        op.drop_index(index_name, table_name=table_name)
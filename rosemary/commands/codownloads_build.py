@@ -0,0 +1,36 @@
+import click
+from flask.cli import with_appcontext
+
+from app import create_app
+
+
+@click.command("codownloads:build", help="Rebuilds the 'also downloaded' datasets from the download records.")
+@click.option(
+    "--window-hours",
+    default=24,
+    show_default=True,
+    type=float,
+    help="Downloads of the same visitor less than this apart count as one session.",
+)
+@click.option("--neighbours", default=10, show_default=True, type=int, help="Neighbours kept per dataset.")
+@click.option(
+    "--min-co-downloads",
+    default=2,
+    show_default=True,
+    type=int,
+    help="Sessions two datasets must share before they are linked.",
+)
+@with_appcontext
+def codownloads_build(window_hours, neighbours, min_co_downloads):
+    app = create_app()
+    with app.app_context():
+        from app.modules.dataset.services import DataSetCoDownloadService
+
+        try:
+            stored = DataSetCoDownloadService().rebuild(
+                window_hours=window_hours, limit=neighbours, min_co_downloads=min_co_downloads
+            )
+        except Exception as e:
+            click.echo(click.style(f"Error building the co-download table: {e}", fg="red"))
+            return
+        click.echo(click.style(f"Co-download table rebuilt: {stored} dataset(s) with neighbours.", fg="green"))
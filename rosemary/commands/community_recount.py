@@ -0,0 +1,22 @@
+import click
+from flask.cli import with_appcontext
+
+from app import create_app
+
+
+@click.command(
+    "community:recount",
+    help="Recounts the dataset counts, size and downloads of every community, repairing drifted counters.",
+)
+@with_appcontext
+def community_recount():
+    app = create_app()
+    with app.app_context():
+        from app.modules.community.services import CommunityService
+
+        try:
+            recounted = CommunityService().recount_aggregates()
+        except Exception as e:
+            click.echo(click.style(f"Error recounting the community aggregates: {e}", fg="red"))
+            return
+        click.echo(click.style(f"{recounted} community(ies) recounted.", fg="green"))
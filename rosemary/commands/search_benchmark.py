@@ -0,0 +1,69 @@
+import json
+
+import click
+from flask.cli import with_appcontext
+
+from app import create_app
+
+
+@click.command("search:benchmark", help="Measures search latency and ranking quality on a synthetic corpus.")
+@click.option(
+    "--backend",
+    default="sqlite",
+    type=click.Choice(["elasticsearch", "sqlite"]),
+    help="Search backend to benchmark.",
+)
+@click.option("--datasets", default=1000, type=int, help="Number of synthetic datasets in the corpus.")
+@click.option("--seed", default=42, type=int, help="Seed of the synthetic corpus and query mix.")
+@click.option("--queries", default=50, type=int, help="Number of queries per category.")
+@click.option("--repeat", default=1, type=int, help="Number of times the query mix is replayed.")
+@click.option("--index", default="search_benchmark", help="Elasticsearch index used for the run.")
+@click.option("--keep-index", is_flag=True, help="Do not delete the Elasticsearch benchmark index afterwards.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write the JSON report to this file.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False), help="Previous report to compare with.")
+@with_appcontext
+def search_benchmark(backend, datasets, seed, queries, repeat, index, keep_index, output, baseline):
+    app = create_app()
+    with app.app_context():
+        from app.modules.elasticsearch.benchmark import compare_reports, run_benchmark
+        from app.modules.elasticsearch.services import ElasticsearchService
+        from app.modules.elasticsearch.sqlite_backend import SQLiteSearchBackend
+
+        try:
+            if backend == "elasticsearch":
+                service = ElasticsearchService(index_name=index)
+            else:
+                # A throwaway in-memory database, so the real embedded index is left untouched
+                service = SQLiteSearchBackend(path=":memory:")
+            service.create_index_if_not_exists()
+        except Exception as e:
+            click.echo(click.style(f"Error preparing the {backend} backend: {e}", fg="red"))
+            return
+
+        try:
+            report = run_benchmark(
+                service, backend, datasets=datasets, seed=seed, queries_per_category=queries, repeat=repeat
+            )
+        except Exception as e:
+            click.echo(click.style(f"Error running the search benchmark: {e}", fg="red"))
+            return
+        finally:
+            if backend == "elasticsearch" and not keep_index:
+                service.es.indices.delete(index=index, ignore_unavailable=True)
+            elif backend == "sqlite":
+                service.close()
+
+        rendered = json.dumps(report, indent=2)
+        if output:
+            with open(output, "w") as f:
+                f.write(rendered)
+            click.echo(click.style(f"Benchmark report written to {output}.", fg="green"))
+        else:
+            click.echo(rendered)
+
+        if baseline:
+            with open(baseline) as f:
+                changes = compare_reports(json.load(f), report)
+            for category, change in changes.items():
+                colour = "red" if change > 0.1 else "green" if change < -0.1 else "white"
+                click.echo(click.style(f"{category}: p95 {change:+.1%} vs baseline", fg=colour))
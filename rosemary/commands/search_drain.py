@@ -0,0 +1,28 @@
+import click
+from flask.cli import with_appcontext
+
+from app import create_app
+
+
+@click.command("search:drain", help="Reindexes the datasets queued in the search index outbox.")
+@click.option("--debounce", default=0, type=int, help="Only process entries older than this many seconds.")
+@click.option("--batch-size", default=100, type=int, help="Number of datasets reindexed per bulk request.")
+@with_appcontext
+def search_drain(debounce, batch_size):
+    app = create_app()
+    with app.app_context():
+        from app.modules.elasticsearch.services import SearchIndexOutboxService
+
+        service = SearchIndexOutboxService()
+        pending = service.count_pending()
+        if not pending:
+            click.echo(click.style("Search index outbox is empty. Nothing to drain.", fg="yellow"))
+            return
+
+        try:
+            processed = service.drain_all(debounce_seconds=debounce, batch_size=batch_size)
+        except Exception as e:
+            click.echo(click.style(f"Error draining the search index outbox: {e}", fg="red"))
+            return
+
+        click.echo(click.style(f"{processed} dataset(s) reindexed from the search index outbox.", fg="green"))
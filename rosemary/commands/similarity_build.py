@@ -0,0 +1,31 @@
+import click
+from flask.cli import with_appcontext
+
+from app import create_app
+
+
+@click.command("similarity:build", help="Computes the TF-IDF text neighbours used by the dataset recommendations.")
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Only score the datasets without stored neighbours instead of rebuilding every list.",
+)
+@click.option("--dataset-id", "dataset_ids", multiple=True, type=int, help="Only score these datasets (repeatable).")
+@click.option("--neighbours", default=10, show_default=True, type=int, help="Neighbours kept per dataset.")
+@click.option("--batch-size", default=256, show_default=True, type=int, help="Datasets compared per batch.")
+@with_appcontext
+def similarity_build(incremental, dataset_ids, neighbours, batch_size):
+    app = create_app()
+    with app.app_context():
+        from app.modules.dataset.services import DataSetNeighbourService
+
+        service = DataSetNeighbourService()
+        try:
+            if incremental or dataset_ids:
+                scored = service.update(list(dataset_ids) or None, limit=neighbours, batch_size=batch_size)
+                click.echo(click.style(f"{scored} dataset(s) scored and merged into the neighbours table.", fg="green"))
+            else:
+                stored = service.rebuild(limit=neighbours, batch_size=batch_size)
+                click.echo(click.style(f"Neighbours table rebuilt: {stored} dataset(s) with neighbours.", fg="green"))
+        except Exception as e:
+            click.echo(click.style(f"Error building the neighbours table: {e}", fg="red"))
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask.cli import with_appcontext
+
+from app import create_app
+
+
+@click.command("stats:rollup", help="Aggregates download and view records into the daily stats tables.")
+@click.option(
+    "--archive-days",
+    default=None,
+    type=int,
+    help="Also delete raw records older than this many days once their days are rolled up.",
+)
+@with_appcontext
+def stats_rollup(archive_days):
+    app = create_app()
+    with app.app_context():
+        from app.modules.dataset.services import DSDailyStatsService
+        from app.modules.hubfile.services import HubfileDailyStatsService
+
+        for label, service in (("dataset", DSDailyStatsService()), ("file", HubfileDailyStatsService())):
+            try:
+                rows = service.roll_up()
+            except Exception as e:
+                click.echo(click.style(f"Error rolling up {label} stats: {e}", fg="red"))
+                continue
+            click.echo(click.style(f"{rows} daily {label} stats row(s) rolled up.", fg="green"))
+
+            if archive_days is not None:
+                before = datetime.now(timezone.utc).date() - timedelta(days=archive_days)
+                archived = service.archive_records(before)
+                click.echo(click.style(f"{archived} raw {label} record(s) archived.", fg="yellow"))